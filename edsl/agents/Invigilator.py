@@ -2,6 +2,7 @@
 import json
 from typing import Coroutine, Dict, Any, Optional
 
+from edsl.data.CacheEntry import CacheEntry
 from edsl.exceptions import AgentRespondedWithBadJSONError
 from edsl.prompts.Prompt import Prompt
 from edsl.utilities.decorators import sync_wrapper, jupyter_nb_handler
@@ -57,6 +58,17 @@ class InvigilatorAI(PromptConstructorMixin, InvigilatorBase):
 
         return response
 
+    def get_cache_key(self) -> str:
+        """Return the cache key of the model call that answers the question."""
+        prompts = self.get_prompts()
+        return CacheEntry.gen_key(
+            model=str(self.model.model),
+            parameters=self.model.parameters,
+            system_prompt=prompts["system_prompt"].text,
+            user_prompt=prompts["user_prompt"].text,
+            iteration=self.iteration,
+        )
+
     def _format_raw_response(
         self, *, agent, question, scenario, raw_response, raw_model_response
     ) -> AgentResponseDict:
@@ -75,7 +87,7 @@ class InvigilatorAI(PromptConstructorMixin, InvigilatorBase):
                 cache_key = raw_response["raw_model_response"]["cache_key"]
             else:
                 cache_key = None
-            del self.cache.data[cache_key]
+            del self.cache[cache_key]
             raise e
 
         comment = response.get("comment", "")
@@ -177,6 +189,10 @@ class InvigilatorSidecar(InvigilatorAI):
         response.update({"simple_model_raw_response": simple_response})
         return AgentResponseDict(**response)
 
+    def get_cache_key(self) -> None:
+        """The prompts sent to the models depend on the simple model's response."""
+        return None
+
     # get_response = sync_wrapper(async_get_response)
     answer_question = sync_wrapper(async_answer_question)
 
@@ -54,6 +54,10 @@ class InvigilatorBase(ABC):
             "system_prompt": Prompt("NA").text,
         }
 
+    def get_cache_key(self) -> Optional[str]:
+        """Return the cache key of the model call that answers the question, or None if there is no such call."""
+        return None
+
     @classmethod
     def example(cls):
         """Return an example invigilator."""
@@ -102,13 +102,19 @@ class PromptConstructorMixin:
         return user_prompt
 
     def get_prompts(self) -> Dict[str, Prompt]:
-        """Get both prompts for the LLM call."""
-        system_prompt = self.construct_system_prompt()
-        user_prompt = self.construct_user_prompt()
-        return {
-            "user_prompt": user_prompt,
-            "system_prompt": system_prompt,
-        }
+        """Get both prompts for the LLM call.
+
+        The prompts are rendered the first time they are needed and reused afterwards,
+        e.g., for estimating the tokens, calling the model, and recording the result.
+        """
+        if getattr(self, "_prompts", None) is None:
+            system_prompt = self.construct_system_prompt()
+            user_prompt = self.construct_user_prompt()
+            self._prompts = {
+                "user_prompt": user_prompt,
+                "system_prompt": system_prompt,
+            }
+        return dict(self._prompts)
 
 
 if __name__ == "__main__":
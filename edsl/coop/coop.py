@@ -1,4 +1,5 @@
 import aiohttp
+import gzip
 import json
 import os
 import requests
@@ -25,6 +26,7 @@ class Coop:
         """
         self.api_key = api_key or os.getenv("EXPECTED_PARROT_API_KEY")
         self.url = url or CONFIG.EXPECTED_PARROT_URL
+        self._supports_cache_sync = None
 
     ################
     # BASIC METHODS
@@ -45,9 +47,12 @@ class Coop:
         method: str,
         payload: Optional[dict[str, Any]] = None,
         params: Optional[dict[str, Any]] = None,
+        compress: bool = False,
     ) -> requests.Response:
         """
         Send a request to the server and return the response.
+
+        :param compress: whether to send the payload gzip-compressed.
         """
         url = f"{self.url}/{uri}"
         try:
@@ -55,6 +60,18 @@ class Coop:
                 response = requests.request(
                     method, url, params=params, headers=self.headers
                 )
+            elif compress:
+                headers = {
+                    **self.headers,
+                    "Content-Type": "application/json",
+                    "Content-Encoding": "gzip",
+                }
+                response = requests.request(
+                    method,
+                    url,
+                    data=gzip.compress(json.dumps(payload).encode()),
+                    headers=headers,
+                )
             else:
                 response = requests.request(
                     method, url, json=payload, headers=self.headers
@@ -432,6 +449,81 @@ class Coop:
         self._resolve_server_response(response)
         return response.json()
 
+    # Incremental sync, see `edsl.data.CacheSync`:
+    # - Only the digests of key prefixes, and then the keys of the prefixes that differ, are exchanged.
+    # - Entries are transferred in pages, gzip-compressed in both directions.
+    # Servers that do not have these endpoints yet are synced with the ones above.
+    def supports_cache_sync(self) -> bool:
+        """
+        Return whether the server has the endpoints of the incremental sync; the answer is asked once.
+        """
+        if self._supports_cache_sync is None:
+            response = self._send_server_request(
+                uri="api/v0/cache/get-cache-digests",
+                method="POST",
+                payload={"prefixes": [], "prefix_length": 0},
+            )
+            self._supports_cache_sync = response.status_code not in (404, 405)
+        return self._supports_cache_sync
+
+    def get_cache_digests(
+        self, prefixes: list[str], prefix_length: int
+    ) -> dict[str, list]:
+        """
+        Return the number of keys and the digest of the keys under each prefix of `prefix_length`
+        characters that extends one of `prefixes`.
+        """
+        response = self._send_server_request(
+            uri="api/v0/cache/get-cache-digests",
+            method="POST",
+            payload={"prefixes": prefixes, "prefix_length": prefix_length},
+        )
+        self._resolve_server_response(response)
+        return response.json()
+
+    def get_cache_keys(self, prefixes: list[str]) -> list[str]:
+        """
+        Return the keys of the CacheEntry objects on the server that start with one of the prefixes.
+        """
+        response = self._send_server_request(
+            uri="api/v0/cache/get-cache-keys",
+            method="POST",
+            payload={"prefixes": prefixes},
+            compress=True,
+        )
+        self._resolve_server_response(response)
+        return response.json()
+
+    def get_cache_entries_by_keys(self, keys: list[str]) -> list[CacheEntry]:
+        """
+        Return the CacheEntry objects on the server with these keys.
+
+        :param keys: the keys, at most `SYNC_PAGE_SIZE` of them.
+        """
+        response = self._send_server_request(
+            uri="api/v0/cache/get-cache-entries-by-keys",
+            method="POST",
+            payload={"keys": keys},
+            compress=True,
+        )
+        self._resolve_server_response(response)
+        return [CacheEntry.from_dict(entry) for entry in response.json()]
+
+    def upload_cache_entries(self, cache_entries: list[CacheEntry]) -> dict:
+        """
+        Send CacheEntry objects to the server, gzip-compressed.
+
+        :param cache_entries: the entries, at most `SYNC_PAGE_SIZE` of them.
+        """
+        response = self._send_server_request(
+            uri="api/v0/cache/upload-cache-entries",
+            method="POST",
+            payload={"entries": [entry.to_dict() for entry in cache_entries]},
+            compress=True,
+        )
+        self._resolve_server_response(response)
+        return response.json()
+
     ################
     # ERROR MESSAGE METHODS
     ################
@@ -1,16 +1,114 @@
 from __future__ import annotations
+import gzip
+import io
 import json
 import os
+import time
 import warnings
-from typing import Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Optional, Union
 from edsl.config import CONFIG
 from edsl.data.CacheEntry import CacheEntry
-from edsl.data.SQLiteDict import SQLiteDict
+from edsl.data.CacheStats import CacheStats
+from edsl.data.CacheSync import SYNC_PAGE_SIZE, find_missing_keys
+from edsl.data.LRUDict import LRUDict
+from edsl.data.SQLiteDict import BULK_BATCH_SIZE, SQLiteDict
+from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
+from edsl.data.RemoteDict import RemoteDict
+from edsl.data.CacheSnapshot import CacheSnapshot, SnapshotDict
+
+# The bounds of the memory tier in front of a persistent cache
+MEMORY_TIER_ENTRIES = 10_000
+MEMORY_TIER_BYTES = 100_000_000
+# The number of lines read or written at a time by the JSONL import and export
+JSONL_CHUNK_SIZE = 10_000
+# The number of entries per row group of the Parquet export, which are also read at a time
+PARQUET_ROW_GROUP_SIZE = 50_000
+PARQUET_COMPRESSION = "zstd"
+# The persistent dictionaries that a Cache can use as its `data`
+SQLITE_BACKENDS = (SQLiteDict, ShardedSQLiteDict)
+# The dictionaries that only hold CacheEntry objects, so their values are not read when a Cache is created
+ENTRY_BACKENDS = (*SQLITE_BACKENDS, SnapshotDict, RemoteDict)
 
 
 EDSL_DATABASE_PATH = CONFIG.get("EDSL_DATABASE_PATH")
 EXPECTED_PARROT_CACHE_URL = os.getenv("EXPECTED_PARROT_CACHE_URL")
 
+
+def _open_jsonl(filename: str, mode: str, compress: bool = False):
+    """
+    Open a JSONL file in text mode, gzip-compressed when reading a gzip file or when `compress` is True.
+    - Returns the text stream and the underlying binary file, whose position tracks the progress.
+    """
+    raw = open(filename, mode + "b")
+    if mode == "r":
+        compress = raw.peek(2)[:2] == b"\x1f\x8b"
+    if compress:
+        return gzip.open(raw, mode + "t", encoding="utf-8"), raw
+    return io.TextIOWrapper(raw, encoding="utf-8"), raw
+
+
+def _current_key(key: str, entry: CacheEntry) -> str:
+    """
+    Return the key of an entry in the current version of the key scheme, if `key` is its key in the first version.
+    - Files, exports, and remote caches written before keys were versioned use the first version.
+    """
+    if key != entry.key and key == entry.key_for(1):
+        return entry.key
+    return key
+
+
+def _parse_jsonl_line(line: str) -> tuple[str, CacheEntry]:
+    """Parse a line of a cache JSONL file into a key and a CacheEntry."""
+    [(key, value)] = json.loads(line).items()
+    entry = CacheEntry.from_dict(value)
+    return _current_key(key, entry), entry
+
+
+def _import_pyarrow():
+    """Import pyarrow, which the Parquet export and import need, but EDSL does not install by default."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export and import need pyarrow: `pip install edsl[parquet]` or `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+def _parquet_schema(pa):
+    """Return the schema of a Parquet cache file; repeated values, e.g., models and system prompts, are dictionary-encoded."""
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("key", pa.string()),
+            ("model", text),
+            ("parameters", text),
+            ("system_prompt", text),
+            ("user_prompt", text),
+            ("output", pa.string()),
+            ("iteration", pa.int64()),
+            ("timestamp", pa.timestamp("s", tz="UTC")),
+        ]
+    )
+
+
+@contextmanager
+def _progress(description: str, total: int, enabled: bool):
+    """Yield a function that reports how much of `total` is done, on a progress bar if `enabled`."""
+    if not enabled:
+        yield lambda completed: None
+        return
+    from rich.progress import Progress
+
+    with Progress() as progress:
+        task = progress.add_task(description, total=total)
+        yield lambda completed: progress.update(task, completed=completed)
+
+
 # TODO: What do we want to do if & when there is a mismatch
 #       -- if two keys are the same but the values are different?
 # TODO: In the read methods, if the file already exists, make sure it is valid.
@@ -23,6 +121,18 @@ class Cache:
     :param data: The data to initialize the cache with.
     :param remote: Whether to sync the Cache with the server.
     :param immediate_write: Whether to write to the cache immediately after storing a new entry.
+    :param memory_tier_entries: The maximum number of entries kept in memory in front of a persistent `data`, e.g., an SQLiteDict.
+    :param memory_tier_bytes: The maximum (estimated) size of the entries kept in memory, in bytes.
+
+    Entries that are read from or written to a persistent `data` are kept in a least-recently-used memory tier,
+    so repeated lookups do not read the database; `memory_tier.stats` reports its hits, misses, and evictions.
+    Entries should be deleted through the Cache (`del cache[key]`), so the tier does not keep them.
+    With `memory_tier_entries=0`, or when `data` is a dict, there is no memory tier.
+    `data` can also be a RemoteDict, the interface of a shared cache server; see `async_fetch`.
+
+    `stats` counts the hits, misses, and stores of the Cache, the bytes read and written,
+    and the latency of fetches and stores, by model; see `CacheStats`.
+    When `data` is an SQLiteDict or a ShardedSQLiteDict, it also counts the transactions that write the entries to the database.
 
     Deprecated:
 
@@ -34,10 +144,12 @@ class Cache:
     def __init__(
         self,
         *,
-        data: Optional[Union[SQLiteDict, dict]] = None,
+        data: Optional[Union[SQLiteDict, ShardedSQLiteDict, RemoteDict, dict]] = None,
         remote: bool = False,
         immediate_write: bool = True,
         method=None,
+        memory_tier_entries: Optional[int] = MEMORY_TIER_ENTRIES,
+        memory_tier_bytes: Optional[int] = MEMORY_TIER_BYTES,
     ):
         """
         Create two dictionaries to store the cache data.
@@ -51,6 +163,19 @@ class Cache:
         self.method = method
         self.new_entries = {}
         self.new_entries_to_write_later = {}
+        # futures for the responses that are being fetched from the language models, by key
+        self.in_flight = {}
+        # entries loaded ahead of a job, so fetching them does not read the database
+        self.prefetched = {}
+        if isinstance(self.data, dict) or memory_tier_entries == 0:
+            self.memory_tier = None
+        else:
+            self.memory_tier = LRUDict(
+                max_entries=memory_tier_entries, max_bytes=memory_tier_bytes
+            )
+        self.stats = CacheStats()
+        if isinstance(self.data, SQLITE_BACKENDS):
+            self.data.stats = self.stats
         self.coop = None
         self._perform_checks()
 
@@ -61,8 +186,13 @@ class Cache:
         return list(self.data.values())
 
     def _perform_checks(self):
-        """Perform checks on the cache."""
-        if any(not isinstance(value, CacheEntry) for value in self.data.values()):
+        """
+        Perform checks on the cache.
+        - The values of the `ENTRY_BACKENDS` are not checked, so opening a large database does not read it.
+        """
+        if not isinstance(self.data, ENTRY_BACKENDS) and any(
+            not isinstance(value, CacheEntry) for value in self.data.values()
+        ):
             raise Exception("Not all values are CacheEntry instances")
         if self.method is not None:
             warnings.warn("Argument `method` is deprecated", DeprecationWarning)
@@ -87,6 +217,39 @@ class Cache:
         Fetch a value (LLM output) from the cache.
         Return None if the response is not found.
         """
+        start = time.perf_counter()
+        key = CacheEntry.gen_key(
+            model=model,
+            parameters=parameters,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            iteration=iteration,
+        )
+        entry = self._fetch_from_memory(key)
+        if entry is None:
+            entry = self._remember(key, self.data.get(key, None))
+        self.stats.record_fetch(model, entry, time.perf_counter() - start)
+        return None if entry is None else entry.output
+
+    async def async_fetch(
+        self,
+        *,
+        model: str,
+        parameters: dict,
+        system_prompt: str,
+        user_prompt: str,
+        iteration: int,
+    ) -> Union[None, str]:
+        """
+        Fetch a value (LLM output) from the cache, like `fetch`.
+        - If `data` has an `async_get` method, e.g., a RemoteDict, the running event loop is not blocked by the lookup.
+
+        >>> import asyncio
+        >>> c = Cache.example()
+        >>> asyncio.run(c.async_fetch(**CacheEntry.fetch_input_example()))
+        "The fox says 'hello'"
+        """
+        start = time.perf_counter()
         key = CacheEntry.gen_key(
             model=model,
             parameters=parameters,
@@ -94,9 +257,78 @@ class Cache:
             user_prompt=user_prompt,
             iteration=iteration,
         )
-        entry = self.data.get(key, None)
+        entry = self._fetch_from_memory(key)
+        if entry is None:
+            if hasattr(self.data, "async_get"):
+                entry = await self.data.async_get(key, None)
+            else:
+                entry = self.data.get(key, None)
+            entry = self._remember(key, entry)
+        self.stats.record_fetch(model, entry, time.perf_counter() - start)
         return None if entry is None else entry.output
 
+    def _fetch_from_memory(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry of a key if it is prefetched or in the memory tier."""
+        entry = self.prefetched.pop(key, None)
+        if entry is None and self.memory_tier is not None:
+            entry = self.memory_tier.get(key)
+        return entry
+
+    def _remember(self, key: str, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        """Keep an entry read from `data` in the memory tier, and return it."""
+        if entry is not None and self.memory_tier is not None:
+            self.memory_tier[key] = entry
+        return entry
+
+    def prefetch(self, keys: Iterable[str]) -> int:
+        """
+        Load the entries with the given keys into memory, so fetching them does not read the database.
+        - Each prefetched entry is released when it is fetched, or with `release`, e.g., when it is no longer needed.
+        - Returns the number of keys that were found.
+
+        >>> c = Cache.example()
+        >>> c.prefetch([CacheEntry.example().key, "not a key"])
+        1
+        """
+        keys = [key for key in keys if key not in self.prefetched]
+        if hasattr(self.data, "get_many"):
+            entries = self.data.get_many(keys)
+        else:
+            entries = {key: self.data[key] for key in keys if key in self.data}
+        self.prefetched.update(entries)
+        return len(entries)
+
+    async def async_prefetch(self, keys: Iterable[str]) -> int:
+        """
+        Load the entries with the given keys into memory, like `prefetch`.
+        - If `data` has an `async_get_many` method, e.g., a RemoteDict, the running event loop is not blocked by the lookup.
+
+        >>> import asyncio
+        >>> c = Cache.example()
+        >>> asyncio.run(c.async_prefetch([CacheEntry.example().key, "not a key"]))
+        1
+        """
+        if not hasattr(self.data, "async_get_many"):
+            return self.prefetch(keys)
+        keys = [key for key in keys if key not in self.prefetched]
+        entries = await self.data.async_get_many(keys)
+        self.prefetched.update(entries)
+        return len(entries)
+
+    def release(self, keys: Iterable[str]) -> None:
+        """
+        Release the prefetched entries with the given keys, if they are still held.
+
+        >>> c = Cache.example()
+        >>> c.prefetch([CacheEntry.example().key])
+        1
+        >>> c.release([CacheEntry.example().key, "not a key"])
+        >>> len(c.prefetched)
+        0
+        """
+        for key in keys:
+            self.prefetched.pop(key, None)
+
     def store(
         self,
         model: str,
@@ -118,6 +350,7 @@ class Cache:
         * If `immediate_write` is True , the key-value pair is added to `self.data`
         * If `immediate_write` is False, the key-value pair is added to `self.new_entries_to_write_later`
         """
+        start = time.perf_counter()
         entry = CacheEntry(
             model=model,
             parameters=parameters,
@@ -130,8 +363,11 @@ class Cache:
         self.new_entries[key] = entry
         if self.immediate_write:
             self.data[key] = entry
+            if self.memory_tier is not None:
+                self.memory_tier[key] = entry
         else:
             self.new_entries_to_write_later[key] = entry
+        self.stats.record_store(model, entry, time.perf_counter() - start)
         return key
 
     def add_from_dict(
@@ -139,50 +375,135 @@ class Cache:
     ) -> None:
         """
         Add entries to the cache from a dictionary.
+        - Entries keyed with the first version of the key scheme are re-keyed.
 
         :param write_now: Whether to write to the cache immediately (similar to `immediate_write`).
         """
-        for key, value in new_data.items():
-            if key in self.data:
-                if value != self.data[key]:
-                    raise Exception("Mismatch in values")
+        new_data = self._add_entries(new_data, write_now=write_now)
+        self.new_entries.update(new_data)
+
+    def _add_entries(
+        self, new_data: dict[str, CacheEntry], write_now: Optional[bool] = True
+    ) -> dict[str, CacheEntry]:
+        """
+        Check that the entries are CacheEntry objects that do not conflict with the cache, and add them.
+        - Returns the entries that were added, with keys of the first version of the key scheme replaced.
+        """
+        for value in new_data.values():
             if not isinstance(value, CacheEntry):
                 raise Exception(f"Wrong type - the observed type is {type(value)}")
+        new_data = {_current_key(key, value): value for key, value in new_data.items()}
+        if isinstance(self.data, SQLITE_BACKENDS):
+            mismatched_keys = self.data.mismatched_keys(new_data)
+        else:
+            existing = (
+                self.data.get_many(new_data)
+                if hasattr(self.data, "get_many")
+                else self.data
+            )
+            mismatched_keys = [
+                key
+                for key, value in new_data.items()
+                if key in existing and value != existing[key]
+            ]
+        if mismatched_keys:
+            raise Exception("Mismatch in values")
 
-        self.new_entries.update(new_data)
         if write_now:
             self.data.update(new_data)
         else:
             self.new_entries_to_write_later.update(new_data)
+        return new_data
 
-    def add_from_jsonl(self, filename: str, write_now: Optional[bool] = True) -> None:
+    def add_from_jsonl(
+        self,
+        filename: str,
+        write_now: Optional[bool] = True,
+        chunk_size: int = JSONL_CHUNK_SIZE,
+        processes: Optional[int] = None,
+        progress_bar: bool = False,
+    ) -> None:
         """
-        Add entries to the cache from a JSONL.
+        Add entries to the cache from a JSONL file, which may be gzip-compressed.
+        - The file is read and added `chunk_size` lines at a time, so it is never held in memory at once.
+        - Entries added this way are not recorded in `new_entries`.
 
         :param write_now: Whether to write to the cache immediately (similar to `immediate_write`).
-        """
-        with open(filename, "a+") as f:
-            f.seek(0)
-            lines = f.readlines()
-        new_data = {}
-        for line in lines:
-            d = json.loads(line)
-            key = list(d.keys())[0]
-            value = list(d.values())[0]
-            new_data[key] = CacheEntry(**value)
-        self.add_from_dict(new_data=new_data, write_now=write_now)
+        :param chunk_size: The number of lines read and added at a time.
+        :param processes: The number of processes parsing the lines; by default, they are parsed in this process.
+        :param progress_bar: Whether to show the progress of the import.
+        """
+        f, raw = _open_jsonl(filename, "r")
+        pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+        try:
+            total = os.fstat(raw.fileno()).st_size
+            with _progress("Importing cache entries", total, progress_bar) as update:
+                while lines := list(islice(f, chunk_size)):
+                    if pool is None:
+                        parsed = map(_parse_jsonl_line, lines)
+                    else:
+                        parsed = pool.map(
+                            _parse_jsonl_line,
+                            lines,
+                            chunksize=max(1, len(lines) // (4 * processes)),
+                        )
+                    self._add_entries(dict(parsed), write_now=write_now)
+                    update(raw.tell())
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            f.close()
+            raw.close()
+
+    def add_from_parquet(self, path: str, write_now: Optional[bool] = True) -> None:
+        """
+        Add entries to the cache from a Parquet file written by `to_parquet`.
+        - The file is read and added one batch of `PARQUET_ROW_GROUP_SIZE` entries at a time.
+        - Entries added this way are not recorded in `new_entries`.
+        - Needs pyarrow.
 
-    def add_from_sqlite(self, db_path: str, write_now: Optional[bool] = True):
+        :param write_now: Whether to write to the cache immediately (similar to `immediate_write`).
+        """
+        pa = _import_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_ROW_GROUP_SIZE):
+            columns = {
+                name: batch.column(name).to_pylist()
+                for name in batch.schema.names
+                if name != "timestamp"
+            }
+            # Parquet stores the timestamps in milliseconds
+            timestamps = batch.column("timestamp").cast(pa.timestamp("s", tz="UTC"))
+            columns["timestamp"] = timestamps.cast(pa.int64()).to_pylist()
+            columns["parameters"] = [json.loads(p) for p in columns["parameters"]]
+            keys = columns.pop("key")
+            new_data = {
+                key: CacheEntry(**dict(zip(columns, values)))
+                for key, *values in zip(keys, *columns.values())
+            }
+            self._add_entries(new_data, write_now=write_now)
+
+    def add_from_sqlite(
+        self,
+        db_path: str,
+        write_now: Optional[bool] = True,
+        chunk_size: int = BULK_BATCH_SIZE,
+    ):
         """
         Add entries to the cache from an SQLite database.
+        - The database is read and added `chunk_size` entries at a time, so it is never held in memory at once.
+        - Entries added this way are not recorded in `new_entries`, like with `add_from_jsonl`.
 
         :param write_now: Whether to write to the cache immediately (similar to `immediate_write`).
+        :param chunk_size: The number of entries read and added at a time.
         """
         db = SQLiteDict(db_path)
-        new_data = {}
-        for key, value in db.items():
-            new_data[key] = CacheEntry(**value)
-        self.add_from_dict(new_data=new_data, write_now=write_now)
+        try:
+            items = iter(db.items())
+            while chunk := dict(islice(items, chunk_size)):
+                self._add_entries(chunk, write_now=write_now)
+        finally:
+            db.close()
 
     @classmethod
     def from_sqlite_db(cls, db_path: str) -> Cache:
@@ -212,6 +533,20 @@ class Cache:
         cache.add_from_jsonl(jsonlfile)
         return cache
 
+    @classmethod
+    def from_parquet(cls, path: str, db_path: Optional[str] = None) -> Cache:
+        """
+        Construct a Cache from a Parquet file written by `to_parquet`.
+
+        * If `db_path` is None, the cache will be stored in memory, as a dictionary.
+        * If `db_path` is provided, the cache will be stored in an SQLite database.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File {path} not found")
+        cache = Cache(data={} if db_path is None else SQLiteDict(db_path))
+        cache.add_from_parquet(path)
+        return cache
+
     ## TODO: Check to make sure not over-writing (?)
     ## Should be added to SQLiteDict constructor (?)
     def write_sqlite_db(self, db_path: str) -> None:
@@ -222,14 +557,168 @@ class Cache:
         for key, value in self.data.items():
             new_data[key] = value
 
-    def write_jsonl(self, filename: str) -> None:
+    def write_jsonl(
+        self,
+        filename: str,
+        compress: Optional[bool] = None,
+        chunk_size: int = JSONL_CHUNK_SIZE,
+        progress_bar: bool = False,
+    ) -> None:
         """
         Write the cache to a JSONL file.
+        - Entries are read from the cache and written `chunk_size` at a time.
+
+        :param compress: Whether to gzip the file; by default, only if the filename ends with `.gz`.
+        :param chunk_size: The number of lines written at a time.
+        :param progress_bar: Whether to show the progress of the export.
         """
         path = os.path.join(os.getcwd(), filename)
-        with open(path, "w") as f:
-            for key, value in self.data.items():
-                f.write(json.dumps({key: value.to_dict()}) + "\n")
+        if compress is None:
+            compress = filename.endswith(".gz")
+        f, raw = _open_jsonl(path, "w", compress=compress)
+        try:
+            items = iter(self.data.items())
+            total = len(self.data) if progress_bar else 0
+            with _progress("Exporting cache entries", total, progress_bar) as update:
+                written = 0
+                while chunk := list(islice(items, chunk_size)):
+                    f.writelines(
+                        json.dumps({key: value.to_dict()}) + "\n"
+                        for key, value in chunk
+                    )
+                    written += len(chunk)
+                    update(written)
+        finally:
+            f.close()
+            raw.close()
+
+    def to_parquet(
+        self, path: str, row_group_size: int = PARQUET_ROW_GROUP_SIZE
+    ) -> None:
+        """
+        Write the cache to a Parquet file, with a typed column for each CacheEntry field and one for the key.
+        - The parameters are stored as JSON; the timestamps as UTC timestamps, in seconds.
+        - Models, parameters, and prompts are dictionary-encoded, and the file is compressed with `PARQUET_COMPRESSION`.
+        - Entries are read from the cache and written one row group of `row_group_size` entries at a time.
+        - Needs pyarrow.
+        """
+        pa = _import_pyarrow()
+        schema = _parquet_schema(pa)
+        items = iter(self.data.items())
+        with pa.parquet.ParquetWriter(
+            path, schema, compression=PARQUET_COMPRESSION
+        ) as writer:
+            while chunk := list(islice(items, row_group_size)):
+                columns = {
+                    "key": [key for key, _ in chunk],
+                    **{
+                        field: [getattr(entry, field) for _, entry in chunk]
+                        for field in schema.names[1:]
+                    },
+                }
+                columns["parameters"] = [
+                    json.dumps(p, sort_keys=True) for p in columns["parameters"]
+                ]
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.array(columns[name], type=schema.field(name).type)
+                            for name in schema.names
+                        ],
+                        schema=schema,
+                    ),
+                    row_group_size=row_group_size,
+                )
+
+    def snapshot(self, path: str) -> int:
+        """
+        Write the entries of the cache to a read-only, memory-mapped snapshot file, and return their number.
+        - Worker processes can open it with `Cache.from_snapshot`, instead of each opening the database.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "cache.snapshot")
+        >>> Cache.example().snapshot(path)
+        1
+        """
+        if hasattr(self.data, "flush"):
+            self.data.flush()
+        return CacheSnapshot.write(path, self.data.items())
+
+    @classmethod
+    def from_snapshot(cls, path: str, write_log: Optional[str] = None) -> Cache:
+        """
+        Construct a Cache that reads a snapshot written by `Cache.snapshot`.
+        - New entries are kept in memory, and appended to the JSONL file `write_log`, if given;
+          merge them into another cache with `add_from_jsonl`, see SnapshotDict.
+        - The snapshot is already in memory, so there is no memory tier.
+        - Opening it does not read its entries, see `ENTRY_BACKENDS`.
+
+        >>> import os, tempfile
+        >>> directory = tempfile.mkdtemp()
+        >>> _ = Cache.example().snapshot(os.path.join(directory, "cache.snapshot"))
+        >>> c = Cache.from_snapshot(os.path.join(directory, "cache.snapshot"), os.path.join(directory, "log.jsonl"))
+        >>> c.fetch(**CacheEntry.fetch_input_example())
+        "The fox says 'hello'"
+        >>> input = CacheEntry.store_input_example()
+        >>> input["user_prompt"] = "What does the dog say?"
+        >>> key = c.store(**input)
+        >>> c.data.close()
+        >>> merged = Cache()
+        >>> merged.add_from_jsonl(os.path.join(directory, "log.jsonl"))
+        >>> list(merged.keys()) == [key]
+        True
+        """
+        return cls(data=SnapshotDict(path, write_log), memory_tier_entries=0)
+
+    ####################
+    # MAINTENANCE
+    ####################
+    def compact(
+        self,
+        *,
+        max_age: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        model_quotas: Optional[dict[str, int]] = None,
+        max_vacuum_pages: Optional[int] = None,
+    ) -> int:
+        """
+        Delete the entries that the retention policies do not keep, and shrink the database file.
+        - Policies left as None do not apply; the most recent entries are kept, see `SQLiteDict.evict`.
+        - The prompts no entry references anymore are deleted, and the freed pages are returned to the
+          file system incrementally, at most `max_vacuum_pages` of them.
+        - Returns the number of entries deleted.
+
+        :param max_age: The age, in seconds, beyond which entries are deleted.
+        :param max_entries: The number of entries kept.
+        :param max_bytes: The (estimated) size of the entries kept, in bytes.
+        :param model_quotas: The number of entries kept for each of these models.
+        :param max_vacuum_pages: The maximum number of pages freed; all of them by default.
+
+        >>> c = Cache(data=SQLiteDict.example())
+        >>> key = c.store(**CacheEntry.store_input_example())
+        >>> c.compact(max_age=0, model_quotas={"gpt-3.5-turbo": 0})
+        1
+        >>> len(c)
+        0
+        """
+        if not isinstance(self.data, SQLITE_BACKENDS):
+            raise ValueError(
+                "Only a Cache stored in an SQLiteDict or a ShardedSQLiteDict can be compacted"
+            )
+        num_deleted = self.data.evict(
+            max_age=max_age,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            model_quotas=model_quotas,
+        )
+        # the memory tier and the prefetched entries may hold deleted entries
+        if self.memory_tier is not None:
+            self.memory_tier.clear()
+        self.prefetched.clear()
+        self.data.collect_texts()
+        self.data.vacuum(max_pages=max_vacuum_pages)
+        return num_deleted
 
     ####################
     # REMOTE
@@ -246,15 +735,82 @@ class Cache:
         # return Cache(data=db)
         pass
 
+    def _first_version_keys(self, keys: Iterable[str]) -> set[str]:
+        """
+        Return the keys among `keys` that local entries have in the first version of the key scheme, see `CacheEntry.gen_key`.
+        - SQLite backends look the keys up in an indexed column; the entries of other backends are hashed.
+        """
+        if hasattr(self.data, "first_version_keys"):
+            return self.data.first_version_keys(keys)
+        keys = set(keys)
+        return {
+            key
+            for key in (entry.key_for(1) for entry in self.data.values())
+            if key in keys
+        }
+
+    def _sync_with_remote(self) -> None:
+        """
+        Download the entries missing locally from the server, and upload the entries missing remotely.
+        - The missing keys are found by comparing digests of key prefixes, see `CacheSync`.
+        - Entries are transferred in pages of `SYNC_PAGE_SIZE`.
+        - The server may keep entries under keys of the first version of the key scheme.
+          Only the keys missing locally are looked up among the first-version keys of the local entries;
+          those entries are not downloaded again, and they are uploaded under their current keys.
+        - Servers without the endpoints of the incremental sync send all the entries whose keys
+          are not local instead, and only receive the new entries on exit, see `_download_from_remote`.
+        """
+        if not self.coop.supports_cache_sync():
+            self._download_from_remote()
+            return
+        missing_locally, missing_remotely = find_missing_keys(
+            lambda: self.data.keys(), self.coop
+        )
+        if missing_locally:
+            # entries that the server keeps under their first-version keys are not missing
+            missing_locally -= self._first_version_keys(missing_locally)
+        missing_locally = sorted(missing_locally)
+        for start in range(0, len(missing_locally), SYNC_PAGE_SIZE):
+            cache_entries = self.coop.get_cache_entries_by_keys(
+                missing_locally[start : start + SYNC_PAGE_SIZE]
+            )
+            # entries downloaded under first-version keys are stored under their current keys
+            new_data = {entry.key: entry for entry in cache_entries}
+            self.add_from_dict(new_data, write_now=True)
+            # entries from the server are not new, so they are not sent back on exit
+            for key in new_data:
+                self.new_entries.pop(key, None)
+        missing_remotely = sorted(missing_remotely)
+        for start in range(0, len(missing_remotely), SYNC_PAGE_SIZE):
+            keys = missing_remotely[start : start + SYNC_PAGE_SIZE]
+            if hasattr(self.data, "get_many"):
+                cache_entries = list(self.data.get_many(keys).values())
+            else:
+                cache_entries = [self.data[key] for key in keys]
+            self.coop.upload_cache_entries(cache_entries)
+
+    def _download_from_remote(self) -> None:
+        """
+        Download the entries whose keys are not local from a server without the endpoints of the incremental sync.
+        - Only the local keys are excluded. The entries that the server keeps under their first-version keys
+          are sent too, but they are recognized by their current keys and not added again.
+        """
+        cache_entries = self.coop.get_cache_entries(list(self.data.keys()))
+        new_data = {
+            entry.key: entry for entry in cache_entries if entry.key not in self.data
+        }
+        self.add_from_dict(new_data, write_now=True)
+        # entries from the server are not new, so they are not sent back on exit
+        for key in new_data:
+            self.new_entries.pop(key, None)
+
     def __enter__(self):
         """
         Run when a context is entered.
         """
         if self.remote:
             print("Syncing local and remote caches")
-            exclude_keys = list(self.data.keys())
-            cache_entries = self.coop.get_cache_entries(exclude_keys)
-            self.add_from_dict({c.key: c for c in cache_entries}, write_now=True)
+            self._sync_with_remote()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -263,8 +819,16 @@ class Cache:
         """
         for key, entry in self.new_entries_to_write_later.items():
             self.data[key] = entry
-        if self.remote:
-            _ = self.coop.send_cache_entries(cache_dict=self.new_entries)
+        if hasattr(self.data, "flush"):
+            self.data.flush()
+        if self.remote and not self.coop.supports_cache_sync():
+            self.coop.send_cache_entries(self.new_entries)
+        elif self.remote:
+            new_entries = list(self.new_entries.values())
+            for start in range(0, len(new_entries), SYNC_PAGE_SIZE):
+                self.coop.upload_cache_entries(
+                    new_entries[start : start + SYNC_PAGE_SIZE]
+                )
 
     ####################
     # DUNDER / USEFUL
@@ -281,13 +845,27 @@ class Cache:
     @classmethod
     def from_dict(cls, data) -> Cache:
         """Construct a Cache from a dictionary."""
-        data = {k: CacheEntry.from_dict(v) for k, v in data}
-        return cls(data=data)
+        entries = {k: CacheEntry.from_dict(v) for k, v in data.items()}
+        return cls(data={_current_key(k, v): v for k, v in entries.items()})
 
     def __len__(self):
         """Return the number of CacheEntry objects in the Cache."""
         return len(self.data)
 
+    def __delitem__(self, key: str) -> None:
+        """
+        Delete an entry from the Cache, and from its memory tier and prefetched entries.
+
+        >>> c = Cache.example()
+        >>> del c[CacheEntry.example().key]
+        >>> len(c)
+        0
+        """
+        if self.memory_tier is not None:
+            self.memory_tier.discard(key)
+        self.prefetched.pop(key, None)
+        del self.data[key]
+
     # TODO: Same inputs could give different results and this could be useful
     # can't distinguish unless we do the ε trick or vary iterations
     def __eq__(self, other_cache: "Cache") -> bool:
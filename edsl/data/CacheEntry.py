@@ -8,14 +8,21 @@ from typing import Optional
 
 # TODO: Timestamp should probably be float?
 
+# The version of the scheme used to generate new keys, see `CacheEntry.gen_key`
+KEY_VERSION = 2
+# Encodes the parameters of an entry the same way, whatever the order of their keys
+_canonical_json = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+
 
 class CacheEntry:
     """
     A Class to represent a cache entry.
+    - The key of an entry is computed once, when first needed, and again only if a key field changes.
     """
 
     key_fields = ["model", "parameters", "system_prompt", "user_prompt", "iteration"]
     all_fields = key_fields + ["timestamp", "output"]
+    __slots__ = all_fields + ["_key"]
 
     def __init__(
         self,
@@ -39,6 +46,11 @@ class CacheEntry:
         )
         self._check_types()
 
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if name in self.key_fields:
+            super().__setattr__("_key", None)
+
     def _check_types(self):
         """
         Checks if the types of the fields are correct.
@@ -61,16 +73,48 @@ class CacheEntry:
 
     @classmethod
     def gen_key(
-        self, *, model, parameters, system_prompt, user_prompt, iteration
+        cls,
+        *,
+        model,
+        parameters,
+        system_prompt,
+        user_prompt,
+        iteration,
+        version: int = KEY_VERSION,
     ) -> str:
         """
         Generates a key for the cache entry.
-        - Treats single and double quotes as the same.
+        - Version 1 is the MD5 hash of the fields, concatenated. Databases keyed this way are migrated when they are opened, see SQLiteDict.
+        - Version 2 is the BLAKE2b hash of the fields, each but the last prefixed by its length, with the parameters as canonical JSON.
 
-        TODO: add more robustness.
+        >>> CacheEntry.gen_key(model="gpt-4", parameters={"temperature": 0.5}, system_prompt="", user_prompt="Hi", iteration=0)
+        '814e099e4d1fa8312d6ca9a724f8b638'
         """
-        long_key = f"{model}{json.dumps(parameters, sort_keys=True)}{system_prompt}{user_prompt}{iteration}"
-        return hashlib.md5(long_key.encode()).hexdigest()
+        if version == 1:
+            long_key = f"{model}{json.dumps(parameters, sort_keys=True)}{system_prompt}{user_prompt}{iteration}"
+            return hashlib.md5(long_key.encode()).hexdigest()
+        if version != 2:
+            raise ValueError(f"Unknown key version: {version}")
+        model, parameters = str(model), _canonical_json(parameters)
+        system_prompt, user_prompt = str(system_prompt), str(user_prompt)
+        # Every field but the last is length-prefixed, so fields cannot run together
+        long_key = (
+            f"{len(model)}:{model}{len(parameters)}:{parameters}"
+            f"{len(system_prompt)}:{system_prompt}{len(user_prompt)}:{user_prompt}"
+            f"{iteration}"
+        )
+        return hashlib.blake2b(long_key.encode(), digest_size=16).hexdigest()
+
+    def key_for(self, version: int) -> str:
+        """Returns the key of the cache entry in a given version of the key scheme."""
+        return self.gen_key(
+            model=self.model,
+            parameters=self.parameters,
+            system_prompt=self.system_prompt,
+            user_prompt=self.user_prompt,
+            iteration=self.iteration,
+            version=version,
+        )
 
     @property
     def key(self) -> str:
@@ -78,8 +122,9 @@ class CacheEntry:
         Returns the key for the cache entry.
         - The key is a hash of the key fields.
         """
-        d = {k: value for k, value in self.__dict__.items() if k in self.key_fields}
-        return self.gen_key(**d)
+        if self._key is None:
+            self._key = self.key_for(KEY_VERSION)
+        return self._key
 
     def to_dict(self) -> dict:
         """
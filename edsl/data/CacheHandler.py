@@ -22,7 +22,8 @@ class CacheHandler:
         self.create_cache_directory()
         self.cache = self.gen_cache()
         old_data = self.from_old_sqlite_cache()
-        self.cache.add_from_dict(old_data)
+        if old_data:
+            self.cache.add_from_dict(old_data)
 
     def create_cache_directory(self) -> None:
         """
@@ -99,15 +100,7 @@ class CacheHandler:
         """
         Read in a new-style sqlite cache and return a dictionary of dictionaries.
         """
-        conn = sqlite3.connect(uri)
-        with conn:
-            cur = conn.cursor()
-            data = cur.execute("SELECT key, value FROM data").fetchall()
-            newdata = {}
-            for _, value in data:
-                entry = CacheEntry.from_dict(json.loads(value))
-                newdata[entry.key] = entry
-        return newdata
+        return {entry.key: entry for entry in SQLiteDict(uri).values()}
 
     def from_jsonl(filename="edsl_cache.jsonl") -> dict[str, CacheEntry]:
         """Read in a jsonl file and return a dictionary of CacheEntry objects."""
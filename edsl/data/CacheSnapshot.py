@@ -0,0 +1,325 @@
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from typing import Any, Generator, Iterable, Optional, Union
+from edsl.data.CacheEntry import CacheEntry
+
+SNAPSHOT_MAGIC = b"EDSLSNAP"
+SNAPSHOT_VERSION = 1
+# magic, version, number of entries
+HEADER = struct.Struct("<8sIQ")
+# the number of entries whose key hash starts with a byte lower than or equal to each byte, as in git pack indexes
+FANOUT = struct.Struct("<256Q")
+# key hash, offset of the record, length of the record
+INDEX_ENTRY = struct.Struct("<16sQI")
+# the lengths of the key, model, parameters, system prompt, user prompt, and output, then iteration and timestamp
+RECORD_HEADER = struct.Struct("<6Iqq")
+HASH_SIZE = 16
+
+
+def _hash_key(key: str) -> bytes:
+    return hashlib.blake2b(key.encode(), digest_size=HASH_SIZE).digest()
+
+
+def _encode_record(key: str, entry: CacheEntry) -> bytes:
+    """Encode an entry as fixed-size integers followed by its texts, in UTF-8."""
+    texts = [
+        text.encode()
+        for text in (
+            key,
+            entry.model,
+            json.dumps(entry.parameters, sort_keys=True),
+            entry.system_prompt,
+            entry.user_prompt,
+            entry.output,
+        )
+    ]
+    header = RECORD_HEADER.pack(
+        *(len(text) for text in texts), entry.iteration, int(entry.timestamp)
+    )
+    return header + b"".join(texts)
+
+
+class CacheSnapshot:
+    """
+    A read-only file of cache entries, which is memory-mapped, so processes that open it share its pages.
+
+    The file has a header, a fanout table, an index of the entries sorted by the BLAKE2b hash of their key,
+    and the entries. A lookup reads the fanout table for the first byte of the hash,
+    then binary-searches the few index entries that start with that byte; nothing is read into memory first.
+    Entries are stored as lengths followed by their texts in UTF-8, so reading one decodes no JSON,
+    except for its parameters, which are parsed once per distinct value.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "cache.snapshot")
+    >>> CacheSnapshot.write(path, CacheEntry.example_dict().items())
+    1
+    >>> with CacheSnapshot(path) as snapshot:
+    ...     snapshot[CacheEntry.example().key] == CacheEntry.example(), "not a key" in snapshot
+    (True, False)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, self._count = HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(
+                f"{path} is not a cache snapshot of version {SNAPSHOT_VERSION}"
+            )
+        self._fanout = FANOUT.unpack_from(self._mmap, HEADER.size)
+        self._index_start = HEADER.size + FANOUT.size
+        self._parameters: dict[str, dict] = {}
+
+    @staticmethod
+    def write(path: str, items: Iterable[tuple[str, CacheEntry]]) -> int:
+        """
+        Write the (key, entry) pairs to a new snapshot at `path`, and return their number.
+        - The entries are streamed to a temporary file, so only their hashes and offsets are held in memory.
+        - The snapshot replaces `path` atomically: processes that have the old one open keep reading it.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        index = []
+        with tempfile.TemporaryFile(dir=directory) as records:
+            offset = 0
+            for key, entry in items:
+                record = _encode_record(key, entry)
+                records.write(record)
+                index.append((_hash_key(key), offset, len(record)))
+                offset += len(record)
+            index.sort()
+            fanout = [0] * 256
+            for key_hash, _, _ in index:
+                fanout[key_hash[0]] += 1
+            for byte in range(1, 256):
+                fanout[byte] += fanout[byte - 1]
+            records_start = HEADER.size + FANOUT.size + INDEX_ENTRY.size * len(index)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(file_descriptor, "wb") as f:
+                    f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(index)))
+                    f.write(FANOUT.pack(*fanout))
+                    for key_hash, offset, length in index:
+                        f.write(
+                            INDEX_ENTRY.pack(key_hash, records_start + offset, length)
+                        )
+                    records.seek(0)
+                    shutil.copyfileobj(records, f)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return len(index)
+
+    def _find(self, key: str) -> Optional[int]:
+        """Return the offset of the record of a key, or None if the key is not in the snapshot."""
+        key_hash = _hash_key(key)
+        low = self._fanout[key_hash[0] - 1] if key_hash[0] else 0
+        high = self._fanout[key_hash[0]]
+        while low < high:
+            middle = (low + high) // 2
+            position = self._index_start + middle * INDEX_ENTRY.size
+            middle_hash = self._mmap[position : position + HASH_SIZE]
+            if middle_hash < key_hash:
+                low = middle + 1
+            elif middle_hash > key_hash:
+                high = middle
+            else:
+                return INDEX_ENTRY.unpack_from(self._mmap, position)[1]
+        return None
+
+    def _read(self, offset: int) -> tuple[str, CacheEntry]:
+        """Decode the record at `offset` into its key and entry."""
+        *lengths, iteration, timestamp = RECORD_HEADER.unpack_from(self._mmap, offset)
+        texts = []
+        start = offset + RECORD_HEADER.size
+        for length in lengths:
+            texts.append(str(self._view[start : start + length], "utf-8"))
+            start += length
+        key, model, parameters, system_prompt, user_prompt, output = texts
+        if parameters not in self._parameters:
+            self._parameters[parameters] = json.loads(parameters)
+        entry = CacheEntry(
+            model=model,
+            parameters=dict(self._parameters[parameters]),
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            iteration=iteration,
+            output=output,
+            timestamp=timestamp,
+        )
+        return key, entry
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        offset = self._find(key)
+        if offset is None:
+            raise KeyError(f"Key '{key}' not found.")
+        return self._read(offset)[1]
+
+    def get(self, key: str, default: Optional[Any] = None) -> Union[CacheEntry, Any]:
+        offset = self._find(key)
+        return default if offset is None else self._read(offset)[1]
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Gets the values of the keys that are in the snapshot."""
+        entries = {}
+        for key in keys:
+            offset = self._find(key)
+            if offset is not None:
+                entries[key] = self._read(offset)[1]
+        return entries
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Generator[tuple[str, CacheEntry], None, None]:
+        """Yields the entries in the order of the hashes of their keys."""
+        for i in range(self._count):
+            position = self._index_start + i * INDEX_ENTRY.size
+            yield self._read(INDEX_ENTRY.unpack_from(self._mmap, position)[1])
+
+    def keys(self) -> Generator[str, None, None]:
+        for key, _ in self.items():
+            yield key
+
+    def __iter__(self) -> Generator[str, None, None]:
+        return self.keys()
+
+    def values(self) -> Generator[CacheEntry, None, None]:
+        for _, entry in self.items():
+            yield entry
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> CacheSnapshot:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path={self.path!r})"
+
+
+class SnapshotDict:
+    """
+    A dictionary-like object that reads a CacheSnapshot, and keeps new entries in a write log.
+    - You can use SnapshotDict as the `data` of a Cache, e.g., in worker processes, see `Cache.from_snapshot`.
+
+    The snapshot is read-only: new entries are kept in memory, and appended to the JSONL file `write_log`, if given.
+    That file is in the format of `Cache.write_jsonl`, so the entries of all the workers can be merged
+    into a persistent cache afterwards, with `Cache.add_from_jsonl`.
+    Each line is written to the file as soon as its entry is stored, so the entries of a worker that
+    exits without closing its SnapshotDict, e.g., a process that crashes or is killed, are not lost.
+    """
+
+    def __init__(self, snapshot_path: str, write_log: Optional[str] = None):
+        self.snapshot = CacheSnapshot(snapshot_path)
+        self.write_log = write_log
+        self.log: dict[str, CacheEntry] = {}
+        self._log_file = (
+            None if write_log is None else open(write_log, "a", buffering=1)
+        )
+
+    def __setitem__(self, key: str, value: CacheEntry) -> None:
+        self.log[key] = value
+        if self._log_file is not None:
+            self._log_file.write(json.dumps({key: value.to_dict()}) + "\n")
+
+    def update(
+        self,
+        new_d: Union[dict, SnapshotDict],
+        overwrite: Optional[bool] = False,
+    ) -> None:
+        """
+        Update the write log with the values from another dictionary.
+
+        :param overwrite: If `overwrite` is False, existing values will not be overwritten.
+        """
+        for key, value in new_d.items():
+            if overwrite or key not in self:
+                self[key] = value
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        if key in self.log:
+            return self.log[key]
+        return self.snapshot[key]
+
+    def get(self, key: str, default: Optional[Any] = None) -> Union[CacheEntry, Any]:
+        if key in self.log:
+            return self.log[key]
+        return self.snapshot.get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Gets the values of the keys that are in the write log or the snapshot."""
+        keys = list(keys)
+        entries = self.snapshot.get_many(key for key in keys if key not in self.log)
+        entries.update({key: self.log[key] for key in keys if key in self.log})
+        return entries
+
+    def __delitem__(self, key: str) -> None:
+        if key in self.snapshot:
+            raise TypeError("The entries of a cache snapshot cannot be deleted.")
+        del self.log[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.log or key in self.snapshot
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return len(self.snapshot) + sum(
+            1 for key in self.log if key not in self.snapshot
+        )
+
+    def items(self) -> Generator[tuple[str, CacheEntry], None, None]:
+        for key, entry in self.snapshot.items():
+            yield key, self.log.get(key, entry)
+        for key, entry in self.log.items():
+            if key not in self.snapshot:
+                yield key, entry
+
+    def keys(self) -> Generator[str, None, None]:
+        for key, _ in self.items():
+            yield key
+
+    def __iter__(self) -> Generator[str, None, None]:
+        return self.keys()
+
+    def values(self) -> Generator[CacheEntry, None, None]:
+        for _, entry in self.items():
+            yield entry
+
+    def flush(self) -> None:
+        """Write the buffered lines of the write log to its file."""
+        if self._log_file is not None:
+            self._log_file.flush()
+
+    def close(self) -> None:
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        self.snapshot.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(snapshot_path={self.snapshot.path!r}, write_log={self.write_log!r})"
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import bisect
+import json
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+from edsl.data.CacheEntry import CacheEntry
+
+# The upper bounds of the buckets of the latency histograms, in seconds
+LATENCY_BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float("inf"))
+
+
+def encoded_size(entry: CacheEntry) -> int:
+    """
+    Returns the size of a CacheEntry encoded as JSON, in bytes, as it is written to JSONL files and sent to servers.
+
+    >>> encoded_size(CacheEntry.example())
+    243
+    """
+    return len(json.dumps(entry.to_dict()).encode())
+
+
+class LatencyHistogram:
+    """
+    Counts durations in buckets bounded by `LATENCY_BUCKETS`, and keeps their total.
+
+    >>> h = LatencyHistogram()
+    >>> for seconds in (0.00002, 0.00005, 0.002):
+    ...     h.record(seconds)
+    >>> h.count, round(h.mean, 6)
+    (3, 0.00069)
+    >>> h.quantile(0.5)
+    0.0001
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Count a duration, in seconds."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def __iadd__(self, other: LatencyHistogram) -> LatencyHistogram:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Return the mean duration, or None if no duration was counted."""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the upper bound of the bucket of the `q` quantile, or None if no duration was counted."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return LATENCY_BUCKETS[-1]
+
+    def to_dict(self) -> dict:
+        """Return the buckets, by upper bound, with the number and mean of the durations."""
+        return {
+            "buckets": {
+                str(bound): n for bound, n in zip(LATENCY_BUCKETS, self.counts)
+            },
+            "count": self.count,
+            "mean": self.mean,
+        }
+
+
+class ModelCacheStats:
+    """
+    The counts of the cache lookups and writes for a model.
+    - `bytes_read` and `bytes_written` are the sizes of the entries that are fetched or stored, encoded as JSON, see `encoded_size`.
+    - `store_latency` is the time that `Cache.store` takes; with a write-behind SQLiteDict, the entry is only queued then.
+    - `bytes_stored` and `write_latency` are reported by SQLiteDict: the sizes of the entries in the database,
+      and the durations of the transactions that wrote them.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.bytes_stored = 0
+        self.fetch_latency = LatencyHistogram()
+        self.store_latency = LatencyHistogram()
+        self.write_latency = LatencyHistogram()
+
+    def __iadd__(self, other: ModelCacheStats) -> ModelCacheStats:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.stores += other.stores
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+        self.bytes_stored += other.bytes_stored
+        self.fetch_latency += other.fetch_latency
+        self.store_latency += other.store_latency
+        self.write_latency += other.write_latency
+        return self
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """Return the share of lookups that found their entry, or None before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "bytes_stored": self.bytes_stored,
+            "fetch_latency": self.fetch_latency.to_dict(),
+            "store_latency": self.store_latency.to_dict(),
+            "write_latency": self.write_latency.to_dict(),
+        }
+
+
+class CacheStats:
+    """
+    The counts of the lookups and writes of a Cache, by model.
+
+    >>> stats = CacheStats()
+    >>> stats.record_fetch("gpt-4", CacheEntry.example(), 0.001)
+    >>> stats.record_fetch("gpt-4", None, 0.002)
+    >>> stats["gpt-4"].hit_rate
+    0.5
+    >>> stats.total.bytes_read
+    243
+    >>> stats.record_write([("gpt-4", 120), ("gpt-4", 80), ("gpt-3.5", 50)], 0.01)
+    >>> stats["gpt-4"].bytes_stored, stats["gpt-4"].write_latency.count
+    (200, 1)
+    >>> list(stats.to_dict())
+    ['gpt-4', 'gpt-3.5']
+    """
+
+    def __init__(self):
+        self._by_model: defaultdict[str, ModelCacheStats] = defaultdict(ModelCacheStats)
+        self._lock = threading.Lock()
+
+    def record_fetch(
+        self, model: str, entry: Optional[CacheEntry], seconds: float
+    ) -> None:
+        """Count a lookup, which found `entry` or nothing, and its duration."""
+        with self._lock:
+            stats = self._by_model[model]
+            if entry is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+                stats.bytes_read += encoded_size(entry)
+            stats.fetch_latency.record(seconds)
+
+    def record_store(self, model: str, entry: CacheEntry, seconds: float) -> None:
+        """Count a write of an entry, and its duration."""
+        with self._lock:
+            stats = self._by_model[model]
+            stats.stores += 1
+            stats.bytes_written += encoded_size(entry)
+            stats.store_latency.record(seconds)
+
+    def record_write(self, sizes: Iterable[tuple[str, int]], seconds: float) -> None:
+        """Count a transaction that wrote entries to a database, given their (model, stored size) pairs, and its duration.
+
+        The duration is counted once for each model of the entries.
+        """
+        with self._lock:
+            models = set()
+            for model, size in sizes:
+                self._by_model[model].bytes_stored += size
+                models.add(model)
+            for model in models:
+                self._by_model[model].write_latency.record(seconds)
+
+    def __getitem__(self, model: str) -> ModelCacheStats:
+        """Return the counts for a model; they are all zero if the model was not used."""
+        return self._by_model.get(model) or ModelCacheStats()
+
+    def __iter__(self):
+        return iter(list(self._by_model))
+
+    @property
+    def total(self) -> ModelCacheStats:
+        """Return the counts for all the models."""
+        total = ModelCacheStats()
+        with self._lock:
+            for stats in self._by_model.values():
+                total += stats
+        return total
+
+    def reset(self) -> None:
+        """Set all the counts to zero."""
+        with self._lock:
+            self._by_model.clear()
+
+    def to_dict(self) -> dict:
+        """Return the counts, by model."""
+        with self._lock:
+            return {model: stats.to_dict() for model, stats in self._by_model.items()}
+
+    def __repr__(self) -> str:
+        return f"CacheStats(models={list(self._by_model)})"
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
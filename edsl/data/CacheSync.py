@@ -0,0 +1,126 @@
+from __future__ import annotations
+import hashlib
+from typing import Any, Callable, Iterable
+
+# The number of characters a prefix grows by at each level of the digest comparison
+SYNC_PREFIX_STEP = 2
+# Prefixes with at most this many keys on each side are compared key by key
+SYNC_LEAF_SIZE = 1_000
+# Prefixes this long are compared key by key, whatever their number of keys
+SYNC_MAX_PREFIX_LENGTH = 8
+# The maximum number of keys or entries sent in a single request
+SYNC_PAGE_SIZE = 1_000
+
+# The digest of a prefix with no keys
+EMPTY_DIGEST = [0, "0"]
+
+
+def _key_hash(key: str) -> int:
+    """Returns a 64-bit hash of a key."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def prefix_digests(
+    keys: Iterable[str], prefixes: list[str], prefix_length: int
+) -> dict[str, list]:
+    """
+    Returns the number of keys and a digest of the keys under each prefix of `prefix_length` characters
+    that extends one of `prefixes`.
+    - The digest does not depend on the order of the keys, so each side of a sync can compute it in one pass.
+
+    >>> prefix_digests(["abc", "abd", "bcd"], [""], 1)
+    {'a': [2, 'f161899ff2b864c'], 'b': [1, '93654e012dd7ec1d']}
+    >>> prefix_digests(["abd", "bcd", "abc"], ["a"], 2)
+    {'ab': [2, 'f161899ff2b864c']}
+    """
+    parent_length = len(prefixes[0]) if prefixes else 0
+    parents = set(prefixes)
+    digests = {}
+    for key in keys:
+        if key[:parent_length] not in parents:
+            continue
+        count, digest = digests.get(key[:prefix_length], (0, 0))
+        digests[key[:prefix_length]] = (count + 1, digest ^ _key_hash(key))
+    return {
+        prefix: [count, format(digest, "x")]
+        for prefix, (count, digest) in sorted(digests.items())
+    }
+
+
+def keys_with_prefixes(keys: Iterable[str], prefixes: Iterable[str]) -> list[str]:
+    """
+    Returns the keys that start with one of the prefixes.
+
+    >>> keys_with_prefixes(["abc", "abd", "bcd", "cde"], ["ab", "c"])
+    ['abc', 'abd', 'cde']
+    """
+    prefixes_by_length = {}
+    for prefix in prefixes:
+        prefixes_by_length.setdefault(len(prefix), set()).add(prefix)
+    return [
+        key
+        for key in keys
+        if any(key[:length] in group for length, group in prefixes_by_length.items())
+    ]
+
+
+def find_missing_keys(
+    local_keys: Callable[[], Iterable[str]],
+    remote: Any,
+    leaf_size: int = SYNC_LEAF_SIZE,
+) -> tuple[set[str], set[str]]:
+    """
+    Compares the local and the remote keys, and returns the keys missing locally and the keys missing remotely.
+    - Starting with all keys, splits the keys by prefix and compares the digests of each side, level by level.
+    - Only prefixes whose digests differ are split further, or compared key by key once they are small.
+    - `local_keys` is called once per level and should return a fresh iterable of the local keys.
+
+    :param local_keys: A function returning the local keys.
+    :param remote: The remote side, with `get_cache_digests(prefixes, prefix_length)` and `get_cache_keys(prefixes)` methods, e.g., a Coop client.
+    :param leaf_size: The number of keys below which a prefix is compared key by key.
+    """
+    parents, leaves = [""], {}
+    while parents:
+        prefix_length = len(parents[0]) + SYNC_PREFIX_STEP
+        local_digests = prefix_digests(local_keys(), parents, prefix_length)
+        remote_digests = remote.get_cache_digests(parents, prefix_length)
+        parents = []
+        for prefix in sorted(local_digests.keys() | remote_digests.keys()):
+            local_digest = local_digests.get(prefix, EMPTY_DIGEST)
+            remote_digest = remote_digests.get(prefix, EMPTY_DIGEST)
+            if local_digest == remote_digest:
+                continue
+            counts = (local_digest[0], remote_digest[0])
+            if (
+                min(counts) == 0
+                or max(counts) <= leaf_size
+                or prefix_length >= SYNC_MAX_PREFIX_LENGTH
+            ):
+                leaves[prefix] = counts
+            else:
+                parents.append(prefix)
+
+    local = set(
+        keys_with_prefixes(
+            local_keys(), [prefix for prefix, counts in leaves.items() if counts[0]]
+        )
+    )
+    remote_keys = set()
+    page, page_size = [], 0
+    for prefix, (_, remote_count) in leaves.items():
+        if not remote_count:
+            continue
+        page.append(prefix)
+        page_size += remote_count
+        if page_size >= SYNC_PAGE_SIZE:
+            remote_keys.update(remote.get_cache_keys(page))
+            page, page_size = [], 0
+    if page:
+        remote_keys.update(remote.get_cache_keys(page))
+    return remote_keys - local, local - remote_keys
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
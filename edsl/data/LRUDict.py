@@ -0,0 +1,150 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Optional
+from edsl.data.CacheEntry import CacheEntry
+
+# The estimated memory used by a CacheEntry besides its text, in bytes
+ENTRY_OVERHEAD = 1_000
+
+
+def text_size(entry: CacheEntry) -> int:
+    """
+    Returns the length of the texts of a CacheEntry: its model, prompts, and output.
+
+    >>> text_size(CacheEntry.example())
+    99
+    """
+    return sum(
+        len(text)
+        for text in (entry.model, entry.system_prompt, entry.user_prompt, entry.output)
+    )
+
+
+def entry_size(entry: CacheEntry) -> int:
+    """
+    Estimates the memory used by a CacheEntry, in bytes.
+
+    >>> entry_size(CacheEntry.example()) > ENTRY_OVERHEAD
+    True
+    """
+    return ENTRY_OVERHEAD + text_size(entry)
+
+
+class LRUDict:
+    """
+    A size-bounded dictionary of CacheEntry objects, used as a memory tier in front of a persistent cache.
+    - Holds at most `max_entries` entries and about `max_bytes` bytes; None means no bound.
+    - When a bound is exceeded, the least recently used entries are evicted.
+    - Counts hits, misses, and evictions, see `stats`.
+
+    >>> d = LRUDict(max_entries=2)
+    >>> d["a"], d["b"] = CacheEntry.example(), CacheEntry.example()
+    >>> d.get("a") == CacheEntry.example()
+    True
+    >>> d["c"] = CacheEntry.example()
+    >>> list(d)
+    ['a', 'c']
+    >>> d.get("b") is None
+    True
+    >>> d.hit_rate
+    0.5
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Optional[CacheEntry] = None) -> CacheEntry:
+        """Return the entry for the key, and mark it as the most recently used one."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def __setitem__(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._sizes[key] = entry_size(entry)
+            self.num_bytes += self._sizes[key]
+            while self._entries and self._over_bounds():
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _over_bounds(self) -> bool:
+        """Return True if the dictionary holds too many entries or bytes."""
+        return (
+            self.max_entries is not None and len(self._entries) > self.max_entries
+        ) or (self.max_bytes is not None and self.num_bytes > self.max_bytes)
+
+    def _remove(self, key: str) -> None:
+        """Remove the entry for the key, if any."""
+        if self._entries.pop(key, None) is not None:
+            self.num_bytes -= self._sizes.pop(key)
+
+    def discard(self, key: str) -> None:
+        """Remove the entry for the key, if any."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all the entries; the counts are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.num_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """Return the share of lookups that found their entry, or None before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    @property
+    def stats(self) -> dict:
+        """
+        Return the size of the dictionary and its counts of hits, misses, and evictions.
+
+        >>> LRUDict(max_entries=10).stats
+        {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'hit_rate': None}
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.num_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def __repr__(self) -> str:
+        return f"LRUDict(max_entries={self.max_entries}, max_bytes={self.max_bytes})"
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
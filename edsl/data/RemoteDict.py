@@ -1,103 +1,412 @@
-import functools
-import json
-import requests
-from typing import Optional
+from __future__ import annotations
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+import warnings
+import weakref
+from typing import Any, Coroutine, Generator, Iterable, Optional, Union
+import aiohttp
 from edsl.data.CacheEntry import CacheEntry
 
+REMOTE_DICT_URL = "http://127.0.0.1:8000"
+# The maximum number of keys or entries sent in one request
+BATCH_SIZE = 500
+# How long a lookup waits for other lookups to be sent with it, in seconds
+LOOKUP_DELAY = 0.002
+# The maximum number of connections kept open to the server
+MAX_CONNECTIONS = 20
+REQUEST_TIMEOUT = 30.0
+# The maximum time a new entry waits before it is sent to the server, in seconds
+WRITE_FLUSH_INTERVAL = 1.0
 
-def handle_request_exceptions(reraise=False):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            try:
-                return func(*args, **kwargs)
-            except requests.exceptions.ConnectionError as e:
-                print(f"Could not connect to remote server: {e}")
-            except requests.exceptions.Timeout as e:
-                print(f"Request timed out: {e}")
-            except requests.exceptions.HTTPError as e:
-                print(f"HTTP error occurred: {e}")
-            except requests.exceptions.RequestException as e:
-                print(f"An error occurred during the request: {e}")
-            except ValueError as e:
-                print(f"Invalid data format: {e}")
-
-            if reraise:
-                raise
+# The errors of a request that failed, e.g., a timeout or a response that is not valid JSON
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+# The dictionaries that may have entries that are not sent yet, so they are flushed at exit
+_dicts_with_pending_writes: weakref.WeakSet = weakref.WeakSet()
 
-        return wrapper
 
-    return decorator
+@atexit.register
+def _flush_all() -> None:
+    """Send the pending entries of all the dictionaries."""
+    for d in list(_dicts_with_pending_writes):
+        try:
+            d.flush()
+        except REQUEST_ERRORS as e:
+            warnings.warn(f"Could not send the pending cache entries: {e}")
 
 
 class RemoteDict:
     """
-    A dictionary-like object that is an interface for a remote database.
-    - You can use RemoteDict as a regular dictionary.
-    - TODO: Implement the methods.
+    A dictionary-like object that is an interface for a remote cache server, e.g., `RemoteDictServer`.
+    - You can use RemoteDict as a regular dictionary, or as the `data` of a Cache.
+
+    Requests are sent with a pooled aiohttp session, on an event loop that runs in a background thread.
+    So they can be awaited from any event loop without blocking it (`async_get`, `async_get_many`, `async_set_many`),
+    or waited for from synchronous code.
+
+    Lookups made at the same time, e.g., by concurrent interviews, are sent together in one `get_many` request.
+    `get_many` and `set_many` split their keys into requests of at most `batch_size` entries, which are sent concurrently.
+    New entries are written behind, like with SQLiteDict: they are sent in batches, when `batch_size` entries are pending,
+    after `write_flush_interval` seconds, when `flush` is called, or when the interpreter exits. Reads see the pending entries.
     """
 
-    def __init__(self, base_url: str = None):
-        self.base_url = base_url or "http://127.0.0.1:8000"
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        *,
+        batch_size: int = BATCH_SIZE,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT,
+        write_flush_interval: float = WRITE_FLUSH_INTERVAL,
+    ):
+        """
+        :param base_url: The URL of the server; the endpoints are under `{base_url}/items/`.
+        :param batch_size: The maximum number of keys or entries sent in one request.
+        :param max_connections: The maximum number of connections kept open to the server.
+        :param timeout: The maximum duration of a request, in seconds.
+        :param write_flush_interval: The maximum time a new entry waits before it is sent, in seconds.
+        """
+        self.base_url = (base_url or REMOTE_DICT_URL).rstrip("/")
+        self.batch_size = batch_size
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.write_flush_interval = write_flush_interval
+        self._pending: dict[str, CacheEntry] = {}
+        self._pending_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        # only used on the background event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lookups: dict[str, asyncio.Future] = {}
+        self._lookup_handle: Optional[asyncio.TimerHandle] = None
+        self._write_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    ####################
+    # EVENT LOOP AND REQUESTS
+    ####################
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background event loop, starting it if needed, e.g., in a forked process."""
+        with self._loop_lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._session = None
+                self._lookups = {}
+                self._lookup_handle = self._write_handle = None
+                threading.Thread(
+                    target=self._loop.run_forever, name="RemoteDict", daemon=True
+                ).start()
+            return self._loop
+
+    def _submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def _run(self, coroutine: Coroutine) -> Any:
+        """Run a coroutine on the background event loop and wait for its result."""
+        return self._submit(coroutine).result()
+
+    async def _await(self, coroutine: Coroutine) -> Any:
+        """Run a coroutine on the background event loop, without blocking the running one."""
+        return await asyncio.wrap_future(self._submit(coroutine))
+
+    def _start_task(self, coroutine: Coroutine) -> None:
+        """Start a task on the background event loop, and keep it until it is done."""
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
-    def __bool__(self):
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[dict] = None,
+        params: Optional[dict] = None,
+    ) -> Any:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        async with self._session.request(
+            method, f"{self.base_url}/items/{endpoint}", json=payload, params=params
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _batches(self, items: list) -> list[list]:
+        return [
+            items[start : start + self.batch_size]
+            for start in range(0, len(items), self.batch_size)
+        ]
+
+    async def _get_many(self, keys: list[str]) -> dict[str, CacheEntry]:
+        """Get the entries of the keys from the server, `batch_size` keys per request."""
+        responses = await asyncio.gather(
+            *(
+                self._request("POST", "get_many", {"keys": batch})
+                for batch in self._batches(keys)
+            )
+        )
+        return {
+            key: CacheEntry.from_dict(entry)
+            for response in responses
+            for key, entry in response["entries"].items()
+        }
+
+    async def _set_many(self, entries: dict[str, CacheEntry], overwrite: bool) -> None:
+        """Send the entries to the server, `batch_size` entries per request."""
+        await asyncio.gather(
+            *(
+                self._request(
+                    "POST",
+                    "set_many",
+                    {
+                        "entries": {key: entry.to_dict() for key, entry in batch},
+                        "overwrite": overwrite,
+                    },
+                )
+                for batch in self._batches(list(entries.items()))
+            )
+        )
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        """Get the entry of a key, in the same request as the other lookups made in the next `LOOKUP_DELAY` seconds."""
+        if key not in self._lookups:
+            self._lookups[key] = self._loop.create_future()
+        future = self._lookups[key]
+        if len(self._lookups) >= self.batch_size:
+            self._send_lookups()
+        elif self._lookup_handle is None:
+            self._lookup_handle = self._loop.call_later(
+                LOOKUP_DELAY, self._send_lookups
+            )
+        # a cancelled lookup does not cancel the others that wait for the same key
+        return await asyncio.shield(future)
+
+    def _send_lookups(self) -> None:
+        if self._lookup_handle is not None:
+            self._lookup_handle.cancel()
+            self._lookup_handle = None
+        lookups, self._lookups = self._lookups, {}
+        if lookups:
+            self._start_task(self._resolve_lookups(lookups))
+
+    async def _resolve_lookups(self, lookups: dict[str, asyncio.Future]) -> None:
+        try:
+            entries = await self._get_many(list(lookups))
+        except Exception as e:
+            for future in lookups.values():
+                future.set_exception(e)
+            return
+        for key, future in lookups.items():
+            future.set_result(entries.get(key))
+
+    def _schedule_write(self, num_pending: int) -> None:
+        """Send the pending entries when there is a batch of them, or after `write_flush_interval` seconds."""
+        if num_pending >= self.batch_size:
+            self._start_task(self._write_pending(raise_errors=False))
+        elif self._write_handle is None:
+            self._write_handle = self._loop.call_later(
+                self.write_flush_interval,
+                lambda: self._start_task(self._write_pending(raise_errors=False)),
+            )
+
+    async def _write_pending(self, raise_errors: bool = True) -> None:
+        """
+        Send the pending entries; those that could not be sent stay pending.
+        - In the background, i.e., without `raise_errors`, they are sent again after `write_flush_interval` seconds.
+        """
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+        with self._pending_lock:
+            entries = dict(self._pending)
+        if not entries:
+            return
+        try:
+            await self._set_many(entries, overwrite=True)
+        except REQUEST_ERRORS as e:
+            if raise_errors:
+                raise
+            warnings.warn(f"Could not send the pending cache entries: {e!r}")
+            self._schedule_write(0)
+            return
+        with self._pending_lock:
+            for key, entry in entries.items():
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+
+    ####################
+    # DICTIONARY INTERFACE
+    ####################
+
+    def __bool__(self) -> bool:
         return True
 
-    def __setitem__(self, key: str, value: CacheEntry):
-        response = requests.post(f"{self.base_url}/items/{key}", json=value.to_dict())
-        response.raise_for_status()
+    def __setitem__(self, key: str, value: CacheEntry) -> None:
+        with self._pending_lock:
+            self._pending[key] = value
+            num_pending = len(self._pending)
+        _dicts_with_pending_writes.add(self)
+        self._get_loop().call_soon_threadsafe(self._schedule_write, num_pending)
+
+    def flush(self) -> None:
+        """Send the pending entries to the server."""
+        if self._pending:
+            self._run(self._write_pending())
 
-    def __getitem__(self, key: str):
-        response = requests.get(f"{self.base_url}/items/{key}")
-        if response.status_code == 404:
+    @property
+    def num_pending(self) -> int:
+        """Return the number of entries that are not sent to the server yet."""
+        return len(self._pending)
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        entry = self.get(key)
+        if entry is None:
             raise KeyError(f"Key '{key}' not found.")
-        response.raise_for_status()
-        return CacheEntry.from_dict(response.json())
+        return entry
 
-    def get(self, key: str, default: Optional[CacheEntry] = None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+    def get(self, key: str, default: Optional[Any] = None) -> Union[CacheEntry, Any]:
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._run(self._lookup(key))
+        return default if entry is None else entry
+
+    async def async_get(
+        self, key: str, default: Optional[Any] = None
+    ) -> Union[CacheEntry, Any]:
+        """Like `get`, but it does not block the running event loop while the server is queried."""
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = await self._await(self._lookup(key))
+        return default if entry is None else entry
+
+    def _split_pending(
+        self, keys: Iterable[str]
+    ) -> tuple[dict[str, CacheEntry], list[str]]:
+        """Return the pending entries of the keys, and the other keys."""
+        with self._pending_lock:
+            found = {key: self._pending[key] for key in keys if key in self._pending}
+        return found, [key for key in dict.fromkeys(keys) if key not in found]
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Gets the values of the keys that are in the dictionary, in requests of `batch_size` keys."""
+        found, missing = self._split_pending(list(keys))
+        if missing:
+            found.update(self._run(self._get_many(missing)))
+        return found
+
+    async def async_get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Like `get_many`, but it does not block the running event loop."""
+        found, missing = self._split_pending(list(keys))
+        if missing:
+            found.update(await self._await(self._get_many(missing)))
+        return found
+
+    def set_many(
+        self, new_d: Union[dict, RemoteDict], overwrite: Optional[bool] = True
+    ) -> None:
+        """
+        Send the entries to the server now, in requests of `batch_size` entries.
+
+        :param overwrite: If `overwrite` is False, the entries that are already on the server are not overwritten.
+        """
+        self._run(self._set_many(dict(new_d.items()), overwrite=overwrite))
 
-    def __delitem__(self, key: str):
-        response = requests.delete(f"{self.base_url}/items/{key}")
-        if response.status_code == 404:
+    async def async_set_many(
+        self, new_d: Union[dict, RemoteDict], overwrite: Optional[bool] = True
+    ) -> None:
+        """Like `set_many`, but it does not block the running event loop."""
+        await self._await(self._set_many(dict(new_d.items()), overwrite=overwrite))
+
+    def update(
+        self, new_d: Union[dict, RemoteDict], overwrite: Optional[bool] = False
+    ) -> None:
+        """
+        Update the dictionary with the values from another dictionary.
+
+        :param overwrite: If `overwrite` is False, existing values will not be overwritten.
+        """
+        self.set_many(new_d, overwrite=overwrite)
+
+    def __delitem__(self, key: str) -> None:
+        with self._pending_lock:
+            was_pending = self._pending.pop(key, None) is not None
+        response = self._run(self._request("POST", "delete_many", {"keys": [key]}))
+        if not was_pending and key not in response["keys"]:
             raise KeyError(f"Key '{key}' not found.")
-        response.raise_for_status()
 
-    def __contains__(self, key: str):
+    def __contains__(self, key: str) -> bool:
+        if key in self._pending:
+            return True
+        response = self._run(self._request("POST", "contains", {"keys": [key]}))
+        return key in response["keys"]
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._run(self._request("GET", "count"))["count"]
+
+    def keys(self) -> Generator[str, None, None]:
+        """Yields the keys of the server in order, `batch_size` at a time, each page starting after the last key."""
+        self.flush()
+        params = {"after": "", "limit": self.batch_size}
+        while True:
+            keys = self._run(self._request("GET", "keys", params=params))["keys"]
+            yield from keys
+            if len(keys) < self.batch_size:
+                return
+            params["after"] = keys[-1]
+
+    def __iter__(self) -> Generator[str, None, None]:
+        return self.keys()
+
+    def items(self) -> Generator[tuple[str, CacheEntry], None, None]:
         keys = self.keys()
-        return key in keys
+        while batch := [key for _, key in zip(range(self.batch_size), keys)]:
+            entries = self.get_many(batch)
+            yield from ((key, entries[key]) for key in batch if key in entries)
+
+    def values(self) -> Generator[CacheEntry, None, None]:
+        for _, entry in self.items():
+            yield entry
 
-    def __iter__(self):
-        return iter(self.keys())
+    def close(self) -> None:
+        """Send the pending entries, close the connections, and stop the background event loop."""
+        if self._loop is None or self._pid != os.getpid():
+            return
+        self.flush()
 
-    def __len__(self):
-        response = requests.get(f"{self.base_url}/items/count")
-        response.raise_for_status()
-        return response.json()["count"]
+        async def close_session():
+            if self._session is not None:
+                await self._session.close()
 
-    def keys(self):
-        response = requests.get(f"{self.base_url}/items/")
-        response.raise_for_status()
-        return response.json()
+        self._run(close_session())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
 
-    def values(self) -> list[CacheEntry]:
-        response = requests.get(f"{self.base_url}/items/values")
-        response.raise_for_status()
-        items = response.json()
-        return [CacheEntry(**json.loads(item)) for item in items]
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(base_url={self.base_url!r})"
 
 
 if __name__ == "__main__":
-    api_dict = RemoteDict()
+    from edsl.data.RemoteDictServer import RemoteDictServer
+
+    with RemoteDictServer() as server:
+        api_dict = RemoteDict(server.url)
+
+        # Add an item
+        api_dict["example"] = CacheEntry.example()
 
-    # Add an item
-    api_dict["example"] = CacheEntry.example()
+        # Retrieve an item
+        print(api_dict["example"])
 
-    # Retrieve an item
-    print(api_dict["example"])
+        # Check if an item exists
+        print("example" in api_dict)
 
-    # Check if an item exists
-    print("example" in api_dict)
+        api_dict.close()
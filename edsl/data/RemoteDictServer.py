@@ -0,0 +1,181 @@
+"""A small reference server for RemoteDict, which keeps its entries in a dict or an SQLiteDict.
+
+Run it with `python -m edsl.data.RemoteDictServer --db-path cache.db`. All the endpoints are under `/items/`:
+
+- `POST get_many` with `{"keys": [...]}` returns `{"entries": {key: entry}}` for the keys that are found.
+- `POST set_many` with `{"entries": {key: entry}, "overwrite": bool}` stores the entries.
+- `POST contains` and `POST delete_many` with `{"keys": [...]}` return `{"keys": [...]}`, the keys that were found.
+- `GET count` returns `{"count": n}`, and `GET keys?after=&limit=` returns `{"keys": [...]}`, the first `limit` keys
+  that come after the key `after`, in order; a client pages through the keys by passing the last key it received.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import heapq
+import threading
+from collections import Counter
+from typing import Optional, Union
+from aiohttp import web
+from edsl.data.CacheEntry import CacheEntry
+from edsl.data.SQLiteDict import SQLiteDict
+from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
+
+# The number of requests to each endpoint of an application
+REQUEST_COUNTS = web.AppKey("request_counts", Counter)
+
+
+def create_app(
+    data: Optional[Union[dict, SQLiteDict, ShardedSQLiteDict]] = None
+) -> web.Application:
+    """Return the application that serves the entries of `data`, an empty dict by default.
+
+    `app[REQUEST_COUNTS]` counts the requests to each endpoint.
+    """
+    data = {} if data is None else data
+    is_sqlite = isinstance(data, (SQLiteDict, ShardedSQLiteDict))
+
+    @web.middleware
+    async def count_requests(request: web.Request, handler):
+        request.app[REQUEST_COUNTS][request.match_info.route.name] += 1
+        return await handler(request)
+
+    async def get_many(request: web.Request) -> web.Response:
+        keys = (await request.json())["keys"]
+        if is_sqlite:
+            entries = data.get_many(keys)
+        else:
+            entries = {key: data[key] for key in keys if key in data}
+        return web.json_response(
+            {"entries": {key: entry.to_dict() for key, entry in entries.items()}}
+        )
+
+    async def set_many(request: web.Request) -> web.Response:
+        payload = await request.json()
+        entries = {
+            key: CacheEntry.from_dict(entry)
+            for key, entry in payload["entries"].items()
+        }
+        overwrite = payload.get("overwrite", True)
+        if is_sqlite:
+            data.update(entries, overwrite=overwrite)
+        else:
+            data.update(
+                entries
+                if overwrite
+                else {key: entry for key, entry in entries.items() if key not in data}
+            )
+        return web.json_response({"count": len(entries)})
+
+    async def contains(request: web.Request) -> web.Response:
+        keys = (await request.json())["keys"]
+        return web.json_response({"keys": [key for key in keys if key in data]})
+
+    async def delete_many(request: web.Request) -> web.Response:
+        deleted = []
+        for key in (await request.json())["keys"]:
+            if key in data:
+                del data[key]
+                deleted.append(key)
+        return web.json_response({"keys": deleted})
+
+    async def count(request: web.Request) -> web.Response:
+        return web.json_response({"count": len(data)})
+
+    async def keys(request: web.Request) -> web.Response:
+        after = request.query.get("after", "")
+        limit = int(request.query.get("limit", 1_000))
+        if is_sqlite:
+            # a range scan of the primary key, rather than skipping the keys of the previous pages
+            page = data.keys_after(after, limit)
+        else:
+            page = heapq.nsmallest(limit, (key for key in data if key > after))
+        return web.json_response({"keys": page})
+
+    app = web.Application(middlewares=[count_requests], client_max_size=2**30)
+    app[REQUEST_COUNTS] = Counter()
+    app.router.add_post("/items/get_many", get_many, name="get_many")
+    app.router.add_post("/items/set_many", set_many, name="set_many")
+    app.router.add_post("/items/contains", contains, name="contains")
+    app.router.add_post("/items/delete_many", delete_many, name="delete_many")
+    app.router.add_get("/items/count", count, name="count")
+    app.router.add_get("/items/keys", keys, name="keys")
+    return app
+
+
+class RemoteDictServer:
+    """
+    Runs the reference server on its own event loop, in a background thread, e.g., for tests.
+    - With `port=0`, a free port is used; `url` is the URL to give to a RemoteDict.
+
+    >>> from edsl.data.RemoteDict import RemoteDict
+    >>> with RemoteDictServer() as server:
+    ...     d = RemoteDict(server.url)
+    ...     d["foo"] = CacheEntry.example()
+    ...     d.flush()
+    ...     print(len(d), "foo" in d, server.data["foo"] == CacheEntry.example())
+    ...     d.close()
+    1 True True
+    """
+
+    def __init__(
+        self,
+        data: Optional[Union[dict, SQLiteDict, ShardedSQLiteDict]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.data = {} if data is None else data
+        self.host = host
+        self.port = port
+        self.app = create_app(self.data)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def request_counts(self) -> Counter:
+        """Return the number of requests to each endpoint."""
+        return self.app[REQUEST_COUNTS]
+
+    def start(self) -> RemoteDictServer:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+        async def start_site():
+            self._runner = web.AppRunner(self.app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            self.port = self._runner.addresses[0][1]
+
+        asyncio.run_coroutine_threadsafe(start_site(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self) -> RemoteDictServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a cache to RemoteDict clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--db-path",
+        help="The SQLite database of the entries; they are kept in memory if omitted.",
+    )
+    args = parser.parse_args()
+    data = SQLiteDict(f"sqlite:///{args.db_path}") if args.db_path else {}
+    web.run_app(create_app(data), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
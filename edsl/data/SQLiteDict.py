@@ -1,12 +1,172 @@
 from __future__ import annotations
+import atexit
+import hashlib
 import json
-from sqlalchemy import create_engine
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
-from typing import Any, Generator, Optional, Union
+import random
+import sqlite3
+import threading
+import time
+import warnings
+import weakref
+import zlib
+from itertools import islice
+from typing import Any, Generator, Iterable, Optional, Union
 from edsl.config import CONFIG
-from edsl.data.CacheEntry import CacheEntry
-from edsl.data.orm import Base, Data
+from edsl.data.CacheEntry import CacheEntry, KEY_VERSION
+from edsl.data.CacheStats import CacheStats
+
+# The number of pending entries that triggers a write
+WRITE_BATCH_SIZE = 500
+# The maximum number of seconds an entry stays pending before it is written
+WRITE_FLUSH_INTERVAL = 1.0
+# With write-ahead logging, NORMAL only risks the last transactions on a power loss, never corruption
+SYNCHRONOUS = "NORMAL"
+# How long a connection waits for another one to release its lock, in seconds
+BUSY_TIMEOUT = 30.0
+# How many times a write that still finds the database locked is retried,
+# and how long the first retry waits, in seconds; the wait doubles with each retry
+WRITE_RETRIES = 5
+WRITE_RETRY_BACKOFF = 0.05
+# The number of rows fetched at a time when iterating over the database
+FETCH_SIZE = 1_000
+# The number of entries sent to the database per statement in bulk operations
+BULK_BATCH_SIZE = 10_000
+# The number of keys looked up per query; older SQLite versions allow at most 999 parameters
+MAX_QUERY_PARAMETERS = 999
+
+# The zlib compression level of the stored entries
+COMPRESSION_LEVEL = 6
+# The number of free pages returned to the file system per transaction when vacuuming
+VACUUM_STEP_PAGES = 1_000
+
+CREATE_TABLE = "CREATE TABLE IF NOT EXISTS data (key VARCHAR NOT NULL, value VARCHAR, system_prompt_hash VARCHAR, user_prompt_hash VARCHAR, timestamp INTEGER, model VARCHAR, size INTEGER, first_version_key VARCHAR, PRIMARY KEY (key))"
+# The columns that databases created by earlier versions lack
+ADDED_COLUMNS = {
+    "system_prompt_hash": "VARCHAR",
+    "user_prompt_hash": "VARCHAR",
+    "timestamp": "INTEGER",
+    "model": "VARCHAR",
+    "size": "INTEGER",
+    "first_version_key": "VARCHAR",
+}
+# The retention policies select entries by age, per model or not;
+# remote caches may keep entries under the keys of the first version of the key scheme
+CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS data_timestamp ON data (timestamp)",
+    "CREATE INDEX IF NOT EXISTS data_model_timestamp ON data (model, timestamp)",
+    "CREATE INDEX IF NOT EXISTS data_first_version_key ON data (first_version_key)",
+)
+# The prompts, stored once each and referenced by the hash of their text
+CREATE_TEXTS_TABLE = "CREATE TABLE IF NOT EXISTS texts (hash VARCHAR NOT NULL, text VARCHAR, PRIMARY KEY (hash))"
+# Facts about the database, e.g., the version of the key scheme of its entries
+CREATE_METADATA_TABLE = "CREATE TABLE IF NOT EXISTS metadata (name VARCHAR NOT NULL, value VARCHAR, PRIMARY KEY (name))"
+INSERT_TEXT = (
+    "INSERT INTO texts (hash, text) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING"
+)
+ROW_COLUMNS = "key, value, system_prompt_hash, user_prompt_hash, timestamp, model, size, first_version_key"
+UPSERT = f"INSERT INTO data ({ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value, system_prompt_hash = excluded.system_prompt_hash, user_prompt_hash = excluded.user_prompt_hash, timestamp = excluded.timestamp, model = excluded.model, size = excluded.size, first_version_key = excluded.first_version_key"
+INSERT_IF_MISSING = f"INSERT INTO data ({ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO NOTHING"
+ENTRY_COLUMNS = "data.key, data.value, system_prompts.text, user_prompts.text"
+JOIN_TEXTS = (
+    " LEFT JOIN texts AS system_prompts ON system_prompts.hash = data.system_prompt_hash"
+    " LEFT JOIN texts AS user_prompts ON user_prompts.hash = data.user_prompt_hash"
+)
+SELECT_ENTRIES = f"SELECT {ENTRY_COLUMNS} FROM data{JOIN_TEXTS}"
+CREATE_INCOMING_TABLE = "CREATE TEMP TABLE IF NOT EXISTS incoming (key VARCHAR NOT NULL, value VARCHAR, system_prompt_hash VARCHAR, user_prompt_hash VARCHAR, timestamp INTEGER, model VARCHAR, size INTEGER, first_version_key VARCHAR, PRIMARY KEY (key))"
+STAGE_INCOMING = f"INSERT OR REPLACE INTO temp.incoming ({ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+# The entries kept by the retention policies are the most recent ones
+NEWEST_FIRST = "ORDER BY timestamp DESC, rowid DESC"
+SELECT_CHANGED = (
+    f"SELECT {ENTRY_COLUMNS} FROM temp.incoming JOIN data ON data.key = incoming.key{JOIN_TEXTS}"
+    " WHERE data.value IS NOT incoming.value"
+    " OR data.system_prompt_hash IS NOT incoming.system_prompt_hash"
+    " OR data.user_prompt_hash IS NOT incoming.user_prompt_hash"
+)
+
+
+def _text_hash(text: str) -> str:
+    """Return the hash that a text is stored under."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _encode_entries(
+    items: Iterable[tuple[str, CacheEntry]]
+) -> tuple[list[tuple], dict[str, str]]:
+    """Return the rows of the entries, and the prompts that they reference by hash.
+
+    A row holds the key, the rest of the entry as compressed JSON, and the hashes of the prompts,
+    followed by the timestamp, the model, and the stored size of the entry in bytes, which the retention policies use,
+    and the key of the entry in the first version of the key scheme, see `first_version_keys`.
+    """
+    rows = []
+    texts = {}
+    for key, entry in items:
+        record = entry.to_dict()
+        system_prompt = record.pop("system_prompt")
+        user_prompt = record.pop("user_prompt")
+        system_prompt_hash = _text_hash(system_prompt)
+        user_prompt_hash = _text_hash(user_prompt)
+        texts[system_prompt_hash] = system_prompt
+        texts[user_prompt_hash] = user_prompt
+        value = zlib.compress(json.dumps(record).encode(), COMPRESSION_LEVEL)
+        size = len(value) + len(system_prompt.encode()) + len(user_prompt.encode())
+        rows.append(
+            (
+                key,
+                value,
+                system_prompt_hash,
+                user_prompt_hash,
+                entry.timestamp,
+                entry.model,
+                size,
+                entry.key_for(1),
+            )
+        )
+    return rows, texts
+
+
+def _decode_entry(
+    value: Union[str, bytes], system_prompt: Optional[str], user_prompt: Optional[str]
+) -> CacheEntry:
+    """Return the entry stored in a row.
+
+    Entries written by earlier versions are stored whole, as JSON text.
+    """
+    if isinstance(value, str):
+        return CacheEntry.from_dict(json.loads(value))
+    record = json.loads(zlib.decompress(value))
+    return CacheEntry(system_prompt=system_prompt, user_prompt=user_prompt, **record)
+
+
+# The dictionaries with pending entries, which are written when the interpreter exits
+_dicts_with_pending_writes: weakref.WeakSet = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    """Write the pending entries of all the dictionaries."""
+    for d in list(_dicts_with_pending_writes):
+        d.flush()
+
+
+def _write_behind(
+    ref: weakref.ref, wakeup: threading.Event, flush_interval: float
+) -> None:
+    """Write the pending entries of a dictionary in the background, until it is garbage collected.
+
+    The thread only holds a weak reference, so it does not keep the dictionary alive.
+    """
+    while True:
+        wakeup.wait(flush_interval)
+        wakeup.clear()
+        d = ref()
+        if d is None:
+            return
+        try:
+            d.flush()
+        except sqlite3.Error as e:
+            warnings.warn(f"Could not write the pending cache entries: {e}")
+        del d
 
 
 class SQLiteDict:
@@ -14,9 +174,38 @@ class SQLiteDict:
     A dictionary-like object that is an interface for an local database.
     - You can use SQLiteDict as a regular dictionary.
     - Supports only SQLite for now.
+
+    The database is accessed with the `sqlite3` module, in write-ahead logging (WAL) mode,
+    so reads are not blocked while entries are written. Each thread uses its own connection,
+    and SQLite reuses the prepared statements of each connection.
+
+    Prompts are stored once, in the `texts` table, and entries reference them by hash;
+    the rest of each entry is stored as zlib-compressed JSON. Entries written by earlier versions,
+    as JSON text, are still read; `compress_legacy_entries` rewrites them in the compressed format.
+
+    New entries are written behind: they are kept in memory and written in batches, by a background thread,
+    in a single transaction per batch. Reads see the pending entries.
+    A batch is written when `write_batch_size` entries are pending, after `write_flush_interval` seconds,
+    when `flush` is called (e.g., when a Cache context is exited), or when the interpreter exits.
+    If the process crashes, at most the entries of the last `write_flush_interval` seconds are lost;
+    with `write_behind=False`, every entry is committed as soon as it is set.
+
+    Writers wait up to `busy_timeout` seconds for the lock of the database, then retry with backoff;
+    for many concurrent writers, see ShardedSQLiteDict.
+
+    If `stats` is set, e.g., by the Cache that uses the dictionary, each write transaction is counted in it,
+    with its duration and the stored sizes of its entries; see `CacheStats.record_write`.
     """
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        *,
+        write_behind: bool = True,
+        write_batch_size: int = WRITE_BATCH_SIZE,
+        write_flush_interval: float = WRITE_FLUSH_INTERVAL,
+        busy_timeout: float = BUSY_TIMEOUT,
+    ):
         """
 
         >>> temp_db_path = self._get_temp_path()
@@ -27,14 +216,149 @@ class SQLiteDict:
         self.db_path = db_path or CONFIG.get("EDSL_DATABASE_PATH")
         if not self.db_path.startswith("sqlite:///"):
             self.db_path = f"sqlite:///{self.db_path}"
+        self._file_path = self.db_path[len("sqlite:///") :]
+        self._in_memory = self._file_path in ("", ":memory:")
+        self.busy_timeout = busy_timeout
+        self.stats: Optional[CacheStats] = None
+        self._thread_connections = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         try:
-            self.engine = create_engine(self.db_path, echo=False, future=True)
-            Base.metadata.create_all(self.engine)
-            self.Session = sessionmaker(bind=self.engine)
-        except SQLAlchemyError as e:
+            with self._connection() as connection:
+                # only applies to new databases; see `vacuum` for existing ones
+                connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                connection.execute(CREATE_TABLE)
+                connection.execute(CREATE_TEXTS_TABLE)
+                connection.execute(CREATE_METADATA_TABLE)
+                self._add_missing_columns(connection)
+                for statement in CREATE_INDEXES:
+                    connection.execute(statement)
+                self.key_version = self._get_key_version(connection)
+        except sqlite3.Error as e:
             raise Exception(
                 f"""Database initialization error: {e}. The attempted DB path was {db_path}"""
             ) from e
+        self.write_behind = write_behind and not self._in_memory
+        self.write_batch_size = write_batch_size
+        self.write_flush_interval = write_flush_interval
+        self._pending: dict[str, CacheEntry] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        if self.key_version < KEY_VERSION:
+            print(
+                f"Updating the keys of the cache at {self.db_path} to version {KEY_VERSION}. This only happens once."
+            )
+            self.migrate_keys()
+
+    @staticmethod
+    def _get_key_version(connection: sqlite3.Connection) -> int:
+        """Return the version of the key scheme of the entries in the database."""
+        row = connection.execute(
+            "SELECT value FROM metadata WHERE name = 'key_version'"
+        ).fetchone()
+        if row is not None:
+            return int(row[0])
+        # the database is new, or was written before keys were versioned
+        is_empty = connection.execute("SELECT 1 FROM data LIMIT 1").fetchone() is None
+        key_version = KEY_VERSION if is_empty else 1
+        connection.execute(
+            "INSERT INTO metadata (name, value) VALUES ('key_version', ?) ON CONFLICT (name) DO NOTHING",
+            (str(key_version),),
+        )
+        return key_version
+
+    def migrate_keys(self, max_batch_size: Optional[int] = BULK_BATCH_SIZE) -> int:
+        """
+        Re-keys the entries that are keyed with an earlier version of the key scheme, see `CacheEntry.gen_key`.
+        - Called when a database with an earlier version is opened.
+        - Entries whose keys are not hashes of their fields, e.g., entries added under keys of their own, keep their keys.
+        - Returns the number of entries re-keyed.
+
+        >>> d = SQLiteDict.example()
+        >>> d.migrate_keys()
+        0
+        """
+        self.flush()
+        connection = self._connection()
+        num_rekeyed = 0
+        last_rowid = 0
+        while rows := connection.execute(
+            f"SELECT data.rowid, {ENTRY_COLUMNS} FROM data{JOIN_TEXTS} WHERE data.rowid > ? ORDER BY data.rowid LIMIT ?",
+            (last_rowid, max_batch_size),
+        ).fetchall():
+            last_rowid = rows[-1][0]
+            new_keys = []
+            for _, key, *row in rows:
+                entry = _decode_entry(*row)
+                if key == entry.key_for(self.key_version) and key != entry.key:
+                    new_keys.append((entry.key, key))
+            with connection:
+                connection.executemany(
+                    "UPDATE OR REPLACE data SET key = ? WHERE key = ?", new_keys
+                )
+            num_rekeyed += len(new_keys)
+        with connection:
+            connection.execute(
+                "UPDATE metadata SET value = ? WHERE name = 'key_version'",
+                (str(KEY_VERSION),),
+            )
+        self.key_version = KEY_VERSION
+        return num_rekeyed
+
+    @staticmethod
+    def _add_missing_columns(connection: sqlite3.Connection) -> None:
+        """Add the columns that a database created by an earlier version lacks."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(data)")}
+        for name, column_type in ADDED_COLUMNS.items():
+            if name in columns:
+                continue
+            try:
+                connection.execute(f"ALTER TABLE data ADD COLUMN {name} {column_type}")
+            except sqlite3.OperationalError as e:
+                # another connection added it in the meantime
+                if "duplicate column" not in str(e):
+                    raise
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection to the database."""
+        # connections are only used by one thread, but they can be closed by any thread
+        connection = sqlite3.connect(
+            ":memory:" if self._in_memory else self._file_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+        )
+        if not self._in_memory:
+            connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, opening it if needed.
+
+        An in-memory database only exists in its connection, so that one is shared by all threads.
+        """
+        if self._in_memory:
+            return self._connections[0] if self._connections else self._connect()
+        connection = getattr(self._thread_connections, "connection", None)
+        if connection is None:
+            connection = self._thread_connections.connection = self._connect()
+        return connection
+
+    def close(self) -> None:
+        """Write the pending entries and close the connections to the database.
+
+        The dictionary can still be used afterwards; new connections are opened as needed.
+        """
+        self.flush()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        self._thread_connections = threading.local()
+        for connection in connections:
+            connection.close()
 
     def _get_temp_path(self):
         import tempfile
@@ -52,9 +376,80 @@ class SQLiteDict:
         """
         if not isinstance(value, CacheEntry):
             raise ValueError(f"Value must be a CacheEntry object (got {type(value)}).")
-        with self.Session() as db:
-            db.merge(Data(key=key, value=json.dumps(value.to_dict())))
-            db.commit()
+        if not self.write_behind:
+            self._write([(key, value)])
+            return
+        with self._pending_lock:
+            self._pending[key] = value
+            num_pending = len(self._pending)
+        _dicts_with_pending_writes.add(self)
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(
+                target=_write_behind,
+                args=(weakref.ref(self), self._wakeup, self.write_flush_interval),
+                name=f"SQLiteDict writer ({self.db_path})",
+                daemon=True,
+            )
+            self._writer.start()
+        if num_pending >= self.write_batch_size:
+            self._wakeup.set()
+
+    def _write(
+        self, entries: Iterable[tuple[str, CacheEntry]], statement: str = UPSERT
+    ) -> None:
+        """Write the (key, entry) pairs, and the prompts that they reference, in a single transaction.
+
+        If another process holds the lock beyond the busy timeout, the transaction is rolled back
+        and retried up to `WRITE_RETRIES` times, with exponential backoff and jitter.
+        """
+        rows, texts = _encode_entries(entries)
+        for attempt in range(WRITE_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                with self._connection() as connection:
+                    connection.executemany(INSERT_TEXT, texts.items())
+                    connection.executemany(statement, rows)
+                if self.stats is not None:
+                    self.stats.record_write(
+                        [(row[5], row[6]) for row in rows], time.perf_counter() - start
+                    )
+                return
+            except sqlite3.OperationalError as e:
+                if attempt == WRITE_RETRIES or "locked" not in str(e):
+                    raise
+                time.sleep(WRITE_RETRY_BACKOFF * 2**attempt * (1 + random.random()))
+
+    def flush(self) -> None:
+        """
+        Write the pending entries to the database.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> d.flush()
+        >>> d.num_pending
+        0
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                entries = dict(self._pending)
+            if not entries:
+                return
+            self._write(entries.items())
+            with self._pending_lock:
+                for key, value in entries.items():
+                    if self._pending.get(key) is value:
+                        del self._pending[key]
+
+    @property
+    def num_pending(self) -> int:
+        """Return the number of entries that are not written to the database yet."""
+        return len(self._pending)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def __getitem__(self, key: str) -> CacheEntry:
         """
@@ -66,11 +461,45 @@ class SQLiteDict:
         >>> d["foo"] == CacheEntry.example()
         True
         """
-        with self.Session() as db:
-            value = db.query(Data).filter_by(key=key).first()
-            if not value:
-                raise KeyError(f"Key '{key}' not found.")
-            return CacheEntry.from_dict(json.loads(value.value))
+        with self._pending_lock:
+            if key in self._pending:
+                return self._pending[key]
+        row = (
+            self._connection()
+            .execute(f"{SELECT_ENTRIES} WHERE data.key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            raise KeyError(f"Key '{key}' not found.")
+        return _decode_entry(*row[1:])
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """
+        Gets the values of the keys that are in the dictionary.
+        - Looks up up to `MAX_QUERY_PARAMETERS` keys per query.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> list(d.get_many(["foo", "bar"]))
+        ['foo']
+        """
+        entries = {}
+        missing = []
+        with self._pending_lock:
+            for key in keys:
+                if key in self._pending:
+                    entries[key] = self._pending[key]
+                else:
+                    missing.append(key)
+        connection = self._connection()
+        for start in range(0, len(missing), MAX_QUERY_PARAMETERS):
+            batch = missing[start : start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(batch))
+            for key, *row in connection.execute(
+                f"{SELECT_ENTRIES} WHERE data.key IN ({placeholders})", batch
+            ):
+                entries[key] = _decode_entry(*row)
+        return entries
 
     def get(self, key: str, default: Optional[Any] = None) -> Union[CacheEntry, Any]:
         """
@@ -96,7 +525,7 @@ class SQLiteDict:
         self,
         new_d: Union[dict, SQLiteDict],
         overwrite: Optional[bool] = False,
-        max_batch_size: Optional[int] = 100,
+        max_batch_size: Optional[int] = BULK_BATCH_SIZE,
     ) -> None:
         """
         Update the dictionary with the values from another dictionary.
@@ -116,19 +545,42 @@ class SQLiteDict:
             raise ValueError(
                 f"new_d must be a dict or SQLiteDict object (got {type(new_d)})"
             )
-        current_batch = 0
-        with self.Session() as db:
-            for key, value in new_d.items():
-                if current_batch == max_batch_size:
-                    db.commit()
-                    current_batch = 0
-                current_batch += 1
-                if key in self:
-                    if overwrite:
-                        db.merge(Data(key=key, value=json.dumps(value.to_dict())))
-                else:
-                    db.merge(Data(key=key, value=json.dumps(value.to_dict())))
-            db.commit()
+        self.flush()
+        statement = UPSERT if overwrite else INSERT_IF_MISSING
+        items = iter(new_d.items())
+        while batch := list(islice(items, max_batch_size)):
+            self._write(batch, statement)
+
+    def mismatched_keys(
+        self,
+        new_d: dict[str, CacheEntry],
+        max_batch_size: Optional[int] = BULK_BATCH_SIZE,
+    ) -> list[str]:
+        """
+        Returns the keys of `new_d` that are stored with a different value.
+        - Values are compared like CacheEntry objects, i.e., ignoring timestamps.
+
+        The entries are loaded into a temporary table and compared with the stored ones in a single query,
+        so only the stored values that differ are read back.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> d.mismatched_keys({"foo": CacheEntry.example(), "bar": CacheEntry.example()})
+        []
+        """
+        self.flush()
+        connection = self._connection()
+        with connection:
+            connection.execute(CREATE_INCOMING_TABLE)
+            try:
+                items = iter(new_d.items())
+                while batch := list(islice(items, max_batch_size)):
+                    rows, _ = _encode_entries(batch)
+                    connection.executemany(STAGE_INCOMING, rows)
+                changed = connection.execute(SELECT_CHANGED).fetchall()
+            finally:
+                connection.execute("DELETE FROM temp.incoming")
+        return [key for key, *row in changed if _decode_entry(*row) != new_d[key]]
 
     def values(self) -> Generator[CacheEntry, None, None]:
         """
@@ -139,9 +591,8 @@ class SQLiteDict:
         >>> list(d.values()) == [CacheEntry.example()]
         True
         """
-        with self.Session() as db:
-            for instance in db.query(Data).all():
-                yield CacheEntry.from_dict(json.loads(instance.value))
+        for _, *row in self._iterate_rows(f"{SELECT_ENTRIES} ORDER BY data.rowid"):
+            yield _decode_entry(*row)
 
     def items(self) -> Generator[tuple[str, CacheEntry], None, None]:
         """
@@ -152,9 +603,221 @@ class SQLiteDict:
         >>> list(d.items()) == [("foo", CacheEntry.example())]
         True
         """
-        with self.Session() as db:
-            for instance in db.query(Data).all():
-                yield (instance.key, CacheEntry.from_dict(json.loads(instance.value)))
+        for key, *row in self._iterate_rows(f"{SELECT_ENTRIES} ORDER BY data.rowid"):
+            yield (key, _decode_entry(*row))
+
+    def compress_legacy_entries(
+        self, max_batch_size: Optional[int] = BULK_BATCH_SIZE
+    ) -> int:
+        """
+        Rewrites the entries that earlier versions stored as JSON text in the compressed format.
+        - Returns the number of entries rewritten.
+        - The space that they used is reused for new entries; run VACUUM on the database to shrink the file.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> d.compress_legacy_entries()
+        0
+        """
+        self.flush()
+        connection = self._connection()
+        num_rewritten = 0
+        last_rowid = 0
+        while rows := connection.execute(
+            "SELECT rowid, key, value FROM data WHERE rowid > ? AND typeof(value) = 'text' ORDER BY rowid LIMIT ?",
+            (last_rowid, max_batch_size),
+        ).fetchall():
+            last_rowid = rows[-1][0]
+            self._write(
+                (key, CacheEntry.from_dict(json.loads(value))) for _, key, value in rows
+            )
+            num_rewritten += len(rows)
+        return num_rewritten
+
+    def first_version_keys(self, keys: Iterable[str]) -> set[str]:
+        """
+        Returns the keys among `keys` that entries of the dictionary have in the first version of the key scheme.
+        - Remote caches may keep entries under those keys, see `CacheEntry.gen_key`.
+        - The keys are looked up in an indexed column, so the entries are not read.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> d.first_version_keys([CacheEntry.example().key_for(1), "bar"]) == {CacheEntry.example().key_for(1)}
+        True
+        """
+        self.flush()
+        self._backfill_first_version_keys()
+        keys = list(keys)
+        connection = self._connection()
+        found = set()
+        for start in range(0, len(keys), MAX_QUERY_PARAMETERS):
+            batch = keys[start : start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(batch))
+            found.update(
+                key
+                for (key,) in connection.execute(
+                    f"SELECT first_version_key FROM data WHERE first_version_key IN ({placeholders})",
+                    batch,
+                )
+            )
+        return found
+
+    def _backfill_first_version_keys(
+        self, max_batch_size: Optional[int] = BULK_BATCH_SIZE
+    ) -> None:
+        """Fill in the first-version keys of the entries written before they had their own column."""
+        connection = self._connection()
+        last_rowid = 0
+        while rows := connection.execute(
+            f"SELECT data.rowid, {ENTRY_COLUMNS} FROM data{JOIN_TEXTS} WHERE data.rowid > ? AND data.first_version_key IS NULL ORDER BY data.rowid LIMIT ?",
+            (last_rowid, max_batch_size),
+        ).fetchall():
+            last_rowid = rows[-1][0]
+            with connection:
+                connection.executemany(
+                    "UPDATE data SET first_version_key = ? WHERE rowid = ?",
+                    [
+                        (_decode_entry(*row).key_for(1), rowid)
+                        for rowid, _, *row in rows
+                    ],
+                )
+
+    def _backfill_retention_columns(
+        self, max_batch_size: Optional[int] = BULK_BATCH_SIZE
+    ) -> None:
+        """Fill in the timestamp, model, and size of the entries written before they had their own columns."""
+        connection = self._connection()
+        last_rowid = 0
+        while rows := connection.execute(
+            f"SELECT data.rowid, {ENTRY_COLUMNS} FROM data{JOIN_TEXTS} WHERE data.rowid > ? AND data.timestamp IS NULL ORDER BY data.rowid LIMIT ?",
+            (last_rowid, max_batch_size),
+        ).fetchall():
+            last_rowid = rows[-1][0]
+            updates = []
+            for rowid, _, value, system_prompt, user_prompt in rows:
+                entry = _decode_entry(value, system_prompt, user_prompt)
+                size = len(value) + len(entry.system_prompt) + len(entry.user_prompt)
+                updates.append((entry.timestamp, entry.model, size, rowid))
+            with connection:
+                connection.executemany(
+                    "UPDATE data SET timestamp = ?, model = ?, size = ? WHERE rowid = ?",
+                    updates,
+                )
+
+    def evict(
+        self,
+        *,
+        max_age: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        model_quotas: Optional[dict[str, int]] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Deletes the entries that the retention policies do not keep, and returns their number.
+        - Policies left as None do not apply; the most recent entries are kept.
+        - The entries are selected with the indexed `timestamp` and `model` columns.
+
+        :param max_age: The age, in seconds, beyond which entries are deleted.
+        :param max_entries: The number of entries kept.
+        :param max_bytes: The (estimated) size of the entries kept, in bytes: their compressed records and their prompts.
+        :param model_quotas: The number of entries kept for each of these models.
+        :param now: The time the ages are computed from, as a Unix timestamp; by default, the current time.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"], d["bar"] = CacheEntry.example(), CacheEntry.example()
+        >>> d.evict(max_entries=1)
+        1
+        >>> list(d.keys())
+        ['bar']
+        """
+        self.flush()
+        self._backfill_retention_columns()
+        connection = self._connection()
+        num_deleted = 0
+        with connection:
+            if max_age is not None:
+                cutoff = (time.time() if now is None else now) - max_age
+                num_deleted += connection.execute(
+                    "DELETE FROM data WHERE timestamp < ?", (cutoff,)
+                ).rowcount
+            for model, quota in (model_quotas or {}).items():
+                num_deleted += connection.execute(
+                    f"DELETE FROM data WHERE rowid IN (SELECT rowid FROM data WHERE model = ? {NEWEST_FIRST} LIMIT -1 OFFSET ?)",
+                    (model, quota),
+                ).rowcount
+            if max_entries is not None:
+                num_deleted += connection.execute(
+                    f"DELETE FROM data WHERE rowid IN (SELECT rowid FROM data {NEWEST_FIRST} LIMIT -1 OFFSET ?)",
+                    (max_entries,),
+                ).rowcount
+            if max_bytes is not None:
+                num_deleted += connection.execute(
+                    f"DELETE FROM data WHERE rowid IN (SELECT rowid FROM (SELECT rowid, SUM(size) OVER ({NEWEST_FIRST}) AS total FROM data) WHERE total > ?)",
+                    (max_bytes,),
+                ).rowcount
+        return num_deleted
+
+    def collect_texts(self) -> int:
+        """
+        Deletes the prompts that no entry references anymore, and returns their number.
+
+        >>> d = SQLiteDict.example()
+        >>> d["foo"] = CacheEntry.example()
+        >>> del d["foo"]
+        >>> d.collect_texts()
+        2
+        """
+        self.flush()
+        with self._connection() as connection:
+            return connection.execute(
+                "DELETE FROM texts WHERE hash NOT IN (SELECT system_prompt_hash FROM data WHERE system_prompt_hash IS NOT NULL)"
+                " AND hash NOT IN (SELECT user_prompt_hash FROM data WHERE user_prompt_hash IS NOT NULL)"
+            ).rowcount
+
+    def vacuum(self, max_pages: Optional[int] = None) -> int:
+        """
+        Returns the free pages of the database to the file system, and returns their number.
+        - Pages are freed `VACUUM_STEP_PAGES` at a time, each step in its own transaction,
+          so other connections are not blocked for long; at most `max_pages` are freed, all by default.
+        - A database created before incremental vacuuming was enabled is converted with a full VACUUM, once.
+
+        >>> SQLiteDict.example().vacuum()
+        0
+        """
+        self.flush()
+        connection = self._connection()
+        num_free = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.execute("VACUUM")
+            num_freed = num_free
+        else:
+            num_freed = 0
+            while num_free and (max_pages is None or num_freed < max_pages):
+                step = VACUUM_STEP_PAGES
+                if max_pages is not None:
+                    step = min(step, max_pages - num_freed)
+                connection.execute(f"PRAGMA incremental_vacuum({step})").fetchall()
+                remaining = connection.execute("PRAGMA freelist_count").fetchone()[0]
+                num_freed += num_free - remaining
+                if remaining == num_free:
+                    break
+                num_free = remaining
+        if not self._in_memory:
+            # the file only shrinks once the write-ahead log is written back to it
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return num_freed
+
+    def _iterate_rows(self, query: str) -> Generator[tuple, None, None]:
+        """Yield the rows of a query, fetching them in chunks rather than all at once."""
+        self.flush()
+        cursor = self._connection().execute(query)
+        try:
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                yield from rows
+        finally:
+            cursor.close()
 
     def __delitem__(self, key: str) -> None:
         """
@@ -166,13 +829,11 @@ class SQLiteDict:
         >>> d.get("foo", "missing")
         'missing'
         """
-        with self.Session() as db:
-            instance = db.query(Data).filter_by(key=key).one_or_none()
-            if instance:
-                db.delete(instance)
-                db.commit()
-            else:
-                raise KeyError(f"Key '{key}' not found.")
+        self.flush()
+        with self._connection() as connection:
+            cursor = connection.execute("DELETE FROM data WHERE key = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Key '{key}' not found.")
 
     def __contains__(self, key: str) -> bool:
         """
@@ -185,8 +846,15 @@ class SQLiteDict:
         >>> "bar" in d
         False
         """
-        with self.Session() as db:
-            return db.query(Data).filter_by(key=key).first() is not None
+        with self._pending_lock:
+            if key in self._pending:
+                return True
+        row = (
+            self._connection()
+            .execute("SELECT 1 FROM data WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None
 
     def __iter__(self) -> Generator[str, None, None]:
         """
@@ -197,9 +865,8 @@ class SQLiteDict:
         >>> list(iter(d)) == ["foo"]
         True
         """
-        with self.Session() as db:
-            for instance in db.query(Data).all():
-                yield instance.key
+        for (key,) in self._iterate_rows("SELECT key FROM data ORDER BY rowid"):
+            yield key
 
     def __len__(self) -> int:
         """
@@ -212,8 +879,8 @@ class SQLiteDict:
         >>> len(d)
         1
         """
-        with self.Session() as db:
-            return db.query(Data).count()
+        self.flush()
+        return self._connection().execute("SELECT COUNT(*) FROM data").fetchone()[0]
 
     def keys(self) -> Generator[str, None, None]:
         """
@@ -226,6 +893,28 @@ class SQLiteDict:
         """
         return self.__iter__()
 
+    def keys_after(self, after: Optional[str] = None, limit: int = 1_000) -> list[str]:
+        """
+        Returns up to `limit` keys that come after `after`, in order, e.g., to page through the keys.
+        - Each page is a range scan of the primary key, however far it is from the first one.
+
+        >>> d = SQLiteDict.example()
+        >>> for key in ["c", "a", "b"]:
+        ...     d[key] = CacheEntry.example()
+        >>> d.keys_after(limit=2), d.keys_after("b")
+        (['a', 'b'], ['c'])
+        """
+        self.flush()
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT key FROM data WHERE key > ? ORDER BY key LIMIT ?",
+                ("" if after is None else after, limit),
+            )
+            .fetchall()
+        )
+        return [key for (key,) in rows]
+
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(db_path={self.db_path!r})"
 
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import glob
+import heapq
+import math
+import os
+import zlib
+from itertools import chain, islice
+from typing import Any, Generator, Iterable, Optional, Union
+from edsl.data.CacheEntry import CacheEntry
+from edsl.data.CacheStats import CacheStats
+from edsl.data.SQLiteDict import BULK_BATCH_SIZE, SQLiteDict
+
+# The number of SQLite files the entries of a new sharded cache are spread over
+NUM_SHARDS = 8
+SHARD_FILENAME = "shard-{:03d}.db"
+
+
+class ShardedSQLiteDict:
+    """
+    A dictionary-like object that spreads its entries over several SQLite databases, by the hash of their keys.
+    - You can use ShardedSQLiteDict as a regular dictionary, or as the `data` of a Cache, like an SQLiteDict.
+
+    SQLite lets a single connection write to a database at a time, so processes that share an SQLiteDict
+    wait for each other. Here, each shard is an SQLiteDict with its own file, so processes writing
+    to different shards do not wait. Each shard waits for its lock up to a busy timeout, retries
+    with backoff, and writes its entries in batches, see SQLiteDict.
+
+    The shards are the files `shard-000.db`, `shard-001.db`, ... of the directory `db_path`.
+    Their number is fixed when the directory is created: entries are found by the shard of their key.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        num_shards: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        """
+        :param db_path: The directory of the shards, with or without the `sqlite:///` prefix.
+        :param num_shards: The number of shards; by default, the number in the directory, or `NUM_SHARDS` for a new one.
+        :param kwargs: Passed to the SQLiteDict of each shard, e.g., `write_behind`.
+        """
+        if db_path.startswith("sqlite:///"):
+            db_path = db_path[len("sqlite:///") :]
+        self.db_path = db_path
+        os.makedirs(db_path, exist_ok=True)
+        num_existing = len(
+            glob.glob(os.path.join(db_path, SHARD_FILENAME[:6] + "*.db"))
+        )
+        if num_existing and num_shards is not None and num_shards != num_existing:
+            raise ValueError(
+                f"The cache at {db_path} has {num_existing} shards, not {num_shards}."
+            )
+        self.num_shards = num_existing or num_shards or NUM_SHARDS
+        self.shards = [
+            SQLiteDict(
+                f"sqlite:///{os.path.join(db_path, SHARD_FILENAME.format(i))}", **kwargs
+            )
+            for i in range(self.num_shards)
+        ]
+
+    def _shard_index(self, key: str) -> int:
+        """Return the index of the shard that holds a key."""
+        return zlib.crc32(key.encode()) % self.num_shards
+
+    def _shard(self, key: str) -> SQLiteDict:
+        """Return the shard that holds a key."""
+        return self.shards[self._shard_index(key)]
+
+    def _partition(self, keys: Iterable[str]) -> dict[int, list[str]]:
+        """Group keys by the index of their shard."""
+        groups = {}
+        for key in keys:
+            groups.setdefault(self._shard_index(key), []).append(key)
+        return groups
+
+    def __setitem__(self, key: str, value: CacheEntry) -> None:
+        self._shard(key)[key] = value
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        return self._shard(key)[key]
+
+    def get(self, key: str, default: Optional[Any] = None) -> Union[CacheEntry, Any]:
+        return self._shard(key).get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Gets the values of the keys that are in the dictionary, with one lookup per shard."""
+        entries = {}
+        for index, shard_keys in self._partition(keys).items():
+            entries.update(self.shards[index].get_many(shard_keys))
+        return entries
+
+    def __delitem__(self, key: str) -> None:
+        del self._shard(key)[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._shard(key)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def update(
+        self,
+        new_d: Union[dict, SQLiteDict, ShardedSQLiteDict],
+        overwrite: Optional[bool] = False,
+        max_batch_size: Optional[int] = BULK_BATCH_SIZE,
+    ) -> None:
+        """
+        Update the dictionary with the values from another dictionary, `max_batch_size` entries at a time.
+
+        :param overwrite: If `overwrite` is False, existing values will not be overwritten.
+        """
+        items = iter(new_d.items())
+        while batch := dict(islice(items, max_batch_size)):
+            for index, keys in self._partition(batch).items():
+                self.shards[index].update(
+                    {key: batch[key] for key in keys}, overwrite=overwrite
+                )
+
+    def mismatched_keys(
+        self,
+        new_d: dict[str, CacheEntry],
+        max_batch_size: Optional[int] = BULK_BATCH_SIZE,
+    ) -> list[str]:
+        """Returns the keys of `new_d` that are stored with a different value, see `SQLiteDict.mismatched_keys`."""
+        return [
+            key
+            for index, keys in self._partition(new_d).items()
+            for key in self.shards[index].mismatched_keys(
+                {key: new_d[key] for key in keys}, max_batch_size
+            )
+        ]
+
+    def first_version_keys(self, keys: Iterable[str]) -> set[str]:
+        """
+        Returns the keys among `keys` that entries have in the first version of the key scheme, see `SQLiteDict.first_version_keys`.
+        - Entries are sharded by their current keys, so every shard is searched.
+        """
+        keys = list(keys)
+        return set().union(*(shard.first_version_keys(keys) for shard in self.shards))
+
+    def keys(self) -> Generator[str, None, None]:
+        return chain.from_iterable(shard.keys() for shard in self.shards)
+
+    def keys_after(self, after: Optional[str] = None, limit: int = 1_000) -> list[str]:
+        """Returns up to `limit` keys that come after `after`, in order, see `SQLiteDict.keys_after`."""
+        return list(
+            islice(
+                heapq.merge(*(shard.keys_after(after, limit) for shard in self.shards)),
+                limit,
+            )
+        )
+
+    def __iter__(self) -> Generator[str, None, None]:
+        return self.keys()
+
+    def values(self) -> Generator[CacheEntry, None, None]:
+        return chain.from_iterable(shard.values() for shard in self.shards)
+
+    def items(self) -> Generator[tuple[str, CacheEntry], None, None]:
+        return chain.from_iterable(shard.items() for shard in self.shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def flush(self) -> None:
+        """Write the pending entries of all the shards."""
+        for shard in self.shards:
+            shard.flush()
+
+    def close(self) -> None:
+        """Write the pending entries and close the connections of all the shards."""
+        for shard in self.shards:
+            shard.close()
+
+    @property
+    def stats(self) -> Optional[CacheStats]:
+        """Return the CacheStats that the write transactions of the shards are counted in, see `SQLiteDict`."""
+        return self.shards[0].stats
+
+    @stats.setter
+    def stats(self, stats: Optional[CacheStats]) -> None:
+        for shard in self.shards:
+            shard.stats = stats
+
+    @property
+    def num_pending(self) -> int:
+        """Return the number of entries that are not written to the databases yet."""
+        return sum(shard.num_pending for shard in self.shards)
+
+    def evict(
+        self,
+        *,
+        max_age: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        model_quotas: Optional[dict[str, int]] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Deletes the entries that the retention policies do not keep, see `SQLiteDict.evict`.
+        - Keys are spread evenly over the shards, so each shard keeps its share of the entries,
+          bytes, and model quotas, rounded up.
+        """
+
+        def share(limit):
+            return None if limit is None else math.ceil(limit / self.num_shards)
+
+        return sum(
+            shard.evict(
+                max_age=max_age,
+                max_entries=share(max_entries),
+                max_bytes=share(max_bytes),
+                model_quotas=(
+                    None
+                    if model_quotas is None
+                    else {model: share(quota) for model, quota in model_quotas.items()}
+                ),
+                now=now,
+            )
+            for shard in self.shards
+        )
+
+    def collect_texts(self) -> int:
+        """Deletes the prompts that no entry of their shard references anymore."""
+        return sum(shard.collect_texts() for shard in self.shards)
+
+    def vacuum(self, max_pages: Optional[int] = None) -> int:
+        """Returns the free pages of the shards to the file system, at most `max_pages` of each."""
+        return sum(shard.vacuum(max_pages=max_pages) for shard in self.shards)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(db_path={self.db_path!r}, num_shards={self.num_shards})"
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
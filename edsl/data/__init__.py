@@ -1,4 +1,8 @@
 from edsl.data.CacheEntry import CacheEntry
+from edsl.data.CacheSnapshot import CacheSnapshot, SnapshotDict
+from edsl.data.CacheStats import CacheStats
+from edsl.data.LRUDict import LRUDict
 from edsl.data.SQLiteDict import SQLiteDict
+from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
 from edsl.data.Cache import Cache
 from edsl.data.CacheHandler import CacheHandler
@@ -167,6 +167,9 @@ class Jobs(Base):
         Note that this sets the agents, model and scenarios if they have not been set. This is a side effect of the method.
         This is useful because a user can create a job without setting the agents, models, or scenarios, and the job will still run,
         with us filling in defaults.
+        The defaults are filled in eagerly, when the method is called, while the interviews themselves are created lazily.
+        This lets a runner create the bucket collection up front and then stream through a very large number of interviews
+        without ever holding all of them in memory.
         """
         self.agents = self.agents or [Agent()]
         self.models = self.models or [Model(LanguageModelType.GPT_4.value)]
@@ -174,18 +177,35 @@ class Jobs(Base):
             for model in self.models:
                 model.remote = True
         self.scenarios = self.scenarios or [Scenario()]
-        for agent, scenario, model in product(self.agents, self.scenarios, self.models):
-            yield Interview(
-                survey=self.survey, agent=agent, scenario=scenario, model=model
+        return (
+            Interview(survey=self.survey, agent=agent, scenario=scenario, model=model)
+            for agent, scenario, model in product(
+                self.agents, self.scenarios, self.models
             )
+        )
+
+    def num_interviews(self, n: int = 1) -> int:
+        """Return the number of interviews that running the job `n` times will conduct.
 
-    def create_bucket_collection(self) -> BucketCollection:
+        >>> Jobs.example().num_interviews(n=2)
+        8
+        """
+        return (
+            len(self.agents or [1])
+            * len(self.scenarios or [1])
+            * len(self.models or [1])
+            * n
+        )
+
+    def create_bucket_collection(self, share: float = 1.0) -> BucketCollection:
         """
         Create a collection of buckets for each model.
 
         These buckets are used to track API calls and token usage.
+
+        :param share: the fraction of the rate limits that the buckets use.
         """
-        bucket_collection = BucketCollection()
+        bucket_collection = BucketCollection(share=share)
         for model in self.models:
             bucket_collection.add_model(model)
         return bucket_collection
@@ -210,6 +230,8 @@ class Jobs(Base):
         check_api_keys=True,
         sidecar_model=None,
         batch_mode=False,
+        max_concurrency: Optional[int] = None,
+        workers: int = 1,
     ) -> Union[Results, ResultsAPI, None]:
         """
         Runs the Job: conducts Interviews and returns their results.
@@ -223,6 +245,8 @@ class Jobs(Base):
         :param remote: run the job remotely
         :param check_api_keys: check if the API keys are valid
         :batch_mode: run the job in batch mode i.e., no expecation of interaction with the user
+        :param max_concurrency: the maximum number of interviews conducted at the same time
+        :param workers: the number of processes that conduct the interviews; each one gets an equal share of the rate limits
 
         """
         self.remote = remote
@@ -251,12 +275,21 @@ class Jobs(Base):
             stop_on_exception=stop_on_exception,
             sidecar_model=sidecar_model,
             batch_mode=batch_mode,
+            max_concurrency=max_concurrency,
+            workers=workers,
         )
 
         return results
 
-    def _run_local(self, *args, **kwargs):
-        """Run the job locally."""
+    def _run_local(self, *args, workers: int = 1, **kwargs):
+        """Run the job locally, in this process or, if `workers` > 1, in several processes."""
+        if workers < 1:
+            raise ValueError("workers must be a positive integer.")
+        if workers > 1:
+            from edsl.jobs.runners.JobsRunnerMultiprocess import JobsRunnerMultiprocess
+
+            return JobsRunnerMultiprocess(self).run(*args, workers=workers, **kwargs)
+
         from edsl.jobs.runners.JobsRunnerAsyncio import JobsRunnerAsyncio
 
         results = JobsRunnerAsyncio(self).run(*args, **kwargs)
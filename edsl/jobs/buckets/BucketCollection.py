@@ -8,10 +8,13 @@ class BucketCollection(UserDict):
 
     The keys here are the models, and the values are the ModelBuckets objects.
     Models themselves are hashable, so this works.
+
+    :param share: the fraction of each model's rate limits that the buckets use, e.g., when several processes share them.
     """
 
-    def __init__(self):
+    def __init__(self, share: float = 1.0):
         super().__init__()
+        self.share = share
 
     def __repr__(self):
         return f"BucketCollection({self.data})"
@@ -21,8 +24,8 @@ class BucketCollection(UserDict):
 
         This will create the token and request buckets for the model."""
         # compute the TPS and RPS from the model
-        TPS = model.TPM / 60.0
-        RPS = model.RPM / 60.0
+        TPS = self.share * model.TPM / 60.0
+        RPS = self.share * model.RPM / 60.0
         # create the buckets
         requests_bucket = TokenBucket(
             bucket_name=model.model,
@@ -34,12 +37,20 @@ class BucketCollection(UserDict):
             bucket_name=model.model, bucket_type="tokens", capacity=TPS, refill_rate=TPS
         )
         model_buckets = ModelBuckets(requests_bucket, tokens_bucket)
+        model.add_rate_limit_listener(self)
         if model in self:
             # it if already exists, combine the buckets
             self[model] += model_buckets
         else:
             self[model] = model_buckets
 
+    def update_rate_limits(self, model: "LanguageModel", rate_limits: dict) -> None:
+        """Update the buckets of a model with the rate limits reported by its service."""
+        if model in self:
+            self[model].update_rate_limits(
+                rate_limits, model._safety_factor, share=self.share
+            )
+
     def visualize(self) -> dict:
         """Visualize the token and request buckets for each model."""
         plots = {}
@@ -1,5 +1,8 @@
 from edsl.jobs.buckets.TokenBucket import TokenBucket
 
+# The services report their rate limits per minute, and the buckets work per second
+SECONDS_PER_MINUTE = 60.0
+
 
 class ModelBuckets:
     """A class to represent the token and request buckets for a model.
@@ -25,6 +28,52 @@ class ModelBuckets:
             tokens_bucket=self.tokens_bucket + other.tokens_bucket,
         )
 
+    def update_rate_limits(
+        self, rate_limits: dict, safety_factor: float = 1.0, share: float = 1.0
+    ) -> None:
+        """Update the buckets with the rate limits reported by the service.
+
+        :param rate_limits: the rate limits, as returned by `parse_rate_limit_headers`.
+        :param safety_factor: the fraction of the reported limits that is used.
+        :param share: the fraction of the limits that belongs to these buckets, e.g., when several processes share them.
+
+        The units differ: the services report a `limit` per minute, while the buckets work per second,
+        so their capacity and refill rate are the limit divided by 60. The `remaining` capacity is a number
+        of requests or tokens, not a rate: less the reserve held back by the safety factor,
+        it caps the number of tokens the bucket holds now.
+        If it is used up, the bucket waits until the limit resets, in `reset` seconds.
+
+        >>> buckets = ModelBuckets.infinity_bucket()
+        >>> buckets.update_rate_limits({"tokens": {"limit": 150_000, "remaining": 149_984, "reset": 0.006}}, 0.8)
+        >>> buckets.tokens_bucket.capacity, buckets.tokens_bucket.tokens
+        (2000.0, 2000.0)
+        >>> buckets.update_rate_limits({"tokens": {"limit": 150_000, "remaining": 30_500, "reset": 47.6}}, 0.8)
+        >>> round(buckets.tokens_bucket.tokens)
+        500
+        """
+        for kind, bucket in [
+            ("requests", self.requests_bucket),
+            ("tokens", self.tokens_bucket),
+        ]:
+            if kind not in rate_limits:
+                continue
+            limit_per_minute = share * rate_limits[kind]["limit"]
+            remaining = share * rate_limits[kind]["remaining"]
+            reset = rate_limits[kind]["reset"]
+            limit_per_second = safety_factor * limit_per_minute / SECONDS_PER_MINUTE
+            if limit_per_second <= 0:
+                continue
+            # requests or tokens that can be used now, keeping the reserve
+            available = remaining - (1 - safety_factor) * limit_per_minute
+            if available <= 0 and reset:
+                # a debt that takes `reset` seconds to refill
+                available = -reset * limit_per_second
+            bucket.update_rate_limit(
+                capacity=limit_per_second,
+                refill_rate=limit_per_second,
+                available=available,
+            )
+
     @classmethod
     def infinity_bucket(cls, model_name: str = "not_specified") -> "ModelBuckets":
         """Create a bucket with infinite capacity and refill rate."""
@@ -1,12 +1,19 @@
-from typing import Union, List, Any
+from typing import Union, List, Any, Deque, Tuple, Optional
 import asyncio
 import time
-from collections import UserDict
+from collections import UserDict, deque
 from matplotlib import pyplot as plt
 
+from edsl.jobs.buckets.TokenBucketLog import TokenBucketLog
+
 
 class TokenBucket:
-    """This is a token bucket used to respect rate limits to services."""
+    """This is a token bucket used to respect rate limits to services.
+
+    Requests that cannot be served right away wait in a first-in, first-out queue.
+    Rather than polling, the bucket computes when the request at the head of the queue
+    can be served and schedules a single wake-up for that moment.
+    """
 
     def __init__(
         self,
@@ -15,7 +22,16 @@ class TokenBucket:
         bucket_type: str,
         capacity: Union[int, float],
         refill_rate: Union[int, float],
+        log_max_samples: int = 1_000,
+        log_resolution: float = 0.1,
     ):
+        """Initialize the token bucket.
+
+        :param capacity: the maximum number of tokens.
+        :param refill_rate: the number of tokens added per second.
+        :param log_max_samples: the maximum number of samples kept in the usage log.
+        :param log_resolution: the initial minimum number of seconds between two samples in the usage log.
+        """
         self.bucket_name = bucket_name
         self.bucket_type = bucket_type
         self.capacity = capacity  # Maximum number of tokens
@@ -23,7 +39,14 @@ class TokenBucket:
         self.refill_rate = refill_rate  # Rate at which tokens are refilled
         self.last_refill = time.monotonic()  # Last refill time
 
-        self.log: List[Any] = []
+        self.log = TokenBucketLog(
+            max_samples=log_max_samples, resolution=log_resolution
+        )
+
+        # (amount, future) for each request waiting for tokens, in order of arrival
+        self._waiters: Deque[Tuple[Union[int, float], asyncio.Future]] = deque()
+        self._queued_tokens: Union[int, float] = 0
+        self._wakeup_handle: Optional[asyncio.TimerHandle] = None
 
     def __add__(self, other) -> "TokenBucket":
         """Combine two token buckets.
@@ -36,15 +59,50 @@ class TokenBucket:
             bucket_type=self.bucket_type,
             capacity=min(self.capacity, other.capacity),
             refill_rate=min(self.refill_rate, other.refill_rate),
+            log_max_samples=self.log.max_samples,
+            log_resolution=self.log.resolution,
         )
 
     def __repr__(self):
         return f"TokenBucket(bucket_name={self.bucket_name}, bucket_type='{self.bucket_type}', capacity={self.capacity}, refill_rate={self.refill_rate})"
 
     def add_tokens(self, tokens: Union[int, float]) -> None:
-        """Add tokens to the bucket, up to the maximum capacity."""
+        """Add tokens to the bucket, up to the maximum capacity.
+
+        If requests are waiting, the ones that can now be served are released.
+        """
         self.tokens = min(self.capacity, self.tokens + tokens)
-        self.log.append((time.monotonic(), self.tokens))
+        self.log.append(time.monotonic(), self.tokens)
+        if self._waiters:
+            self._release_waiters()
+
+    def update_rate_limit(
+        self,
+        *,
+        capacity: Union[int, float],
+        refill_rate: Union[int, float],
+        available: Optional[Union[int, float]] = None,
+    ) -> None:
+        """Change the capacity and refill rate of the bucket, e.g., to follow the limits reported by a service.
+
+        :param capacity: the new maximum number of tokens.
+        :param refill_rate: the new number of tokens added per second.
+        :param available: if given, the bucket holds at most this many tokens afterwards; it can be negative to delay requests.
+
+        >>> bucket = TokenBucket(bucket_name="test", bucket_type="requests", capacity=10, refill_rate=1)
+        >>> bucket.update_rate_limit(capacity=5, refill_rate=2, available=3)
+        >>> bucket.capacity, bucket.refill_rate, round(bucket.tokens)
+        (5, 2, 3)
+        """
+        self.refill()
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = min(self.tokens, capacity)
+        if available is not None:
+            self.tokens = min(self.tokens, available)
+        self.log.append(self.last_refill, self.tokens)
+        if self._waiters:
+            self._release_waiters()
 
     def refill(self) -> None:
         """Refill the bucket with new tokens based on elapsed time."""
@@ -54,39 +112,114 @@ class TokenBucket:
         self.tokens = min(self.capacity, self.tokens + refill_amount)
         self.last_refill = now
 
-        self.log.append((now, self.tokens))
+        self.log.append(now, self.tokens)
 
-    def wait_time(self, requested_tokens: Union[float, int]) -> float:
-        """Calculate the time to wait for the requested number of tokens."""
+    def _time_until_available(self, requested_tokens: Union[float, int]) -> float:
+        """Calculate the time until the bucket holds the requested number of tokens."""
         now = time.monotonic()
         elapsed = now - self.last_refill
         refill_amount = elapsed * self.refill_rate
         available_tokens = min(self.capacity, self.tokens + refill_amount)
         return max(0, requested_tokens - available_tokens) / self.refill_rate
 
+    def wait_time(self, requested_tokens: Union[float, int]) -> float:
+        """Calculate the time to wait for the requested number of tokens.
+
+        Requests already waiting in the queue are served first, so their tokens are included.
+        """
+        return self._time_until_available(requested_tokens + self._queued_tokens)
+
+    def _release_waiters(self) -> None:
+        """Serve the waiting requests, in order, for as long as there are enough tokens.
+
+        If a request is still waiting afterwards, a wake-up is scheduled for the moment
+        the bucket will hold enough tokens to serve the request at the head of the queue.
+        """
+        if self._wakeup_handle is not None:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+
+        self.refill()
+        while self._waiters:
+            amount, future = self._waiters[0]
+            if future.done():  # the waiting task was cancelled
+                self._pop_waiter()
+                continue
+            # the capacity can shrink after a request was queued
+            if self.tokens < min(amount, self.capacity):
+                break
+            self.tokens -= amount
+            self._pop_waiter()
+            future.set_result(None)
+
+        if self._waiters:
+            amount, future = self._waiters[0]
+            self._wakeup_handle = future.get_loop().call_later(
+                self._time_until_available(min(amount, self.capacity)),
+                self._release_waiters,
+            )
+
+    def _pop_waiter(self) -> None:
+        """Remove the request at the head of the queue."""
+        amount, _ = self._waiters.popleft()
+        self._queued_tokens -= amount
+
+    def _remove_waiter(self, amount: Union[int, float], future: asyncio.Future) -> None:
+        """Remove a cancelled request from the queue, wherever it is."""
+        was_at_head = bool(self._waiters) and self._waiters[0][1] is future
+        try:
+            self._waiters.remove((amount, future))
+        except ValueError:  # it was already dropped from the head of the queue
+            return
+        self._queued_tokens -= amount
+        if was_at_head:
+            # let the next request in line take its place
+            self._release_waiters()
+
     async def get_tokens(self, amount: Union[int, float] = 1, warn=True) -> None:
         """Wait for the specified number of tokens to become available.
         Note that this method is a coroutine.
+
+        Requests are served in the order in which they arrive.
         """
         if amount > self.capacity:
             msg = f"Requested amount exceeds bucket capacity. Bucket capacity: {self.capacity}, requested amount: {amount}. As the bucket never overflows, the requested amount will never be available."
             raise ValueError(msg)
-        while self.tokens < amount:
-            self.refill()
-            await asyncio.sleep(0.1)  # Sleep briefly to prevent busy waiting
-        self.tokens -= amount
+
+        self.refill()
+        if not self._waiters and self.tokens >= amount:
+            self.tokens -= amount
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((amount, future))
+            self._queued_tokens += amount
+            if len(self._waiters) == 1:
+                self._release_waiters()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the tokens were handed over just as the task was cancelled
+                    self.add_tokens(amount)
+                else:
+                    self._remove_waiter(amount, future)
+                raise
 
         now = time.monotonic()
-        self.log.append((now, self.tokens))
+        self.log.append(now, self.tokens)
 
     def get_log(self) -> list[tuple]:
-        return self.log
+        """Return the usage log as a list of (time, tokens) tuples."""
+        return list(self.log)
 
     def visualize(self):
         """Visualize the token bucket over time."""
-        times, tokens = zip(*self.get_log())
-        start_time = times[0]
-        times = [t - start_time for t in times]  # Normalize time to start from 0
+        if len(self.log) == 0:
+            raise ValueError(
+                "The bucket has not been used yet, so there is nothing to plot."
+            )
+        tokens = self.log.tokens
+        times = self.log.times - self.log.times[0]  # Normalize time to start from 0
 
         plt.figure(figsize=(10, 6))
         plt.plot(times, tokens, label="Tokens Available")
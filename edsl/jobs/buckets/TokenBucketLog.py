@@ -0,0 +1,81 @@
+from typing import Generator, Tuple
+import numpy as np
+
+
+class TokenBucketLog:
+    """A bounded, downsampled time series of the tokens available in a TokenBucket.
+
+    Samples that are less than `resolution` seconds apart are collapsed into one, which holds the latest value.
+    When the buffer is full, every other sample is dropped and the resolution is doubled.
+    The log therefore always spans the whole run, in at most `max_samples` samples.
+
+    >>> log = TokenBucketLog(max_samples=4, resolution=1.0)
+    >>> for t in range(10):
+    ...     log.append(float(t), 10.0 - t)
+    >>> len(log) <= 4
+    True
+    >>> log.resolution
+    4.0
+    >>> log.times[0], log.tokens[-1]
+    (0.0, 1.0)
+    """
+
+    def __init__(self, max_samples: int = 1_000, resolution: float = 0.1):
+        """Initialize the log.
+
+        :param max_samples: the maximum number of samples held in memory.
+        :param resolution: the minimum number of seconds between two samples, to begin with.
+        """
+        if max_samples < 2:
+            raise ValueError("max_samples must be at least 2.")
+        if resolution < 0:
+            raise ValueError("resolution cannot be negative.")
+        self.max_samples = max_samples
+        self.resolution = resolution
+        self._times = np.empty(max_samples, dtype=np.float64)
+        self._tokens = np.empty(max_samples, dtype=np.float64)
+        self._size = 0
+
+    def append(self, time: float, tokens: float) -> None:
+        """Record the number of tokens available at a point in time."""
+        if self._size and time - self._times[self._size - 1] < self.resolution:
+            self._tokens[self._size - 1] = tokens
+            return
+        if self._size == self.max_samples:
+            self._downsample()
+        self._times[self._size] = time
+        self._tokens[self._size] = tokens
+        self._size += 1
+
+    def _downsample(self) -> None:
+        """Halve the number of samples held and double the resolution."""
+        kept = (self._size + 1) // 2
+        self._times[:kept] = self._times[: self._size : 2]
+        self._tokens[:kept] = self._tokens[: self._size : 2]
+        self._size = kept
+        self.resolution = max(2 * self.resolution, self._min_spacing())
+
+    def _min_spacing(self) -> float:
+        """Return the smallest gap between two consecutive samples."""
+        if self._size < 2:
+            return 0.0
+        return float(np.diff(self.times).min())
+
+    @property
+    def times(self) -> np.ndarray:
+        """Return the sample times, in seconds."""
+        return self._times[: self._size]
+
+    @property
+    def tokens(self) -> np.ndarray:
+        """Return the number of tokens available at each sample time."""
+        return self._tokens[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Generator[Tuple[float, float], None, None]:
+        return zip(self.times.tolist(), self.tokens.tolist())
+
+    def __repr__(self) -> str:
+        return f"TokenBucketLog(max_samples={self.max_samples}, resolution={self.resolution}, samples={self._size})"
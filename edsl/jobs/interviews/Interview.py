@@ -59,6 +59,7 @@ class Interview(InterviewStatusMixin, InterviewTaskBuildingMixin):
         self.debug = debug
         self.iteration = iteration
         self.cache = cache
+        self.sidecar_model = sidecar_model
         # will get filled in as interview progresses
         self.answers: dict[str, str] = Answers()
 
@@ -66,6 +67,8 @@ class Interview(InterviewStatusMixin, InterviewTaskBuildingMixin):
         self.task_creators = TaskCreators()  # tracks the task creators
         self.exceptions = InterviewExceptionCollection()
         self._task_status_log_dict = InterviewStatusLog()
+        # the invigilators, by question name and debug flag
+        self._invigilators = {}
 
         # dictionary mapping question names to their index in the survey."""
         self.to_index = {
@@ -96,6 +99,9 @@ class Interview(InterviewStatusMixin, InterviewTaskBuildingMixin):
         'yes'
 
         """
+        if sidecar_model is not self.sidecar_model:
+            # the invigilators depend on the sidecar model
+            self._invigilators.clear()
         self.sidecar_model = sidecar_model
         # if no model bucket is passed, create an 'infinity' bucket with no rate limits
         model_buckets = model_buckets or ModelBuckets.infinity_bucket()
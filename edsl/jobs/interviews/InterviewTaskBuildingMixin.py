@@ -28,7 +28,12 @@ class InterviewTaskBuildingMixin:
             yield self.get_invigilator(question=question, debug=debug)
 
     def get_invigilator(self, question: QuestionBase, debug: bool) -> "Invigilator":
-        """Return an invigilator for the given question."""
+        """Return an invigilator for the given question.
+
+        The invigilator is created once per question, so its prompts are only rendered once.
+        """
+        if (question.question_name, debug) in self._invigilators:
+            return self._invigilators[(question.question_name, debug)]
         invigilator = self.agent.create_invigilator(
             question=question,
             scenario=self.scenario,
@@ -40,9 +45,24 @@ class InterviewTaskBuildingMixin:
             cache=self.cache,
             sidecar_model=self.sidecar_model,
         )
-        """Return an invigilator for the given question."""
+        self._invigilators[(question.question_name, debug)] = invigilator
         return invigilator
 
+    def get_prefetchable_cache_keys(
+        self, debug: bool = False
+    ) -> Generator[str, None, None]:
+        """Yield the cache keys of the model calls for the questions that do not depend on other questions.
+
+        The prompts of these questions are known before the interview starts, so their responses can be fetched ahead of time.
+        """
+        dag = self.dag
+        for question in self.survey.questions:
+            if dag.get(question.question_name):
+                continue
+            key = self.get_invigilator(question=question, debug=debug).get_cache_key()
+            if key is not None:
+                yield key
+
     @property
     def dag(self) -> "DAG":
         """Return the directed acyclic graph for the survey.
@@ -112,6 +132,7 @@ class InterviewTaskBuildingMixin:
             token_estimator=self._get_estimated_request_tokens,
             model_buckets=model_buckets,
             iteration=iteration,
+            invigilator=self.get_invigilator(question=question, debug=debug),
         )
         for task in tasks_that_must_be_completed_before:
             task_creator.add_dependency(task)
@@ -121,9 +142,18 @@ class InterviewTaskBuildingMixin:
         )  # track this task creator
         return task_creator.generate_task(debug)
 
+    def _get_task_invigilator(
+        self, question: QuestionBase, debug: bool = False
+    ) -> "Invigilator":
+        """Return the invigilator of the task for the question, so its prompts are only rendered once."""
+        task_creator = self.task_creators.get(question.question_name)
+        if task_creator is not None and task_creator.invigilator is not None:
+            return task_creator.invigilator
+        return self.get_invigilator(question=question, debug=debug)
+
     def _get_estimated_request_tokens(self, question) -> float:
         """Estimate the number of tokens that will be required to run the focal task."""
-        invigilator = self.get_invigilator(question=question, debug=False)
+        invigilator = self._get_task_invigilator(question)
         # TODO: There should be a way to get a more accurate estimate.
         combined_text = ""
         for prompt in invigilator.get_prompts().values():
@@ -148,7 +178,10 @@ class InterviewTaskBuildingMixin:
         This in turn calls the the passed-in agent's async_answer_question method, which returns a response dictionary.
         Note that is updates answers with the response.
         """
-        invigilator = self.get_invigilator(question, debug=debug)
+        if task is not None and task.invigilator is not None:
+            invigilator = task.invigilator
+        else:
+            invigilator = self._get_task_invigilator(question, debug=debug)
 
         async def attempt_to_answer_question(invigilator):
             try:
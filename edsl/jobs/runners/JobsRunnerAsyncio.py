@@ -1,7 +1,18 @@
 import time
 import asyncio
 import textwrap
-from typing import Coroutine, List, AsyncGenerator
+from collections import defaultdict
+from itertools import islice
+from typing import (
+    Coroutine,
+    Dict,
+    Iterator,
+    List,
+    AsyncGenerator,
+    Generator,
+    Optional,
+    Tuple,
+)
 
 from rich.live import Live
 from rich.console import Console
@@ -14,30 +25,77 @@ from edsl.utilities.decorators import jupyter_nb_handler
 from edsl.jobs.Jobs import Jobs
 from edsl.utilities.utilities import is_notebook
 from edsl.jobs.runners.JobsRunnerStatusMixin import JobsRunnerStatusMixin
+from edsl.jobs.runners.JobsRunnerStatusData import InterviewTokenUsageMapping
+from edsl.jobs.tokens.InterviewTokenUsage import InterviewTokenUsage
 
 from edsl.data.Cache import Cache
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
 
 from edsl.jobs.tasks.TaskHistory import TaskHistory
 
 
+# The default number of interviews that are conducted concurrently
+MAX_CONCURRENT_INTERVIEWS = 1_000
+# The number of interviews whose cached responses are fetched together, before they are conducted
+PREFETCH_BATCH_SIZE = 1_000
+
+
+class InterviewSummary:
+    """What the task history needs to know about a finished interview: its exceptions and the status logs of its tasks."""
+
+    def __init__(self, exceptions, task_status_logs):
+        self.exceptions = exceptions
+        self.task_status_logs = task_status_logs
+
+
+async def _iterate_async(iterable):
+    """Yield the items of an iterable from an asynchronous generator."""
+    for item in iterable:
+        yield item
+
+
 class JobsRunnerAsyncio(JobsRunnerStatusMixin):
+    """Runs the interviews of a job on an asyncio event loop.
+
+    Interviews are pulled lazily from the job and conducted by a bounded pool of workers,
+    so that at most `max_concurrency` interviews (and their tasks) are alive at any one time,
+    no matter how large the job is.
+    """
+
     def __init__(self, jobs: Jobs):
         self.jobs = jobs
-
-        self.interviews: List["Interview"] = jobs.interviews()
+        # this fills in the default agents, models and scenarios, if needed;
+        # the interviews themselves are created afresh on each run, see `_populate_interviews`
+        jobs._create_interviews()
         self.bucket_collection: "BucketCollection" = jobs.bucket_collection
-        self.total_interviews: List["Interview"] = []
+        self._reset_interview_tracking()
+
+    def _reset_interview_tracking(self, n: int = 1) -> None:
+        """Reset the bookkeeping used for the status table and the task history.
+
+        Once an interview finishes, only its token usage, its status counts, and a summary
+        for the task history, with its exceptions and the status logs of its tasks, are kept.
+        """
+        self.num_interviews_requested: int = self.jobs.num_interviews(n=n)
+        self.interviews_in_flight: Dict[int, "Interview"] = {}
+        self.interview_summaries: Dict[int, InterviewSummary] = {}
+        # the keys of the cached responses prefetched for each interview that has not finished yet
+        self.prefetched_keys: Dict[int, List[str]] = {}
+        self.completed_token_usage: InterviewTokenUsageMapping = defaultdict(
+            InterviewTokenUsage
+        )
+
+    def _populate_interviews(self, n: int = 1) -> Generator["Interview", None, None]:
+        """Yield n copies of each interview of the job, lazily.
 
-    def populate_total_interviews(self, n=1) -> None:
-        """Populates self.total_interviews with n copies of each interview.
+        The interviews are created on each call, so a runner can be run more than once.
 
         :param n: how many times to run each interview.
         """
-        self.total_interviews = []
-        for interview in self.interviews:
+        for interview in self.jobs._create_interviews():
             for iteration in range(n):
                 if iteration > 0:
-                    new_interview = Interview(
+                    yield Interview(
                         agent=interview.agent,
                         survey=interview.survey,
                         scenario=interview.scenario,
@@ -46,10 +104,43 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
                         iteration=iteration,
                         cache=self.cache,
                     )
-                    self.total_interviews.append(new_interview)
                 else:
                     interview.cache = self.cache
-                    self.total_interviews.append(interview)
+                    yield interview
+
+    async def _prefetch_cached_responses(
+        self,
+        interviews: Iterator[Tuple[int, "Interview"]],
+        debug: bool = False,
+    ) -> AsyncGenerator[Tuple[int, "Interview"], None]:
+        """Yield the interviews, after loading the cached responses to their questions without dependencies.
+
+        The interviews are taken in batches of `PREFETCH_BATCH_SIZE`, and the responses of each batch are
+        fetched in a few queries, instead of one query per question. Questions whose responses are prefetched
+        are answered without reading the database or waiting for rate-limit capacity.
+        The responses of an interview that are not fetched, e.g., because their questions are skipped,
+        are released when the interview finishes, so only those of the interviews in the pipeline are held.
+        The responses are awaited, so a remote cache does not block the event loop, see `Cache.async_prefetch`.
+        """
+        while batch := list(islice(interviews, PREFETCH_BATCH_SIZE)):
+            for index, interview in batch:
+                self.prefetched_keys[index] = list(
+                    interview.get_prefetchable_cache_keys(debug=debug)
+                )
+            await self.cache.async_prefetch(
+                key for index, _ in batch for key in self.prefetched_keys[index]
+            )
+            for item in batch:
+                yield item
+
+    def _record_completed_interview(self, index: int, interview: "Interview") -> None:
+        """Fold a finished interview into the running totals and let go of it."""
+        self.interviews_in_flight.pop(index, None)
+        self.cache.release(self.prefetched_keys.pop(index, []))
+        self.completed_token_usage[interview.model] += interview.token_usage
+        self.interview_summaries[index] = InterviewSummary(
+            interview.exceptions, interview.task_status_logs
+        )
 
     async def run_async(
         self,
@@ -58,33 +149,118 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
         debug: bool = False,
         stop_on_exception: bool = False,
         sidecar_model=None,
+        max_concurrency: Optional[int] = None,
     ) -> AsyncGenerator[Result, None]:
-        """Creates the tasks, runs them asynchronously, and returns the results as a Results object.
+        """Conducts the interviews with a pool of workers and yields the results as they are completed.
 
-        Completed tasks are yielded as they are completed.
+        Each worker pulls the next interview from a shared, lazy iterator, so the number of
+        live interviews never exceeds `max_concurrency`.
 
         :param n: how many times to run each interview
         :param debug:
         :param stop_on_exception:
+        :param max_concurrency: the maximum number of interviews conducted at the same time
         """
-        tasks = []
-        self.populate_total_interviews(
-            n=n
-        )  # Populate self.total_interviews before creating tasks
-
-        for interview in self.total_interviews:
-            interviewing_task = self._interview_task(
-                interview=interview,
-                debug=debug,
-                stop_on_exception=stop_on_exception,
-                sidecar_model=sidecar_model,
-            )
-            tasks.append(asyncio.create_task(interviewing_task))
-
-        for task in asyncio.as_completed(tasks):
-            result = await task
+        async for _, result in self._conduct_interviews(
+            cache=cache,
+            n=n,
+            debug=debug,
+            stop_on_exception=stop_on_exception,
+            sidecar_model=sidecar_model,
+            max_concurrency=max_concurrency,
+        ):
             yield result
 
+    async def _conduct_interviews(
+        self,
+        *,
+        cache,
+        n: int = 1,
+        debug: bool = False,
+        stop_on_exception: bool = False,
+        sidecar_model=None,
+        max_concurrency: Optional[int] = None,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> AsyncGenerator[Tuple[int, Result], None]:
+        """Conducts the interviews and yields (index, result) pairs as they are completed.
+
+        The index is the position of the interview in the job.
+
+        :param shard: (shard, number of shards); if given, only the interviews whose index modulo the number of shards is `shard` are conducted.
+        """
+        self.cache = cache
+        self._reset_interview_tracking(n=n)
+        max_concurrency = max_concurrency or MAX_CONCURRENT_INTERVIEWS
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer.")
+
+        # a single iterator is shared by all the workers
+        interviews = enumerate(self._populate_interviews(n=n))
+        if shard is not None:
+            shard_index, num_shards = shard
+            interviews = (
+                (index, interview)
+                for index, interview in interviews
+                if index % num_shards == shard_index
+            )
+        if sidecar_model is None:
+            interviews = self._prefetch_cached_responses(interviews, debug=debug)
+        else:
+            interviews = _iterate_async(interviews)
+        # the workers take turns with the iterator, which may be waiting for prefetched responses
+        interviews_lock = asyncio.Lock()
+        completed_results: asyncio.Queue = asyncio.Queue()
+        end_of_results = object()
+
+        async def next_interview() -> Optional[Tuple[int, Interview]]:
+            """Return the next (index, interview) pair, or None if there are none left."""
+            async with interviews_lock:
+                try:
+                    return await interviews.__anext__()
+                except StopAsyncIteration:
+                    return None
+
+        async def worker() -> None:
+            """Conduct interviews, one at a time, until there are none left."""
+            while (item := await next_interview()) is not None:
+                index, interview = item
+                self.interviews_in_flight[index] = interview
+                try:
+                    result = await self._interview_task(
+                        interview=interview,
+                        debug=debug,
+                        stop_on_exception=stop_on_exception,
+                        sidecar_model=sidecar_model,
+                    )
+                finally:
+                    self._record_completed_interview(index, interview)
+                await completed_results.put((index, result))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max_concurrency, self.num_interviews_requested))
+        ]
+
+        async def wait_for_workers() -> None:
+            """Signal the end of the results once every worker is done, or one has failed."""
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                await completed_results.put(end_of_results)
+
+        workers_done = asyncio.create_task(wait_for_workers())
+        try:
+            while (item := await completed_results.get()) is not end_of_results:
+                yield item
+            # re-raises the exception if a worker failed
+            await workers_done
+        finally:
+            for task in workers + [workers_done]:
+                task.cancel()
+            # responses prefetched for interviews that were not conducted, if the run stopped early
+            self.cache.prefetched.clear()
+            self.prefetched_keys.clear()
+
     async def _interview_task(
         self,
         *,
@@ -165,6 +341,7 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
         progress_bar=False,
         sidecar_model=None,
         batch_mode=False,
+        max_concurrency: Optional[int] = None,
     ) -> "Coroutine":
         """Runs a collection of interviews, handling both async and sync contexts."""
         console = Console()
@@ -173,6 +350,7 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
         self.completed = False
         self.cache = cache
         self.sidecar_model = sidecar_model
+        self._reset_interview_tracking(n=n)
 
         def generate_table():
             return self.status_table(self.results, self.elapsed_time)
@@ -195,8 +373,8 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
             else no_op_cm()
         )
 
-        with cache as c:
-            with progress_bar_context as live:
+        with cache as c, progress_bar_context as live:
+            async with CLIENT_REGISTRY:
 
                 async def update_progress_bar():
                     """Updates the progress bar at fixed intervals."""
@@ -214,6 +392,7 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
                         stop_on_exception=stop_on_exception,
                         cache=c,
                         sidecar_model=sidecar_model,
+                        max_concurrency=max_concurrency,
                     ):
                         self.results.append(result)
                         live.update(generate_table())
@@ -235,9 +414,15 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
                     # one more update
                     live.update(generate_table())
 
+        return self._build_results(batch_mode=batch_mode)
+
+    def _build_results(self, batch_mode: bool = False) -> Results:
+        """Put the results and the task history together, and report the exceptions, if any."""
         results = Results(survey=self.jobs.survey, data=self.results)
+        indices = sorted(self.interview_summaries)
+        summaries = [self.interview_summaries[index] for index in indices]
         results.task_history = TaskHistory(
-            self.total_interviews, include_traceback=False
+            summaries, include_traceback=False, indices=indices
         )
 
         if results.task_history.has_exceptions and not batch_mode:
@@ -265,7 +450,7 @@ class JobsRunnerAsyncio(JobsRunnerStatusMixin):
                     from edsl.jobs.interviews.ReportErrors import ReportErrors
 
                     full_task_history = TaskHistory(
-                        self.total_interviews, include_traceback=True
+                        summaries, include_traceback=True, indices=indices
                     )
                     report = ReportErrors(full_task_history)
                     upload = input(
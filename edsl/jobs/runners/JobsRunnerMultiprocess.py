@@ -0,0 +1,177 @@
+"""Runs the interviews of a job in several processes, each with its own event loop."""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+
+from edsl.data.Cache import Cache
+from edsl.data.CacheEntry import CacheEntry
+from edsl.data.SQLiteDict import SQLiteDict
+from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
+from edsl.jobs.Jobs import Jobs
+from edsl.jobs.runners.JobsRunnerAsyncio import InterviewSummary, JobsRunnerAsyncio
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
+from edsl.results import Result
+
+# What the worker processes need to run their shard; set just before they are forked
+_shard_context: Optional[Dict[str, Any]] = None
+
+
+def _run_shard(shard: int, num_shards: int) -> dict:
+    """Conduct the interviews of one shard of the job, in a worker process.
+
+    The job, the cache and the run options are inherited from the parent process when it forks.
+    Only picklable data goes back: the answers, the new cache entries, and the summaries of the interviews.
+    """
+    jobs: Jobs = _shard_context["jobs"]
+    cache: Cache = _shard_context["cache"]
+    run_options: dict = _shard_context["run_options"]
+
+    if isinstance(cache.data, ShardedSQLiteDict):
+        # the shards take concurrent writers, so new entries are written here too
+        shard_cache = Cache(
+            data=ShardedSQLiteDict(cache.data.db_path, num_shards=cache.data.num_shards)
+        )
+    elif isinstance(cache.data, SQLiteDict):
+        # the parent is the only writer, so new entries are sent back rather than written
+        shard_cache = Cache(data=SQLiteDict(cache.data.db_path), immediate_write=False)
+    else:
+        shard_cache = Cache(data=cache.data)
+
+    runner = JobsRunnerAsyncio(jobs)
+    runner.bucket_collection = jobs.create_bucket_collection(share=1 / num_shards)
+
+    async def conduct_interviews() -> List[Tuple[int, Result]]:
+        async with CLIENT_REGISTRY:
+            return [
+                item
+                async for item in runner._conduct_interviews(
+                    cache=shard_cache, shard=(shard, num_shards), **run_options
+                )
+            ]
+
+    results = asyncio.run(conduct_interviews())
+    if isinstance(shard_cache.data, ShardedSQLiteDict):
+        shard_cache.data.close()
+    return {
+        "results": [
+            (index, result["answer"], result["prompt"], result["raw_model_response"])
+            for index, result in results
+        ],
+        "interview_summaries": [
+            (index, summary.exceptions, summary.task_status_logs)
+            for index, summary in runner.interview_summaries.items()
+        ],
+        "cache_entries": {
+            key: entry.to_dict() for key, entry in shard_cache.new_entries.items()
+        },
+    }
+
+
+class JobsRunnerMultiprocess(JobsRunnerAsyncio):
+    """Runs the interviews of a job in several worker processes.
+
+    Prompt rendering, parsing, and answer validation use the CPU, so a single event loop
+    spends much of its time on them instead of on network I/O.
+    Here, the interviews are split into `workers` shards: interview i goes to shard i % workers.
+    Each worker process conducts its shard on its own event loop, with an equal share of the rate limits.
+
+    The workers are forked, so the job's agents, models and scenarios do not have to be picklable.
+    The results and the task history are put back in the order in which the interviews were submitted.
+    New cache entries are sent back and written by this process only,
+    unless the cache is a ShardedSQLiteDict, which the workers write to directly.
+    There is no live progress bar in this mode.
+    """
+
+    def run(
+        self,
+        cache: Cache,
+        n: int = 1,
+        debug: bool = False,
+        stop_on_exception: bool = False,
+        progress_bar: bool = False,
+        sidecar_model=None,
+        batch_mode: bool = False,
+        max_concurrency: Optional[int] = None,
+        workers: int = 2,
+    ):
+        """Run the interviews of the job in `workers` processes and return the results."""
+        global _shard_context
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError(
+                "Running a job with workers > 1 requires the 'fork' start method."
+            )
+
+        self.start_time = time.monotonic()
+        self.cache = cache
+        self._reset_interview_tracking(n=n)
+
+        with cache as c:
+            if isinstance(c.data, (SQLiteDict, ShardedSQLiteDict)):
+                # the workers read the database, so they must see every entry
+                c.data.flush()
+            _shard_context = {
+                "jobs": self.jobs,
+                "cache": c,
+                "run_options": {
+                    "n": n,
+                    "debug": debug,
+                    "stop_on_exception": stop_on_exception,
+                    "sidecar_model": sidecar_model,
+                    "max_concurrency": max_concurrency,
+                },
+            }
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                ) as executor:
+                    shard_outputs = list(
+                        executor.map(_run_shard, range(workers), [workers] * workers)
+                    )
+            finally:
+                _shard_context = None
+
+            new_entries = {}
+            for output in shard_outputs:
+                for key, entry in output["cache_entries"].items():
+                    new_entries[key] = CacheEntry.from_dict(entry)
+            if isinstance(c.data, ShardedSQLiteDict):
+                # the workers wrote them already
+                c.new_entries.update(new_entries)
+            else:
+                c.add_from_dict(
+                    {k: v for k, v in new_entries.items() if k not in c.data}
+                )
+
+        interview_specs = list(
+            product(self.jobs.agents, self.jobs.scenarios, self.jobs.models)
+        )
+        shard_results = sorted(
+            (item for output in shard_outputs for item in output["results"]),
+            key=lambda item: item[0],
+        )
+        self.results = []
+        for index, answer, prompt, raw_model_response in shard_results:
+            agent, scenario, model = interview_specs[index // n]
+            self.results.append(
+                Result(
+                    agent=agent,
+                    scenario=scenario,
+                    model=model,
+                    iteration=index % n,
+                    answer=answer,
+                    prompt=prompt,
+                    raw_model_response=raw_model_response,
+                    survey=self.jobs.survey,
+                )
+            )
+        self.interview_summaries = {
+            index: InterviewSummary(exceptions, task_status_logs)
+            for output in shard_outputs
+            for index, exceptions, task_status_logs in output["interview_summaries"]
+        }
+        return self._build_results(batch_mode=batch_mode)
@@ -1,12 +1,13 @@
 import asyncio
 from enum import Enum
-from typing import Literal, List, Type, DefaultDict
+from typing import Literal, List, Type, DefaultDict, Optional
 from collections import UserDict, defaultdict
 
 from edsl.jobs.interviews.InterviewStatusDictionary import InterviewStatusDictionary
 from edsl.jobs.tokens.InterviewTokenUsage import InterviewTokenUsage
 from edsl.enums import pricing, TokenPricing
 from edsl.jobs.tasks.task_status_enum import TaskStatus
+from edsl.data.CacheStats import CacheStats, ModelCacheStats, LATENCY_BUCKETS
 
 InterviewTokenUsageMapping = DefaultDict[str, InterviewTokenUsage]
 
@@ -43,12 +44,18 @@ class JobsRunnerStatusData:
         completed_tasks: List[Type[asyncio.Task]],
         elapsed_time: float,
         interviews: List[Type["Interview"]],
+        num_interviews_requested: Optional[int] = None,
+        completed_token_usage: Optional[InterviewTokenUsageMapping] = None,
+        cache_stats: Optional[CacheStats] = None,
     ) -> InterviewStatisticsCollection:
         """Generate a summary of the status of the job runner.
 
         :param completed_tasks: list of completed tasks
         :param elapsed_time: time elapsed since the start of the job
-        :param interviews: list of interviews to be conducted
+        :param interviews: list of interviews to be conducted (or, when streaming, the ones in flight)
+        :param num_interviews_requested: the total number of interviews; defaults to the length of `interviews`
+        :param completed_token_usage: token usage of interviews that are no longer in `interviews`, keyed by model
+        :param cache_stats: the counts of the cache lookups and writes, shown for each model
         """
 
         models_to_tokens = defaultdict(InterviewTokenUsage)
@@ -58,12 +65,19 @@ class JobsRunnerStatusData:
 
         interview_statistics = InterviewStatisticsCollection()
 
+        for model, token_usage in (completed_token_usage or {}).items():
+            models_to_tokens[model] += token_usage
+            waiting_dict[model] += 0
+
         for interview in interviews:
             model = interview.model
             models_to_tokens[model] += interview.token_usage
             model_to_status[model] += interview.interview_status
             waiting_dict[model] += interview.interview_status.waiting
 
+        if num_interviews_requested is None:
+            num_interviews_requested = len(interviews)
+
         interview_statistics.add_stat(
             InterviewStatistic(
                 "elapsed_time", value=elapsed_time, digits=1, units="sec."
@@ -71,7 +85,7 @@ class JobsRunnerStatusData:
         )
         interview_statistics.add_stat(
             InterviewStatistic(
-                "total_interviews_requested", value=len(interviews), units=""
+                "total_interviews_requested", value=num_interviews_requested, units=""
             )
         )
         interview_statistics.add_stat(
@@ -82,8 +96,8 @@ class JobsRunnerStatusData:
         interview_statistics.add_stat(
             InterviewStatistic(
                 "percent_complete",
-                value=len(completed_tasks) / len(interviews) * 100
-                if len(interviews) > 0
+                value=len(completed_tasks) / num_interviews_requested * 100
+                if num_interviews_requested > 0
                 else "NA",
                 digits=0,
                 units="%",
@@ -99,10 +113,12 @@ class JobsRunnerStatusData:
         )
         interview_statistics.add_stat(
             InterviewStatistic(
-                "task_remaining", value=len(interviews) - len(completed_tasks), units=""
+                "task_remaining",
+                value=num_interviews_requested - len(completed_tasks),
+                units="",
             )
         )
-        number_remaining = len(interviews) - len(completed_tasks)
+        number_remaining = num_interviews_requested - len(completed_tasks)
         time_per_task = (
             elapsed_time / len(completed_tasks) if len(completed_tasks) > 0 else "NA"
         )
@@ -120,7 +136,9 @@ class JobsRunnerStatusData:
         )
         model_queues_info = []
         for model, num_waiting in waiting_dict.items():
-            model_info = self._get_model_info(model, num_waiting, models_to_tokens)
+            model_info = self._get_model_info(
+                model, num_waiting, models_to_tokens, cache_stats
+            )
             model_queues_info.append(model_info)
 
         interview_statistics["model_queues"] = model_queues_info
@@ -132,6 +150,7 @@ class JobsRunnerStatusData:
         model: str,
         num_waiting: int,
         models_to_tokens: InterviewTokenUsageMapping,
+        cache_stats: Optional[CacheStats] = None,
     ):
         """Get the status of a model."""
         if model.model not in self.pricing:
@@ -154,8 +173,36 @@ class JobsRunnerStatusData:
             )
             model_info["token_usage_info"].append(cache_info)
 
+        if cache_stats is not None:
+            model_info["cache_info"] = self._get_cache_info(cache_stats[model.model])
+
         return model_info
 
+    @staticmethod
+    def _get_cache_info(stats: ModelCacheStats) -> dict[str, str]:
+        """Get the cache lookups and writes of a model, formatted for the status table."""
+
+        def latency(seconds):
+            if seconds is None:
+                return "NA"
+            if seconds == LATENCY_BUCKETS[-1]:
+                return f">{LATENCY_BUCKETS[-2]:g} s"
+            return f"{seconds * 1000:.2f} ms"
+
+        return {
+            "hits": f"{stats.hits:,}",
+            "misses": f"{stats.misses:,}",
+            "hit rate": "NA" if stats.hit_rate is None else f"{stats.hit_rate:.0%}",
+            "stores": f"{stats.stores:,}",
+            "bytes read": f"{stats.bytes_read:,}",
+            "bytes written": f"{stats.bytes_written:,}",
+            "bytes stored": f"{stats.bytes_stored:,}",
+            "fetch latency (mean)": latency(stats.fetch_latency.mean),
+            "fetch latency (p95)": latency(stats.fetch_latency.quantile(0.95)),
+            "store latency (mean)": latency(stats.store_latency.mean),
+            "write latency (mean)": latency(stats.write_latency.mean),
+        }
+
     def _get_token_usage_info(
         self,
         cache_status: Literal["new_token_usage", "cached_token_usage"],
@@ -54,6 +54,10 @@ class JobsRunnerStatusPresentation:
                         #                 cost = detail["cost"]
                         table.add_row(spacing + f"{token_type}", f"{tokens:,}")
                     table.add_row(spacing + "cost", cache_info["cost"])
+                if "cache_info" in model_info:
+                    table.add_row(Text(spacing + "cache", style="bold"), "")
+                    for name, value in model_info["cache_info"].items():
+                        table.add_row(spacing + name, value)
 
         return table
 
@@ -72,6 +76,9 @@ class JobsRunnerStatusMixin(JobsRunnerStatusData, JobsRunnerStatusPresentation):
         summary_data = self.generate_status_summary(
             completed_tasks=completed_tasks,
             elapsed_time=elapsed_time,
-            interviews=self.total_interviews,
+            interviews=list(self.interviews_in_flight.values()),
+            num_interviews_requested=self.num_interviews_requested,
+            completed_token_usage=self.completed_token_usage,
+            cache_stats=getattr(getattr(self, "cache", None), "stats", None),
         )
         return self.display_status_table(summary_data)
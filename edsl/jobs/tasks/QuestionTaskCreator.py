@@ -1,5 +1,5 @@
 import asyncio
-from typing import Callable, Union, List
+from typing import Callable, Union, List, Optional
 from collections import UserList
 
 from edsl.jobs.buckets import ModelBuckets
@@ -35,11 +35,14 @@ class QuestionTaskCreator(UserList):
         model_buckets: ModelBuckets,
         token_estimator: Union[Callable, None] = None,
         iteration: int = 0,
+        invigilator: Optional["InvigilatorBase"] = None,
     ):
         super().__init__([])
         self.answer_question_func = answer_question_func
         self.question = question
         self.iteration = iteration
+        # the invigilator renders the prompts once, for both the token estimate and the model call
+        self.invigilator = invigilator
 
         self.model_buckets = model_buckets
         self.requests_bucket = self.model_buckets.requests_bucket
@@ -86,22 +89,35 @@ class QuestionTaskCreator(UserList):
             cached_tokens=self.cached_token_usage, new_tokens=self.new_token_usage
         )
 
+    def _response_is_prefetched(self) -> bool:
+        """Return True if the model's response to the question is already in memory."""
+        if self.invigilator is None or not getattr(
+            self.invigilator.cache, "prefetched", None
+        ):
+            return False
+        return self.invigilator.get_cache_key() in self.invigilator.cache.prefetched
+
     async def _run_focal_task(self, debug) -> Answers:
         """Runs the focal task i.e., the question that we are interested in answering.
         It is only called after all the dependency tasks are completed.
         """
 
-        requested_tokens = self.estimated_tokens()
-        if (estimated_wait_time := self.tokens_bucket.wait_time(requested_tokens)) > 0:
-            self.task_status = TaskStatus.WAITING_FOR_TOKEN_CAPACITY
+        # a response that was prefetched from the cache does not need any capacity
+        uses_buckets = not self._response_is_prefetched()
+        if uses_buckets:
+            requested_tokens = self.estimated_tokens()
+            if (
+                estimated_wait_time := self.tokens_bucket.wait_time(requested_tokens)
+            ) > 0:
+                self.task_status = TaskStatus.WAITING_FOR_TOKEN_CAPACITY
 
-        await self.tokens_bucket.get_tokens(requested_tokens)
+            await self.tokens_bucket.get_tokens(requested_tokens)
 
-        if (estimated_wait_time := self.requests_bucket.wait_time(1)) > 0:
-            self.waiting = True
-            self.task_status = TaskStatus.WAITING_FOR_REQUEST_CAPACITY
+            if (estimated_wait_time := self.requests_bucket.wait_time(1)) > 0:
+                self.waiting = True
+                self.task_status = TaskStatus.WAITING_FOR_REQUEST_CAPACITY
 
-        await self.requests_bucket.get_tokens(1)
+            await self.requests_bucket.get_tokens(1)
 
         self.task_status = TaskStatus.API_CALL_IN_PROGRESS
         try:
@@ -115,9 +131,10 @@ class QuestionTaskCreator(UserList):
 
         if "cached_response" in results:
             if results["cached_response"]:
-                # Gives back the tokens b/c the API was not called.
-                self.tokens_bucket.add_tokens(requested_tokens)
-                self.requests_bucket.add_tokens(1)
+                if uses_buckets:
+                    # Gives back the tokens b/c the API was not called.
+                    self.tokens_bucket.add_tokens(requested_tokens)
+                    self.requests_bucket.add_tokens(1)
                 self.from_cache = True
 
         tracker = self.cached_token_usage if self.from_cache else self.new_token_usage
@@ -1,21 +1,32 @@
 from edsl.jobs.tasks.task_status_enum import TaskStatus
 from matplotlib import pyplot as plt
-from typing import List
+from typing import List, Optional
 
 
 class TaskHistory:
-    def __init__(self, interviews: List["Interview"], include_traceback=False):
+    def __init__(
+        self,
+        interviews: List["Interview"],
+        include_traceback=False,
+        indices: Optional[List[int]] = None,
+    ):
+        """Initialize the TaskHistory.
+
+        :param interviews: the interviews to track, or summaries with their `exceptions` and `task_status_logs`.
+        :param include_traceback: whether to include the tracebacks of the exceptions.
+        :param indices: the position of each interview in the job. Defaults to the position in `interviews`.
+        """
         self.total_interviews = interviews
         self.include_traceback = include_traceback
 
-        self.exceptions = [
-            i.exceptions
-            for index, i in enumerate(self.total_interviews)
+        positions = indices if indices is not None else range(len(interviews))
+        self._interviews_with_exceptions = [
+            (index, i)
+            for index, i in zip(positions, self.total_interviews)
             if i.exceptions != {}
         ]
-        self.indices = [
-            index for index, i in enumerate(self.total_interviews) if i.exceptions != {}
-        ]
+        self.exceptions = [i.exceptions for _, i in self._interviews_with_exceptions]
+        self.indices = [index for index, _ in self._interviews_with_exceptions]
 
     def to_dict(self):
         """Return the TaskHistory as a dictionary."""
@@ -41,8 +52,8 @@ class TaskHistory:
 
     def show_exceptions(self):
         """Print the exceptions."""
-        for index in self.indices:
-            self.total_interviews[index].exceptions.print()
+        for _, interview in self._interviews_with_exceptions:
+            interview.exceptions.print()
 
     def get_updates(self):
         """Return a list of all the updates."""
@@ -71,6 +82,8 @@ class TaskHistory:
 
     def plotting_data(self, num_periods=100):
         updates = self.get_updates()
+        if not updates:
+            return []
 
         min_t = min([update.min_time for update in updates])
         max_t = max([update.max_time for update in updates])
@@ -100,6 +113,8 @@ class TaskHistory:
     def plot(self, num_periods=100):
         """Plot the number of tasks in each state over time."""
         new_counts = self.plotting_data(num_periods)
+        if not new_counts:
+            return
         max_count = max([max(entry.values()) for entry in new_counts])
 
         rows = int(len(TaskStatus) ** 0.5) + 1
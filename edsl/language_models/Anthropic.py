@@ -9,6 +9,7 @@ dotenv.load_dotenv()
 api_key = os.environ.get("ANTHROPIC_API_KEY")
 
 from edsl.language_models.LanguageModel import LanguageModel
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
 from edsl.enums import InferenceServiceType
 from edsl.enums import LanguageModelType
 from edsl.exceptions import MissingAPIKeyError
@@ -39,19 +40,25 @@ def create_anthropic_model(model_name, model_class_name) -> LanguageModel:
         ) -> dict[str, Any]:
             """Calls the OpenAI API and returns the API response."""
             api_key = os.environ.get("ANTHROPIC_API_KEY")
-            client = AsyncAnthropic(api_key=api_key)
-
-            response = await client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=1000,
-                temperature=0.0,
-                system=system_prompt,
-                messages=[
-                    #     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
-            return response.model_dump()
+            async with CLIENT_REGISTRY.client(
+                service=self._inference_service_,
+                api_key=api_key,
+                create_client=lambda: AsyncAnthropic(
+                    api_key=api_key, http_client=CLIENT_REGISTRY.httpx_client()
+                ),
+            ) as client:
+                raw_response = await client.messages.with_raw_response.create(
+                    model="claude-3-opus-20240229",
+                    max_tokens=1000,
+                    temperature=0.0,
+                    system=system_prompt,
+                    messages=[
+                        #     {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                )
+            self.update_rate_limits_from_headers(raw_response.headers)
+            return raw_response.parse().model_dump()
 
         @staticmethod
         def parse_response(raw_response: dict[str, Any]) -> str:
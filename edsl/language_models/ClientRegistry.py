@@ -0,0 +1,157 @@
+"""This module contains the ClientRegistry, which keeps long-lived HTTP clients for the inference services."""
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+import aiohttp
+import httpx
+
+# The default maximum number of connections that one client keeps open
+MAX_CONNECTIONS = 100
+
+
+class ClientRegistry:
+    """A registry of HTTP clients, keyed by inference service and API key.
+
+    Creating a client for every API call means paying for a new connection pool and TLS handshake every time.
+    Instead, while the registry is in use, each (service, API key) pair gets one client,
+    which keeps its connections alive and is reused by all calls.
+
+    The registry is in use on an event loop between `async with registry` and the exit of its last user on that loop,
+    e.g., for the duration of a job. Clients are bound to the event loop they were created on,
+    and are all closed when the last user on their loop exits.
+    Outside of `async with registry`, e.g., for a single call with `model.hello()`,
+    each call gets its own client, which is closed when the call is done.
+
+    >>> registry = ClientRegistry(max_connections=10)
+    >>> async def two_calls():
+    ...     async with registry:
+    ...         async with registry.aiohttp_session(service="test", api_key="a") as first:
+    ...             pass
+    ...         async with registry.aiohttp_session(service="test", api_key="a") as second:
+    ...             pass
+    ...         return first is second, len(registry)
+    >>> asyncio.run(two_calls())
+    (True, 1)
+    >>> len(registry)
+    0
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS):
+        """Initialize the registry.
+
+        :param max_connections: the maximum number of connections each client keeps open.
+        """
+        self.max_connections = max_connections
+        self._clients: Dict[
+            asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], Any]
+        ] = {}
+        self._users: Dict[asyncio.AbstractEventLoop, int] = {}
+
+    @asynccontextmanager
+    async def client(
+        self,
+        *,
+        service: str,
+        api_key: Optional[str],
+        create_client: Callable[[], Any],
+    ) -> AsyncIterator[Any]:
+        """Use the client for a service and API key, creating it if needed.
+
+        If the registry is not in use on the running event loop, a new client is created and closed on exit.
+
+        :param service: the name of the inference service.
+        :param api_key: the API key used by the client.
+        :param create_client: a function that returns a new client; the client must have an async `close` method.
+        """
+        loop = asyncio.get_running_loop()
+        if not self._users.get(loop):
+            client = create_client()
+            try:
+                yield client
+            finally:
+                await client.close()
+            return
+        clients = self._clients.setdefault(loop, {})
+        key = (service, api_key)
+        if key not in clients or self._is_closed(clients[key]):
+            clients[key] = create_client()
+        yield clients[key]
+
+    @staticmethod
+    def _is_closed(client: Any) -> bool:
+        """Return True if the client can no longer be used."""
+        if isinstance(client, aiohttp.ClientSession):
+            return client.closed
+        if hasattr(client, "is_closed"):
+            return client.is_closed()
+        return False
+
+    def aiohttp_session(
+        self, *, service: str, api_key: Optional[str]
+    ) -> AsyncContextManager[aiohttp.ClientSession]:
+        """Use an aiohttp session for a service and API key, see `client`."""
+        return self.client(
+            service=service,
+            api_key=api_key,
+            create_client=lambda: aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            ),
+        )
+
+    def httpx_client(self) -> httpx.AsyncClient:
+        """Return a new httpx client with the registry's connection limits.
+
+        This is used to build the clients of the services whose SDKs are built on httpx, e.g., OpenAI and Anthropic.
+        """
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=httpx.Timeout(timeout=600.0, connect=5.0),
+            follow_redirects=True,
+        )
+
+    async def close(self) -> None:
+        """Close all the clients created on the running event loop."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.close()
+
+    async def __aenter__(self) -> ClientRegistry:
+        loop = asyncio.get_running_loop()
+        self._users[loop] = self._users.get(loop, 0) + 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        loop = asyncio.get_running_loop()
+        self._users[loop] -= 1
+        if self._users[loop] == 0:
+            del self._users[loop]
+            await self.close()
+
+    def __len__(self) -> int:
+        return sum(len(clients) for clients in self._clients.values())
+
+    def __repr__(self) -> str:
+        return f"ClientRegistry(max_connections={self.max_connections})"
+
+
+# The registry shared by all the language models
+CLIENT_REGISTRY = ClientRegistry()
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
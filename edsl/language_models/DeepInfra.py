@@ -5,6 +5,7 @@ from typing import Any, Type
 from edsl.exceptions import MissingAPIKeyError
 from edsl.enums import LanguageModelType, InferenceServiceType
 from edsl.language_models.LanguageModel import LanguageModel
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
 
 
 def create_deep_infra_model(model_name, url, model_class_name) -> LanguageModel:
@@ -54,7 +55,9 @@ def create_deep_infra_model(model_name, url, model_class_name) -> LanguageModel:
                 "top_k": self.top_k,
                 "max_new_tokens": self.max_new_tokens,
             }
-            async with aiohttp.ClientSession() as session:
+            async with CLIENT_REGISTRY.aiohttp_session(
+                service=self._inference_service_, api_key=self.api_token
+            ) as session:
                 async with session.post(
                     self.url, headers=headers, data=json.dumps(data)
                 ) as response:
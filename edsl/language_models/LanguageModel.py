@@ -4,12 +4,14 @@ import warnings
 from functools import wraps
 import asyncio
 import aiohttp
+import copy
 import json
 import time
 import inspect
 import os
+import weakref
 
-from typing import Coroutine, Any, Callable, Type, List, get_type_hints
+from typing import Coroutine, Any, Callable, Type, List, Mapping, get_type_hints
 
 from abc import ABC, abstractmethod, ABCMeta
 
@@ -19,14 +21,22 @@ from edsl.config import CONFIG
 from edsl.language_models.schemas import model_prices
 from edsl.utilities.decorators import sync_wrapper, jupyter_nb_handler
 from edsl.language_models.repair import repair
+from edsl.language_models.rate_limits import parse_rate_limit_headers
 from edsl.exceptions.language_models import LanguageModelAttributeTypeError
 from edsl.enums import LanguageModelType, InferenceServiceType
 from edsl.Base import RichPrintingMixin, PersistenceMixin
 from edsl.data.Cache import Cache
+from edsl.data.CacheEntry import CacheEntry
 from edsl.enums import service_to_api_keyname
 
 from edsl.exceptions import MissingAPIKeyError
 
+# The objects told about the rate limits reported to each model, see `LanguageModel.add_rate_limit_listener`.
+# They are kept here rather than on the models, so they are not copied, pickled, or serialized with them.
+_RATE_LIMIT_LISTENERS: weakref.WeakKeyDictionary[
+    "LanguageModel", List[weakref.ref]
+] = weakref.WeakKeyDictionary()
+
 
 def handle_key_error(func):
     """Handle KeyError exceptions."""
@@ -332,16 +342,47 @@ class LanguageModel(
     def _set_rate_limits(self, rpm=None, tpm=None) -> None:
         """Set the rate limits for the model.
 
-        If the model does not have rate limits, use the default rate limits."""
+        If the model does not have rate limits, use the default rate limits.
+        The limits are updated later from the headers of the responses, see `update_rate_limits_from_headers`.
+        """
         if rpm is not None and tpm is not None:
             self.__rate_limits = {"rpm": rpm, "tpm": tpm}
             return
 
         if self.__rate_limits is None:
-            if hasattr(self, "get_rate_limits"):
-                self.__rate_limits = self.get_rate_limits()
-            else:
-                self.__rate_limits = self.__default_rate_limits
+            self.__rate_limits = dict(self.__default_rate_limits)
+
+    def add_rate_limit_listener(self, listener: "BucketCollection") -> None:
+        """Register an object with an `update_rate_limits(model, rate_limits)` method, e.g., a BucketCollection.
+
+        Listeners are told about the rate limits reported by the service; they are only weakly referenced.
+        """
+        listeners = _RATE_LIMIT_LISTENERS.setdefault(self, [])
+        listeners[:] = [ref for ref in listeners if ref() is not None]
+        if not any(ref() is listener for ref in listeners):
+            listeners.append(weakref.ref(listener))
+
+    def update_rate_limits_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Update the rate limits with the ones reported in the headers of a response.
+
+        >>> m = LanguageModel.example()
+        >>> m.update_rate_limits_from_headers({"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "499"})
+        >>> m.RPM
+        400.0
+        """
+        rate_limits = parse_rate_limit_headers(headers)
+        if not rate_limits:
+            return
+        self._set_rate_limits()
+        for kind, key in [("requests", "rpm"), ("tokens", "tpm")]:
+            if kind in rate_limits:
+                self.__rate_limits = {
+                    **self.__rate_limits,
+                    key: rate_limits[kind]["limit"],
+                }
+        for ref in _RATE_LIMIT_LISTENERS.get(self, []):
+            if (listener := ref()) is not None:
+                listener.update_rate_limits(self, rate_limits)
 
     @property
     def RPM(self):
@@ -421,6 +462,53 @@ class LanguageModel(
         response["cache_key"] = cache_key
         return response
 
+    async def _get_response_in_flight(
+        self,
+        *,
+        key: str,
+        user_prompt: str,
+        system_prompt: str,
+        cache: Cache,
+        iteration: int,
+    ) -> tuple[dict[str, Any], str]:
+        """Call the model and store the response, sharing it with the identical requests made in the meantime.
+
+        Those requests wait for the future in `cache.in_flight[key]`. The response and its cache key are returned.
+        If the call fails, the requests waiting for it get the same exception.
+        If the call is cancelled, they get None, and one of them makes the call instead.
+        """
+        future = asyncio.get_running_loop().create_future()
+        cache.in_flight[key] = future
+        try:
+            if hasattr(self, "remote") and self.remote:
+                response = await self.remote_async_execute_model_call(
+                    user_prompt, system_prompt
+                )
+            else:
+                response = await self.async_execute_model_call(
+                    user_prompt, system_prompt
+                )
+            cache_key = cache.store(
+                user_prompt=user_prompt,
+                model=str(self.model),
+                parameters=self.parameters,
+                system_prompt=system_prompt,
+                response=response,
+                iteration=iteration,
+            )
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # the exception is raised here, not by the future
+            raise
+        else:
+            future.set_result(response)
+        finally:
+            del cache.in_flight[key]
+        return response, cache_key
+
     async def async_get_raw_response(
         self,
         user_prompt: str,
@@ -446,7 +534,7 @@ class LanguageModel(
         """
         start_time = time.time()
 
-        cached_response = cache.fetch(
+        cached_response = await cache.async_fetch(
             model=str(self.model),
             parameters=self.parameters,
             system_prompt=system_prompt,
@@ -454,32 +542,35 @@ class LanguageModel(
             iteration=iteration,
         )
 
+        cache_key = None
         if cache_used := (cached_response is not None):
-            # print("Cache used")
             response = json.loads(cached_response)
         else:
-            # print("Cache not used")
-            # print(f"Cache data is: {cache.data}")
-            if hasattr(self, "remote") and self.remote:
-                response = await self.remote_async_execute_model_call(
-                    user_prompt, system_prompt
-                )
-            else:
-                response = await self.async_execute_model_call(
-                    user_prompt, system_prompt
-                )
-
-        if not cache_used:
-            cache_key = cache.store(
-                user_prompt=user_prompt,
+            # identical requests that are already in flight share the same response,
+            # which counts as a cached response for the one waiting for it
+            key = CacheEntry.gen_key(
                 model=str(self.model),
                 parameters=self.parameters,
                 system_prompt=system_prompt,
-                response=response,
+                user_prompt=user_prompt,
                 iteration=iteration,
             )
-        else:
-            cache_key = None
+            response = None
+            while key in cache.in_flight:
+                shared_response = await asyncio.shield(cache.in_flight[key])
+                if shared_response is not None:
+                    response = copy.deepcopy(shared_response)
+                    cache_used = True
+                    break
+            if response is None:
+                response, cache_key = await self._get_response_in_flight(
+                    key=key,
+                    user_prompt=user_prompt,
+                    system_prompt=system_prompt,
+                    cache=cache,
+                    iteration=iteration,
+                )
+
         return self._update_response_with_tracking(
             response=response,
             start_time=start_time,
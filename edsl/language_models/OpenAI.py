@@ -5,6 +5,7 @@ from typing import Any
 from openai import AsyncOpenAI
 from edsl.enums import LanguageModelType, InferenceServiceType
 from edsl.language_models import LanguageModel
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
 from edsl.exceptions import MissingAPIKeyError
 
 LanguageModelType.GPT_4.value
@@ -28,55 +29,34 @@ def create_openai_model(model_name, model_class_name) -> LanguageModel:
             "top_logprobs": 3,
         }
 
-        def get_headers(self) -> dict[str, Any]:
-            from openai import OpenAI
-
-            client = OpenAI()
-            response = client.chat.completions.with_raw_response.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": "Say this is a test",
-                    }
-                ],
-                model=self.model,
-            )
-            return dict(response.headers)
-
-        def get_rate_limits(self) -> dict[str, Any]:
-            try:
-                headers = self.get_headers()
-            except Exception as e:
-                return {
-                    "rpm": 10_000,
-                    "tpm": 2_000_000,
-                }
-            else:
-                return {
-                    "rpm": int(headers["x-ratelimit-limit-requests"]),
-                    "tpm": int(headers["x-ratelimit-limit-tokens"]),
-                }
-
         async def async_execute_model_call(
             self, user_prompt: str, system_prompt: str = ""
         ) -> dict[str, Any]:
             """Calls the OpenAI API and returns the API response."""
-            self.client = AsyncOpenAI()
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-                logprobs=self.logprobs,
-                top_logprobs=self.top_logprobs if self.logprobs else None,
-            )
-            return response.model_dump()
+            api_key = os.getenv("OPENAI_API_KEY")
+            async with CLIENT_REGISTRY.client(
+                service=self._inference_service_,
+                api_key=api_key,
+                create_client=lambda: AsyncOpenAI(
+                    api_key=api_key, http_client=CLIENT_REGISTRY.httpx_client()
+                ),
+            ) as client:
+                raw_response = await client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    top_p=self.top_p,
+                    frequency_penalty=self.frequency_penalty,
+                    presence_penalty=self.presence_penalty,
+                    logprobs=self.logprobs,
+                    top_logprobs=self.top_logprobs if self.logprobs else None,
+                )
+            self.update_rate_limits_from_headers(raw_response.headers)
+            return raw_response.parse().model_dump()
 
         @staticmethod
         def parse_response(raw_response: dict[str, Any]) -> str:
@@ -4,6 +4,7 @@ import json
 from typing import Any
 from edsl.exceptions import MissingAPIKeyError
 from edsl.language_models.LanguageModel import LanguageModel
+from edsl.language_models.ClientRegistry import CLIENT_REGISTRY
 from edsl.enums import LanguageModelType, InferenceServiceType
 
 
@@ -37,7 +38,9 @@ class GeminiPro(LanguageModel):
             },
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with CLIENT_REGISTRY.aiohttp_session(
+            service=self._inference_service_, api_key=self.api_token
+        ) as session:
             async with session.post(
                 url, headers=headers, data=json.dumps(data)
             ) as response:
@@ -0,0 +1,94 @@
+"""Parse the rate-limit headers that inference services return with every response."""
+import re
+import datetime
+from typing import Mapping, Optional, Union
+
+# (limit, remaining, reset) header names, by service, for requests and tokens
+RATE_LIMIT_HEADERS = {
+    "requests": [
+        (
+            "x-ratelimit-limit-requests",
+            "x-ratelimit-remaining-requests",
+            "x-ratelimit-reset-requests",
+        ),
+        (
+            "anthropic-ratelimit-requests-limit",
+            "anthropic-ratelimit-requests-remaining",
+            "anthropic-ratelimit-requests-reset",
+        ),
+    ],
+    "tokens": [
+        (
+            "x-ratelimit-limit-tokens",
+            "x-ratelimit-remaining-tokens",
+            "x-ratelimit-reset-tokens",
+        ),
+        (
+            "anthropic-ratelimit-tokens-limit",
+            "anthropic-ratelimit-tokens-remaining",
+            "anthropic-ratelimit-tokens-reset",
+        ),
+    ],
+}
+
+DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """Return the number of seconds until a rate limit resets.
+
+    Services report this either as a duration or as a timestamp.
+
+    >>> parse_reset("6m0s")
+    360.0
+    >>> parse_reset("1.5s")
+    1.5
+    >>> parse_reset("20ms")
+    0.02
+    >>> parse_reset("soon") is None
+    True
+    """
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        reset_time = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (reset_time - now).total_seconds())
+
+
+def parse_rate_limit_headers(
+    headers: Mapping[str, str]
+) -> dict[str, dict[str, Union[float, None]]]:
+    """Extract the rate limits from the headers of a response.
+
+    Returns a dictionary keyed by "requests" and/or "tokens".
+    Each value holds the per-minute `limit`, the `remaining` capacity, and the seconds until `reset`.
+
+    >>> headers = {"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "499", "x-ratelimit-reset-requests": "120ms"}
+    >>> parse_rate_limit_headers(headers)
+    {'requests': {'limit': 500.0, 'remaining': 499.0, 'reset': 0.12}}
+    >>> parse_rate_limit_headers({})
+    {}
+    """
+    headers = {key.lower(): value for key, value in headers.items()}
+    rate_limits = {}
+    for kind, header_names in RATE_LIMIT_HEADERS.items():
+        for limit_name, remaining_name, reset_name in header_names:
+            try:
+                limit = float(headers[limit_name])
+                remaining = float(headers[remaining_name])
+            except (KeyError, ValueError):
+                continue
+            reset = parse_reset(headers[reset_name]) if reset_name in headers else None
+            rate_limits[kind] = {"limit": limit, "remaining": remaining, "reset": reset}
+            break
+    return rate_limits
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import Optional
 from abc import ABC
+from functools import lru_cache
 from typing import Any, List
 
 from rich.table import Table
@@ -18,6 +19,35 @@ from edsl.prompts.registry import RegisterPromptsMeta
 from edsl.Base import PersistenceMixin, RichPrintingMixin
 
 MAX_NESTING = 100
+# The number of compiled templates (and of their variable sets) kept in memory
+TEMPLATE_CACHE_SIZE = 1_024
+
+# All prompts are rendered with the same environment, so templates are only compiled once
+_environment = Environment()
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_template(text: str) -> Template:
+    """Compile the template text, or return it from the cache if it was compiled before."""
+    return _environment.from_string(text)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _find_template_variables(text: str) -> tuple[str, ...]:
+    """Parse the template text and return its undeclared variables."""
+    return tuple(meta.find_undeclared_variables(_environment.parse(text)))
+
+
+def _has_template_syntax(text: str) -> bool:
+    """Return True if the text could still contain a variable, block, or comment."""
+    return any(
+        marker in text
+        for marker in (
+            _environment.variable_start_string,
+            _environment.block_start_string,
+            _environment.comment_start_string,
+        )
+    )
 
 
 class PromptBase(
@@ -126,9 +156,7 @@ class PromptBase(
         :param template: The template to find the variables in.
 
         """
-        env = Environment()
-        ast = env.parse(template)
-        return list(meta.find_undeclared_variables(ast))
+        return list(_find_template_variables(template))
 
     def undefined_template_variables(self, replacement_dict: dict):
         """Return the variables in the template that are not in the replacement_dict.
@@ -199,6 +227,7 @@ class PromptBase(
         :param additional_replacements: Additional replacement dictionaries.
 
         Allows for nested variable resolution up to a specified maximum nesting depth.
+        Rendering stops as soon as the text has no template syntax left.
 
         Example:
 
@@ -210,10 +239,12 @@ class PromptBase(
         try:
             previous_text = None
             for _ in range(MAX_NESTING):
-                rendered_text = Template(text).render(
+                rendered_text = _compile_template(text).render(
                     primary_replacement, **additional_replacements
                 )
-                if rendered_text == previous_text:
+                if rendered_text == previous_text or not _has_template_syntax(
+                    rendered_text
+                ):
                     # No more changes, so return the rendered text
                     return rendered_text
                 previous_text = text
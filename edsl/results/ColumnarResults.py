@@ -0,0 +1,342 @@
+"""A columnar representation of Results, with one typed array per column, for analyzing large Results."""
+from __future__ import annotations
+import ast
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+from simpleeval import EvalWithCompoundTypes
+
+from edsl.exceptions.results import ResultsColumnNotFoundError, ResultsFilterError
+from edsl.results.Dataset import Dataset
+from edsl.results.Result import Result
+
+
+class DictionaryArray:
+    """
+    A column of strings, dictionary-encoded: each value is stored as the index of its category.
+    - Missing values have the code -1.
+
+    >>> a = DictionaryArray.from_values(["OK", "Great", None, "OK"])
+    >>> a.codes.tolist(), a.categories.tolist()
+    ([0, 1, -1, 0], ['OK', 'Great'])
+    >>> a.take(np.array([3, 2])).to_list()
+    ['OK', None]
+    """
+
+    def __init__(self, codes: np.ndarray, categories: np.ndarray):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values: list[Optional[str]]) -> DictionaryArray:
+        lookup: dict[str, int] = {}
+        codes = np.fromiter(
+            (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        categories = np.empty(len(lookup), dtype=object)
+        categories[:] = list(lookup)
+        return cls(codes, categories)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, indices: np.ndarray) -> DictionaryArray:
+        return DictionaryArray(self.codes[indices], self.categories)
+
+    def to_list(self) -> list[Optional[str]]:
+        values = np.append(self.categories, None)[self.codes]
+        return values.tolist()
+
+    def to_pandas(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.codes, categories=self.categories)
+
+
+Column = Union[np.ndarray, DictionaryArray]
+
+
+def _to_column(values: list) -> Column:
+    """Store the values of a column in the narrowest array that holds them all."""
+    types = set(map(type, values))
+    if types == {bool}:
+        return np.array(values, dtype=bool)
+    if types == {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    elif types and types <= {int, float}:
+        return np.array(values, dtype=np.float64)
+    elif str in types and types <= {str, type(None)}:
+        return DictionaryArray.from_values(values)
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def _take(column: Column, indices: np.ndarray) -> Column:
+    return (
+        column.take(indices) if isinstance(column, DictionaryArray) else column[indices]
+    )
+
+
+def _to_list(column: Column) -> list:
+    return column.to_list() if isinstance(column, DictionaryArray) else column.tolist()
+
+
+def _to_pandas(column: Column) -> Union[np.ndarray, pd.Categorical]:
+    return column.to_pandas() if isinstance(column, DictionaryArray) else column
+
+
+def _to_numeric_if_possible(v):
+    try:
+        return float(v)
+    except:
+        return v
+
+
+class ColumnarResults:
+    """
+    Results stored as one typed array per `data_type.key` column, see `Results.to_columnar`.
+    - Booleans, integers, and floats are stored in NumPy arrays; strings are dictionary-encoded (DictionaryArray);
+      other values, e.g., dictionaries, in object arrays. Missing values are None.
+    - `select`, `filter`, `sort_by`, and `to_pandas` work on the arrays.
+      `filter` and `sort_by` return a ColumnarResults that shares the arrays, with the positions of the rows it keeps.
+    - Rows are Result objects, which are looked up only when a row is accessed, e.g., with `results[0]` or `to_results`.
+
+    >>> from edsl.results import Results
+    >>> r = Results.example().to_columnar()
+    >>> r.filter("how_feeling == 'Great'").select("how_feeling")
+    [{'answer.how_feeling': ['Great']}]
+    """
+
+    known_data_types = [
+        "answer",
+        "scenario",
+        "agent",
+        "model",
+        "prompt",
+        "raw_model_response",
+        "iteration",
+    ]
+
+    def __init__(
+        self,
+        columns: dict[str, Column],
+        rows: list[Result],
+        index: Optional[np.ndarray] = None,
+        survey=None,
+    ):
+        """
+        :param columns: The arrays, by `data_type.key`; they all have one value per row of `rows`.
+        :param rows: The Result objects that the columns were built from.
+        :param index: The positions in `rows` of the rows of these results, in order; by default, all of them.
+        :param survey: The survey of the results.
+        """
+        self._columns = columns
+        self._rows = rows
+        self.index = np.arange(len(rows)) if index is None else index
+        self.survey = survey
+        # the data type of each key; as in `Result.combined_dict`, later data types take precedence
+        self._key_to_data_type = {}
+        for name in columns:
+            data_type, key = name.split(".", 1)
+            self._key_to_data_type[key] = data_type
+
+    @classmethod
+    def from_results(cls, results) -> ColumnarResults:
+        """Build the columns of a Results, in one pass over its Result objects."""
+        values: dict[str, list] = {}
+        for i, result in enumerate(results.data):
+            for data_type, sub_dict in result.sub_dicts.items():
+                for key, value in sub_dict.items():
+                    name = f"{data_type}.{key}"
+                    if name not in values:
+                        values[name] = [None] * i
+                    values[name].append(value)
+            for column in values.values():
+                if len(column) == i:
+                    column.append(None)
+        for column in results.created_columns:
+            values.setdefault(f"answer.{column}", [None] * len(results.data))
+        columns = {name: _to_column(column) for name, column in values.items()}
+        return cls(columns, list(results.data), survey=results.survey)
+
+    def _derive(self, index: np.ndarray) -> ColumnarResults:
+        return ColumnarResults(self._columns, self._rows, index, self.survey)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> Result:
+        return self._rows[self.index[i]]
+
+    def __iter__(self) -> Iterator[Result]:
+        return (self._rows[i] for i in self.index)
+
+    def __repr__(self) -> str:
+        return f"ColumnarResults(rows={len(self)}, columns={len(self._columns)})"
+
+    @property
+    def columns(self) -> list[str]:
+        """Return the names of the columns that can be selected."""
+        return sorted(
+            name
+            for name in self._columns
+            if name.split(".", 1)[0] in self.known_data_types
+        )
+
+    def column(self, name: str) -> Column:
+        """Return the array of a column, e.g., "how_feeling" or "answer.how_feeling", for the rows of these results."""
+        return _take(self._columns[self._column_name(name)], self.index)
+
+    def _column_name(self, column: str) -> str:
+        if "." in column:
+            name = column
+        elif column in self._key_to_data_type:
+            name = f"{self._key_to_data_type[column]}.{column}"
+        else:
+            raise ResultsColumnNotFoundError(f"Column {column} not found in data")
+        if name not in self._columns:
+            raise ResultsColumnNotFoundError(f"Column {column} not found in data")
+        return name
+
+    def to_results(self):
+        """Return the rows of these results as a Results."""
+        from edsl.results.Results import Results
+
+        return Results(survey=self.survey, data=list(self))
+
+    def select(self, *columns: Union[str, list[str]]) -> Dataset:
+        """
+        Select columns, like `Results.select`; the columns are in the order in which they are asked for.
+
+        >>> from edsl.results import Results
+        >>> Results.example().to_columnar().select("how_feeling", "agent.status")
+        [{'answer.how_feeling': ['OK', 'Great', 'Terrible', 'OK']}, {'agent.status': ['Joyful', 'Joyful', 'Sad', 'Sad']}]
+        """
+        if not columns or columns == ("*",) or columns == (None,):
+            columns = ("*.*",)
+        if isinstance(columns[0], list):
+            columns = tuple(columns[0])
+
+        names = []
+        for column in columns:
+            if "." in column:
+                data_type, key = column.split(".", 1)
+            elif column in self._key_to_data_type:
+                data_type, key = self._key_to_data_type[column], column
+            else:
+                raise ResultsColumnNotFoundError(f"Column {column} not found in data")
+            if data_type != "*" and data_type not in self.known_data_types:
+                raise Exception(
+                    f"Data type {data_type} not found in data. Did you mean one of {self.known_data_types}"
+                )
+            found = [
+                name
+                for name in self.columns
+                if data_type in ("*", name.split(".", 1)[0])
+                and key in ("*", name.split(".", 1)[1])
+            ]
+            if not found:
+                raise Exception(f"Key {key} not found in data.")
+            names.extend(name for name in found if name not in names)
+        return Dataset([{name: _to_list(self.column(name))} for name in names])
+
+    def filter(self, expression: str) -> ColumnarResults:
+        """
+        Keep the rows for which the expression is true, like `Results.filter`.
+        - The expression is evaluated on whole columns, with `pandas.eval`;
+          expressions that it cannot evaluate, e.g., that call functions, are evaluated row by row.
+
+        >>> from edsl.results import Results
+        >>> r = Results.example().to_columnar()
+        >>> len(r.filter("how_feeling == 'Great' or how_feeling == 'Terrible'"))
+        2
+        """
+        try:
+            names = {
+                node.id
+                for node in ast.walk(ast.parse(expression, mode="eval"))
+                if isinstance(node, ast.Name)
+            }
+            frame = pd.DataFrame(
+                {
+                    name: _to_pandas(self.column(name))
+                    for name in names
+                    if name in self._key_to_data_type
+                }
+            )
+            mask = frame.eval(expression, engine="python")
+            if not (isinstance(mask, pd.Series) and mask.dtype == bool):
+                raise TypeError(f"{expression} is not a condition on the columns")
+            return self._derive(self.index[mask.to_numpy()])
+        except Exception:
+            pass
+        try:
+            keep = [
+                EvalWithCompoundTypes(names=self._rows[i].combined_dict).eval(
+                    expression
+                )
+                for i in self.index
+            ]
+        except Exception as e:
+            raise ResultsFilterError(f"Error in filter. Exception:{e}")
+        return self._derive(self.index[np.array(keep, dtype=bool)])
+
+    def sort_by(self, column: str, reverse: bool = False) -> ColumnarResults:
+        """
+        Sort the rows by a column, like `Results.sort_by`: the sort is stable, and numeric strings are sorted as numbers.
+
+        >>> from edsl.results import Results
+        >>> r = Results.example().to_columnar()
+        >>> r.sort_by("how_feeling", reverse=True).select("how_feeling")
+        [{'answer.how_feeling': ['Terrible', 'OK', 'OK', 'Great']}]
+        """
+        values = self.column(column)
+        if isinstance(values, DictionaryArray):
+            # sort the categories, then the rows by the rank of their category
+            order = sorted(
+                range(len(values.categories)),
+                key=lambda i: _to_numeric_if_possible(values.categories[i]),
+            )
+            ranks = np.empty(len(order) + 1, dtype=np.int64)
+            ranks[order] = np.arange(len(order))
+            ranks[-1] = len(order)  # missing values come last
+            keys = ranks[values.codes]
+        elif values.dtype != object:
+            keys = values.astype(np.float64)
+        else:
+            order = sorted(
+                range(len(values)),
+                key=lambda i: _to_numeric_if_possible(values[i]),
+                reverse=reverse,
+            )
+            return self._derive(self.index[order])
+        order = np.argsort(-keys if reverse else keys, kind="stable")
+        return self._derive(self.index[order])
+
+    def to_pandas(self, remove_prefix: bool = False) -> pd.DataFrame:
+        """
+        Return the selectable columns as a DataFrame, sorted by name; strings are categorical columns.
+
+        >>> from edsl.results import Results
+        >>> df = Results.example().to_columnar().to_pandas()
+        >>> df["answer.how_feeling"].dtype
+        CategoricalDtype(categories=['OK', 'Great', 'Terrible'], ordered=False, categories_dtype=object)
+        """
+        frame = pd.DataFrame(
+            {name: _to_pandas(self.column(name)) for name in self.columns}
+        )
+        if remove_prefix:
+            frame.columns = [name.split(".", 1)[1] for name in frame.columns]
+        return frame
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -121,10 +121,64 @@ class Results(UserList, Mixins, Base):
         self.created_columns = created_columns or []
         self._job_uuid = job_uuid
         self._total_results = total_results
+        # the columnar representation, see `to_columnar`; the list mutators below drop it
+        self._columnar: Optional["ColumnarResults"] = None
 
         if hasattr(self, "_add_output_functions"):
             self._add_output_functions()
 
+    ######################
+    # List mutators
+    ######################
+
+    def __setitem__(self, i, item) -> None:
+        super().__setitem__(i, item)
+        self._columnar = None
+
+    def __delitem__(self, i) -> None:
+        super().__delitem__(i)
+        self._columnar = None
+
+    def __iadd__(self, other) -> Results:
+        self._columnar = None
+        return super().__iadd__(other)
+
+    def __imul__(self, n: int) -> Results:
+        self._columnar = None
+        return super().__imul__(n)
+
+    def append(self, item: Result) -> None:
+        super().append(item)
+        self._columnar = None
+
+    def insert(self, i: int, item: Result) -> None:
+        super().insert(i, item)
+        self._columnar = None
+
+    def pop(self, i: int = -1) -> Result:
+        self._columnar = None
+        return super().pop(i)
+
+    def remove(self, item: Result) -> None:
+        super().remove(item)
+        self._columnar = None
+
+    def clear(self) -> None:
+        super().clear()
+        self._columnar = None
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._columnar = None
+
+    def sort(self, /, *args, **kwds) -> None:
+        super().sort(*args, **kwds)
+        self._columnar = None
+
+    def extend(self, other) -> None:
+        super().extend(other)
+        self._columnar = None
+
     ######################
     # Streaming methods
     ######################
@@ -156,6 +210,7 @@ class Results(UserList, Mixins, Base):
                 for r in CRUD.read_results(self._job_uuid)
             ]
             self.data = results
+            self._columnar = None
 
     def __repr__(self) -> str:
         from rich import print_json
@@ -556,6 +611,29 @@ class Results(UserList, Mixins, Base):
 
         return Dataset(new_data)
 
+    def to_columnar(self) -> "ColumnarResults":
+        """Return the results as one typed array per column, for analyzing large results.
+
+        The arrays are built once, in one pass over the results, and kept until the list of results is changed,
+        e.g., with `append` or `r[0] = ...`; a Result that is changed in place is not seen. See `ColumnarResults`.
+
+        Example:
+
+        >>> r = Results.example()
+        >>> r.to_columnar().sort_by('how_feeling').select('how_feeling')
+        [{'answer.how_feeling': ['Great', 'OK', 'OK', 'Terrible']}]
+        >>> r.to_columnar() is r.to_columnar()
+        True
+        >>> r[0] = r[1]
+        >>> r.to_columnar().select('how_feeling')
+        [{'answer.how_feeling': ['Great', 'Great', 'Terrible', 'OK']}]
+        """
+        from edsl.results.ColumnarResults import ColumnarResults
+
+        if getattr(self, "_columnar", None) is None:
+            self._columnar = ColumnarResults.from_results(self)
+        return self._columnar
+
     def sort_by(self, column, reverse: bool = False) -> Results:
         """Sort the results by a column.
 
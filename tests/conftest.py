@@ -3,6 +3,7 @@ import os
 import pytest
 from typing import Any
 from edsl.config import CONFIG
+from edsl.data.CacheEntry import CacheEntry
 from edsl.data.SQLiteDict import SQLiteDict
 from edsl.enums import LanguageModelType, InferenceServiceType
 from edsl.language_models.LanguageModel import LanguageModel
@@ -128,10 +129,33 @@ def sqlite_dict():
     - Deletes the database file after the test.
     """
     print(CONFIG.get("EDSL_DATABASE_PATH"))
-    yield SQLiteDict(db_path=CONFIG.get("EDSL_DATABASE_PATH"))
+    sqlite_dict = SQLiteDict(db_path=CONFIG.get("EDSL_DATABASE_PATH"))
+    yield sqlite_dict
+    # closing the database first lets SQLite clean up its write-ahead log
+    sqlite_dict.close()
     os.remove(CONFIG.get("EDSL_DATABASE_PATH").replace("sqlite:///", ""))
 
 
+@pytest.fixture
+def make_entries():
+    """
+    Provides a function that makes `n` distinct CacheEntry objects, keyed by key.
+    - Calls with different offsets make different entries.
+    - The prompts include non-ASCII text, and the parameters vary.
+    """
+
+    def _make_entries(n: int, offset: int = 0) -> dict[str, CacheEntry]:
+        entries = {}
+        for i in range(offset, offset + n):
+            entry = CacheEntry.example()
+            entry.user_prompt = f"Question {i} – ünïcödé"
+            entry.parameters = {"temperature": i % 3}
+            entries[entry.key] = entry
+        return entries
+
+    return _make_entries
+
+
 @pytest.fixture
 def language_model_good():
     """
@@ -39,19 +39,28 @@ def test_CacheEntry_store_input_example():
 
 
 def test_CacheEntry_gen_key():
-    key = CacheEntry.gen_key(
+    fields = dict(
         model="gpt-3.5-turbo",
         parameters="{'temperature': 0.5}",
         system_prompt="The quick brown fox jumps over the lazy dog.",
         user_prompt="What does the fox say?",
         iteration=1,
     )
+    key = CacheEntry.gen_key(**fields, version=1)
     assert key == "5ee60636048b05b4f7b6995a0cf9b78e"
+    assert CacheEntry.gen_key(**fields) == "ac515a5a186ed03071af2340d0bbec06"
 
 
 def test_CacheEntry_key_property():
     entry = CacheEntry.example()
-    assert entry.key == "5513286eb6967abc0511211f0402587d"
+    assert entry.key_for(1) == "5513286eb6967abc0511211f0402587d"
+    assert entry.key == "c2b3043c8ebbe6a3f1e0488ee67fc518"
+    # the key is kept, and recomputed when a key field changes
+    entry.user_prompt = "What does the dog say?"
+    assert entry.key == CacheEntry.gen_key(
+        **{field: getattr(entry, field) for field in CacheEntry.key_fields}
+    )
+    assert entry.key != "c2b3043c8ebbe6a3f1e0488ee67fc518"
 
 
 def test_CacheEntry_to_dict():
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+
+import pytest
+
+from edsl.data import CacheEntry
+from edsl.data.Cache import Cache
+from edsl.data.CacheSnapshot import CacheSnapshot, SnapshotDict
+
+
+def test_CacheSnapshot_roundtrip(tmp_path, make_entries):
+    entries = make_entries(1_000)
+    path = str(tmp_path / "cache.snapshot")
+    assert CacheSnapshot.write(path, entries.items()) == 1_000
+    with CacheSnapshot(path) as snapshot:
+        assert len(snapshot) == 1_000
+        assert all(snapshot[key] == entry for key, entry in entries.items())
+        assert dict(snapshot.items()) == entries
+        assert "not a key" not in snapshot
+        assert snapshot.get("not a key", "default") == "default"
+        with pytest.raises(KeyError):
+            snapshot["not a key"]
+    # an empty snapshot
+    CacheSnapshot.write(path, [])
+    with CacheSnapshot(path) as snapshot:
+        assert len(snapshot) == 0 and "not a key" not in snapshot
+    (tmp_path / "not a snapshot").write_bytes(b"x" * 5_000)
+    with pytest.raises(ValueError):
+        CacheSnapshot(str(tmp_path / "not a snapshot"))
+
+
+def store_new_entries(snapshot_path, write_log, entries):
+    cache = Cache.from_snapshot(snapshot_path, write_log)
+    for entry in entries.values():
+        assert cache.fetch(**CacheEntry.fetch_input_example()) is not None
+        cache.store(
+            model=entry.model,
+            parameters=entry.parameters,
+            system_prompt=entry.system_prompt,
+            user_prompt=entry.user_prompt,
+            response="new",
+            iteration=entry.iteration,
+        )
+    cache.data.close()
+
+
+def test_workers_share_a_snapshot_and_merge_their_write_logs(
+    tmp_path, make_entries
+):
+    cache = Cache.example()
+    cache.snapshot(str(tmp_path / "cache.snapshot"))
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(
+            target=store_new_entries,
+            args=(
+                str(tmp_path / "cache.snapshot"),
+                str(tmp_path / f"log-{i}.jsonl"),
+                make_entries(10, offset=10 * i),
+            ),
+        )
+        for i in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 3
+    for i in range(3):
+        cache.add_from_jsonl(str(tmp_path / f"log-{i}.jsonl"))
+    assert len(cache) == 31
+    assert set(cache.keys()) >= set(make_entries(30))
+
+    d = SnapshotDict(str(tmp_path / "cache.snapshot"))
+    with pytest.raises(TypeError):
+        del d[CacheEntry.example().key]
+    d.close()
+
+
+def store_and_crash(snapshot_path, write_log, entries):
+    cache = Cache.from_snapshot(snapshot_path, write_log)
+    cache.add_from_dict(entries)
+    os._exit(1)
+
+
+def test_write_log_keeps_the_entries_of_a_worker_that_crashes(
+    tmp_path, make_entries
+):
+    Cache.example().snapshot(str(tmp_path / "cache.snapshot"))
+    entries = make_entries(5)
+    context = multiprocessing.get_context("fork")
+    process = context.Process(
+        target=store_and_crash,
+        args=(str(tmp_path / "cache.snapshot"), str(tmp_path / "log.jsonl"), entries),
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 1
+    cache = Cache()
+    cache.add_from_jsonl(str(tmp_path / "log.jsonl"))
+    assert cache.data == entries
+
+
+def test_opening_a_snapshot_does_not_read_its_entries(tmp_path, monkeypatch):
+    Cache.example().snapshot(str(tmp_path / "cache.snapshot"))
+    monkeypatch.setattr(
+        CacheSnapshot, "items", lambda self: pytest.fail("the entries were read")
+    )
+    cache = Cache.from_snapshot(str(tmp_path / "cache.snapshot"))
+    assert cache.fetch(**CacheEntry.fetch_input_example()) is not None
+    cache.data.close()
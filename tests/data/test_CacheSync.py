@@ -0,0 +1,223 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from edsl.coop import Coop
+from edsl.data.Cache import Cache
+from edsl.data.CacheEntry import CacheEntry
+from edsl.data.CacheSync import find_missing_keys, keys_with_prefixes, prefix_digests
+from edsl.data.SQLiteDict import SQLiteDict
+
+
+SYNC_ENDPOINTS = {
+    "get-cache-digests",
+    "get-cache-keys",
+    "get-cache-entries-by-keys",
+    "upload-cache-entries",
+}
+
+
+class StandInCacheServer(ThreadingHTTPServer):
+    """A local stand-in for the cache endpoints of the Coop server."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInCacheHandler)
+        self.entries = {}
+        self.requests = []
+        # whether the server only has the endpoints that predate the incremental sync
+        self.legacy = False
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInCacheHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        entries = self.server.entries
+        endpoint = self.path.rsplit("/", 1)[-1]
+        self.server.requests.append((endpoint, payload))
+        status = 200
+        if self.server.legacy and endpoint in SYNC_ENDPOINTS:
+            status = 404
+            response = {"detail": "Not Found"}
+        elif endpoint == "get-cache-entries":
+            exclude_keys = set(json.loads(payload["json_string"]))
+            response = [
+                {"json_string": json.dumps(entry)}
+                for key, entry in entries.items()
+                if key not in exclude_keys
+            ]
+        elif endpoint == "create-cache-entries":
+            for key, entry in json.loads(payload["json_string"]).items():
+                entries[key] = json.loads(entry)
+            response = {"status": "success"}
+        elif endpoint == "get-cache-digests":
+            response = prefix_digests(
+                entries, payload["prefixes"], payload["prefix_length"]
+            )
+        elif endpoint == "get-cache-keys":
+            response = keys_with_prefixes(entries, payload["prefixes"])
+        elif endpoint == "get-cache-entries-by-keys":
+            response = [entries[key] for key in payload["keys"] if key in entries]
+        elif endpoint == "upload-cache-entries":
+            for entry in payload["entries"]:
+                entries[CacheEntry.from_dict(entry).key] = entry
+            response = {"status": "success"}
+        else:
+            status = 404
+            response = {"detail": f"Unknown endpoint {endpoint}"}
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cache_server():
+    server = StandInCacheServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_find_missing_keys_exchanges_only_differing_prefixes(
+    cache_server, make_entries
+):
+    shared = make_entries(5_000)
+    local_only = make_entries(10, offset=5_000)
+    remote_only = make_entries(3, offset=6_000)
+    local = {**shared, **local_only}
+    remote = {**shared, **remote_only}
+    cache_server.entries = {k: v.to_dict() for k, v in remote.items()}
+
+    missing_locally, missing_remotely = find_missing_keys(
+        local.keys, Coop(url=cache_server.url)
+    )
+    assert missing_locally == set(remote_only)
+    assert missing_remotely == set(local_only)
+    # only the keys under the few prefixes that differ are sent
+    sent_keys = [
+        key
+        for endpoint, payload in cache_server.requests
+        if endpoint == "get-cache-keys"
+        for key in keys_with_prefixes(cache_server.entries, payload["prefixes"])
+    ]
+    assert 0 < len(sent_keys) < 500
+
+
+def test_find_missing_keys_in_sync(cache_server, make_entries):
+    entries = make_entries(100)
+    cache_server.entries = {k: v.to_dict() for k, v in entries.items()}
+    assert find_missing_keys(entries.keys, Coop(url=cache_server.url)) == (
+        set(),
+        set(),
+    )
+    assert [endpoint for endpoint, _ in cache_server.requests] == [
+        "get-cache-digests"
+    ]
+
+
+def test_remote_cache_syncs_missing_entries(cache_server, sqlite_dict, make_entries):
+    shared = make_entries(20)
+    local_only = make_entries(5, offset=20)
+    remote_only = make_entries(7, offset=40)
+    sqlite_dict.update({**shared, **local_only})
+    remote = {**shared, **remote_only}
+    cache_server.entries = {k: v.to_dict() for k, v in remote.items()}
+
+    cache = Cache(data=sqlite_dict, remote=True)
+    cache.coop = Coop(url=cache_server.url)
+    with cache:
+        assert set(sqlite_dict.keys()) == {*shared, *local_only, *remote_only}
+        assert set(cache_server.entries) == {*shared, *local_only, *remote_only}
+        cache_server.requests.clear()
+        cache.store(**CacheEntry.store_input_example())
+
+    new_key = CacheEntry.example().key
+    assert new_key in cache_server.entries
+    # only the new entry is sent on exit
+    assert cache_server.requests == [
+        ("upload-cache-entries", {"entries": [sqlite_dict[new_key].to_dict()]})
+    ]
+
+
+def test_remote_entries_under_first_version_keys_are_not_downloaded_again(
+    cache_server, sqlite_dict, make_entries, monkeypatch
+):
+    entries = make_entries(20)
+    sqlite_dict.update(entries)
+    # the server has the same entries, keyed as before keys were versioned
+    cache_server.entries = {v.key_for(1): v.to_dict() for v in entries.values()}
+
+    cache = Cache(data=sqlite_dict, remote=True)
+    cache.coop = Coop(url=cache_server.url)
+    # the first-version keys are looked up without reading the local entries
+    monkeypatch.setattr(
+        SQLiteDict, "values", lambda self: pytest.fail("the entries were read")
+    )
+    for _ in range(2):
+        cache_server.requests.clear()
+        with cache:
+            pass
+        endpoints = [endpoint for endpoint, _ in cache_server.requests]
+        assert "get-cache-entries-by-keys" not in endpoints
+    assert set(sqlite_dict.keys()) == set(entries)
+    # the entries are uploaded under their current keys once, on the first sync
+    assert set(entries) <= set(cache_server.entries)
+    assert "upload-cache-entries" not in endpoints
+
+
+def test_remote_cache_falls_back_to_the_legacy_endpoints(
+    cache_server, sqlite_dict, make_entries
+):
+    cache_server.legacy = True
+    local = make_entries(5)
+    remote = make_entries(3, offset=10)
+    sqlite_dict.update(local)
+    # one of the remote entries is keyed as before keys were versioned
+    cache_server.entries = {k: v.to_dict() for k, v in remote.items()}
+    legacy_entry = next(iter(local.values()))
+    cache_server.entries[legacy_entry.key_for(1)] = legacy_entry.to_dict()
+
+    cache = Cache(data=sqlite_dict, remote=True)
+    cache.coop = Coop(url=cache_server.url)
+    with cache:
+        assert set(sqlite_dict.keys()) == {*local, *remote}
+        cache.store(**CacheEntry.store_input_example())
+
+    endpoints = [endpoint for endpoint, _ in cache_server.requests]
+    # the sync endpoints are probed once
+    assert endpoints == [
+        "get-cache-digests",
+        "get-cache-entries",
+        "create-cache-entries",
+    ]
+    # only the local keys are excluded; the entry the server keeps under its
+    # first-version key is recognized by its current key, and not added again
+    excluded = json.loads(cache_server.requests[1][1]["json_string"])
+    assert sorted(excluded) == sorted(local)
+    [(_, payload)] = [
+        request
+        for request in cache_server.requests
+        if request[0] == "create-cache-entries"
+    ]
+    # only the new entry is sent on exit
+    assert list(json.loads(payload["json_string"])) == [CacheEntry.example().key]
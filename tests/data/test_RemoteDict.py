@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from edsl.data import CacheEntry
+from edsl.data.Cache import Cache
+from edsl.data.RemoteDict import RemoteDict
+from edsl.data.RemoteDictServer import RemoteDictServer
+from edsl.data.SQLiteDict import SQLiteDict
+
+
+@pytest.fixture
+def server():
+    with RemoteDictServer() as server:
+        yield server
+
+
+def test_RemoteDict_behaves_like_a_dict(server, make_entries):
+    d = RemoteDict(server.url, batch_size=10)
+    entries = make_entries(25)
+    d.update(entries)
+    assert len(d) == 25
+    assert sorted(d.keys()) == sorted(entries)
+    assert dict(d.items()) == entries
+    key = next(iter(entries))
+    assert d[key] == entries[key]
+    assert key in d and "not a key" not in d
+    del d[key]
+    assert d.get(key, "default") == "default"
+    with pytest.raises(KeyError):
+        d[key]
+    with pytest.raises(KeyError):
+        del d["not a key"]
+    # new entries are sent in the background, and read back before they are
+    d["foo"] = CacheEntry.example()
+    assert d.num_pending == 1 and d["foo"] == CacheEntry.example()
+    d.flush()
+    assert d.num_pending == 0 and server.data["foo"] == CacheEntry.example()
+    d.close()
+
+
+def test_RemoteDict_batches_requests(server, make_entries):
+    entries = make_entries(35)
+    server.data.update(entries)
+    d = RemoteDict(server.url, batch_size=10)
+    assert d.get_many([*entries, "not a key"]) == entries
+    assert server.request_counts["get_many"] == 4
+
+    # concurrent lookups are sent together
+    server.request_counts.clear()
+
+    async def lookups():
+        return await asyncio.gather(*(d.async_get(key) for key in list(entries)[:8]))
+
+    assert asyncio.run(lookups()) == list(entries.values())[:8]
+    assert server.request_counts["get_many"] == 1
+    d.close()
+
+
+def test_cache_on_RemoteDict(server, make_entries):
+    cache = Cache(data=RemoteDict(server.url))
+    with cache:
+        key = cache.store(**CacheEntry.store_input_example())
+    assert key in server.data
+    cache.data.close()
+
+    cache = Cache(data=RemoteDict(server.url))
+    output = asyncio.run(cache.async_fetch(**CacheEntry.fetch_input_example()))
+    assert output == server.data[key].output
+    assert cache.prefetch(make_entries(3)) == 0
+    cache.data.close()
+
+
+@pytest.mark.parametrize("failure", ["invalid json", "timeout"])
+@pytest.mark.filterwarnings("ignore:Could not send the pending cache entries")
+def test_RemoteDict_retries_pending_entries_after_failed_writes(failure):
+    server = RemoteDictServer()
+    failed = []
+
+    @web.middleware
+    async def fail_first_write(request, handler):
+        if request.path.endswith("set_many") and not failed:
+            failed.append(request.path)
+            if failure == "timeout":
+                await asyncio.sleep(1)
+            return web.Response(text="{not json", content_type="application/json")
+        return await handler(request)
+
+    server.app.middlewares.append(fail_first_write)
+    with server:
+        d = RemoteDict(server.url, timeout=0.2, write_flush_interval=0.05)
+        d["foo"] = CacheEntry.example()
+        deadline = time.monotonic() + 5
+        while "foo" not in server.data and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert failed and server.data["foo"] == CacheEntry.example()
+        d.close()
+        assert d.num_pending == 0
+
+
+@pytest.mark.parametrize("backend", ["dict", "sqlite"])
+def test_RemoteDict_pages_keys_after_the_last_key(tmp_path, make_entries, backend):
+    entries = make_entries(25)
+    data = {} if backend == "dict" else SQLiteDict(f"sqlite:///{tmp_path / 'cache.db'}")
+    data.update(entries)
+    with RemoteDictServer(data) as server:
+        d = RemoteDict(server.url, batch_size=10)
+        assert list(d.keys()) == sorted(entries)
+        assert server.request_counts["keys"] == 3
+        d.close()
+
+
+def test_jobs_on_RemoteDict_do_not_block_the_event_loop(
+    server, language_model_good, monkeypatch
+):
+    from edsl import QuestionFreeText
+
+    def blocking(self, *args, **kwargs):
+        pytest.fail("a blocking call was made")
+
+    cache = Cache(data=RemoteDict(server.url))
+    QuestionFreeText.example().by(language_model_good).run(
+        cache=cache, batch_mode=True, check_api_keys=False
+    )
+    cache.data.close()
+    # creating the Cache does not read the remote entries, and the cached
+    # responses are prefetched without blocking the event loop
+    monkeypatch.setattr(RemoteDict, "values", blocking)
+    monkeypatch.setattr(RemoteDict, "get_many", blocking)
+    cache = Cache(data=RemoteDict(server.url))
+    server.request_counts.clear()
+    results = (
+        QuestionFreeText.example()
+        .by(language_model_good)
+        .run(cache=cache, batch_mode=True, check_api_keys=False)
+    )
+    assert results.select("raw_model_response.how_are_you_raw_model_response").first()[
+        "cached_response"
+    ]
+    assert server.request_counts["get_many"] == 1
+    cache.data.close()
@@ -91,3 +91,206 @@ def test_SQLiteDict_keys(sqlite_dict):
 
 def test_SQLiteDict_main(sqlite_dict):
     main()
+
+
+def test_SQLiteDict_writes_behind_in_batches(tmp_path):
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    db_path = f"sqlite:///{tmp_path / 'cache.db'}"
+    d = SQLiteDict(db_path, write_batch_size=1_000, write_flush_interval=60)
+    for i in range(10):
+        d[f"key{i}"] = CacheEntry.example()
+    # pending entries are visible before they are written
+    assert d.num_pending == 10
+    assert "key3" in d and d["key3"] == CacheEntry.example()
+    assert len(SQLiteDict(db_path)) == 0
+    d.flush()
+    assert d.num_pending == 0
+    assert len(SQLiteDict(db_path)) == 10
+
+
+def test_SQLiteDict_flushes_on_batch_size_and_cache_exit(tmp_path):
+    import time
+    from edsl.data.Cache import Cache
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    db_path = f"sqlite:///{tmp_path / 'cache.db'}"
+    d = SQLiteDict(db_path, write_batch_size=5, write_flush_interval=60)
+    for i in range(5):
+        d[f"key{i}"] = CacheEntry.example()
+    for _ in range(100):
+        if d.num_pending == 0:
+            break
+        time.sleep(0.05)
+    assert d.num_pending == 0
+
+    with Cache(data=d) as c:
+        c.data["key5"] = CacheEntry.example()
+    assert len(SQLiteDict(db_path)) == 6
+
+
+def test_SQLiteDict_without_write_behind(tmp_path):
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    db_path = f"sqlite:///{tmp_path / 'cache.db'}"
+    d = SQLiteDict(db_path, write_behind=False)
+    d["key"] = CacheEntry.example()
+    assert d.num_pending == 0
+    assert "key" in SQLiteDict(db_path)
+
+
+def test_SQLiteDict_mismatched_keys(sqlite_dict):
+    sqlite_dict["same"] = CacheEntry.example()
+    sqlite_dict["other"] = CacheEntry.example()
+    changed = CacheEntry.example()
+    changed.output = "a different output"
+    restamped = CacheEntry.example()
+    restamped.timestamp += 1
+    new_d = {"same": restamped, "other": changed, "new": CacheEntry.example()}
+    assert sqlite_dict.mismatched_keys(new_d, max_batch_size=2) == ["other"]
+    # the staged entries are not kept
+    assert sqlite_dict.mismatched_keys({}) == []
+    assert "new" not in sqlite_dict
+
+
+def test_SQLiteDict_reads_and_compresses_legacy_databases(tmp_path):
+    import json
+    import sqlite3
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    path = tmp_path / "legacy.db"
+    # the schema and JSON values of databases written by earlier versions
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE data (key VARCHAR NOT NULL, value VARCHAR, PRIMARY KEY (key))"
+        )
+        connection.execute(
+            "INSERT INTO data (key, value) VALUES (?, ?)",
+            ("old", json.dumps(CacheEntry.example().to_dict())),
+        )
+    connection.close()
+
+    d = SQLiteDict(f"sqlite:///{path}", write_behind=False)
+    d["new"] = CacheEntry.example()
+    assert dict(d.items()) == {"old": CacheEntry.example(), "new": CacheEntry.example()}
+    assert d.compress_legacy_entries() == 1
+    assert d.compress_legacy_entries() == 0
+    assert d["old"] == CacheEntry.example()
+    assert d.get_many(["old", "new"]) == {
+        "old": CacheEntry.example(),
+        "new": CacheEntry.example(),
+    }
+    # both entries share their prompts
+    d.close()
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM texts").fetchone()[0] == 2
+    connection.close()
+
+
+def test_SQLiteDict_migrates_md5_keys(tmp_path, capsys):
+    import json
+    import sqlite3
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    entry = CacheEntry.example()
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE data (key VARCHAR NOT NULL, value VARCHAR, PRIMARY KEY (key))"
+        )
+        connection.executemany(
+            "INSERT INTO data (key, value) VALUES (?, ?)",
+            [
+                (entry.key_for(1), json.dumps(entry.to_dict())),
+                ("custom", json.dumps(entry.to_dict())),
+            ],
+        )
+    connection.close()
+
+    d = SQLiteDict(f"sqlite:///{path}")
+    assert "Updating the keys" in capsys.readouterr().out
+    assert list(d.keys()) == [entry.key, "custom"]
+    assert d[entry.key] == entry
+    # the first-version keys of the entries written before they had a column are filled in
+    assert d.first_version_keys([entry.key_for(1), entry.key]) == {entry.key_for(1)}
+    d.close()
+    # the database is only migrated once
+    assert SQLiteDict(f"sqlite:///{path}").key_version == 2
+    assert "Updating the keys" not in capsys.readouterr().out
+
+
+def test_SQLiteDict_evict_keeps_most_recent_entries(tmp_path):
+    import json
+    import sqlite3
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    path = tmp_path / "legacy.db"
+    # an entry written before timestamps had their own column
+    old = CacheEntry.example()
+    old.timestamp = 100
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE data (key VARCHAR NOT NULL, value VARCHAR, PRIMARY KEY (key))"
+        )
+        connection.execute(
+            "INSERT INTO data (key, value) VALUES (?, ?)",
+            ("old", json.dumps(old.to_dict())),
+        )
+    connection.close()
+
+    d = SQLiteDict(f"sqlite:///{path}", write_behind=False)
+    for i in range(10):
+        entry = CacheEntry.example()
+        entry.model = "gpt-4" if i % 2 else "gpt-3.5-turbo"
+        entry.timestamp = 1_000 + i
+        d[f"key{i}"] = entry
+    assert d.evict(max_age=500, now=1_009) == 1
+    assert "old" not in d
+    # the 2 most recent gpt-4 entries are kept
+    assert d.evict(model_quotas={"gpt-4": 2}) == 3
+    assert sorted(d.keys()) == ["key0", "key2", "key4", "key6", "key7", "key8", "key9"]
+    assert d.evict(max_entries=4) == 3
+    assert sorted(d.keys()) == ["key6", "key7", "key8", "key9"]
+    size = d._connection().execute("SELECT MAX(size) FROM data").fetchone()[0]
+    assert d.evict(max_bytes=2 * size) == 2
+    assert sorted(d.keys()) == ["key8", "key9"]
+    assert d.evict() == 0
+    d.close()
+
+
+def test_SQLiteDict_collect_texts_and_vacuum(tmp_path):
+    import os
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    path = tmp_path / "cache.db"
+    d = SQLiteDict(f"sqlite:///{path}")
+    entries = {}
+    for i in range(1_000):
+        entry = CacheEntry.example()
+        entry.user_prompt = f"Question {i} " + "x" * 2_000
+        entries[entry.key] = entry
+    d.update(entries)
+    size = os.path.getsize(path)
+    d.evict(max_entries=10)
+    assert d.collect_texts() == 990
+    assert d.vacuum() > 0
+    assert os.path.getsize(path) < size / 10
+    assert len(d) == 10 and all(d[key] == entries[key] for key in d.keys())
+    d.close()
+
+
+def test_SQLiteDict_retries_locked_writes(tmp_path):
+    import sqlite3
+    import threading
+    from edsl.data.SQLiteDict import SQLiteDict
+
+    path = tmp_path / "cache.db"
+    d = SQLiteDict(f"sqlite:///{path}", write_behind=False, busy_timeout=0)
+    # another writer holds the lock for a while
+    other = sqlite3.connect(path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.1, other.commit).start()
+    d["key"] = CacheEntry.example()
+    assert d["key"] == CacheEntry.example()
+    other.close()
+    d.close()
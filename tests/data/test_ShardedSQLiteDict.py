@@ -0,0 +1,74 @@
+import multiprocessing
+
+import pytest
+
+from edsl.data import CacheEntry
+from edsl.data.Cache import Cache
+from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
+
+
+def test_ShardedSQLiteDict_behaves_like_a_dict(tmp_path, make_entries):
+    d = ShardedSQLiteDict(str(tmp_path / "cache"), num_shards=4)
+    entries = make_entries(100)
+    d.update(entries, max_batch_size=30)
+    assert len(d) == 100
+    assert sorted(d.keys()) == sorted(entries)
+    assert all(d[key] == entry for key, entry in entries.items())
+    # the keys are spread over all the shards
+    assert all(len(shard) > 0 for shard in d.shards)
+    assert d.get_many([*list(entries)[:5], "not a key"]) == {
+        key: entries[key] for key in list(entries)[:5]
+    }
+    # the keys are paged in order across the shards
+    assert d.keys_after(limit=10) == sorted(entries)[:10]
+    assert d.keys_after(sorted(entries)[94]) == sorted(entries)[95:]
+    key = next(iter(entries))
+    del d[key]
+    assert key not in d
+    assert d.get(key, "default") == "default"
+    with pytest.raises(KeyError):
+        d[key]
+    d.close()
+
+    reopened = ShardedSQLiteDict(f"sqlite:///{tmp_path / 'cache'}")
+    assert reopened.num_shards == 4 and len(reopened) == 99
+    with pytest.raises(ValueError):
+        ShardedSQLiteDict(str(tmp_path / "cache"), num_shards=8)
+    reopened.close()
+
+
+def write_entries(db_path, entries):
+    d = ShardedSQLiteDict(db_path)
+    for key, entry in entries.items():
+        d[key] = entry
+    d.close()
+
+
+def test_ShardedSQLiteDict_concurrent_writers(tmp_path, make_entries):
+    db_path = str(tmp_path / "cache")
+    ShardedSQLiteDict(db_path, num_shards=4).close()
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(
+            target=write_entries, args=(db_path, make_entries(200, offset=200 * i))
+        )
+        for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 4
+    d = ShardedSQLiteDict(db_path)
+    assert len(d) == 800
+    assert sorted(d.keys()) == sorted(make_entries(800))
+
+
+def test_cache_on_ShardedSQLiteDict(tmp_path):
+    cache = Cache(data=ShardedSQLiteDict(str(tmp_path / "cache"), num_shards=2))
+    with cache:
+        key = cache.store(**CacheEntry.store_input_example())
+    assert cache.data.num_pending == 0
+    assert key in ShardedSQLiteDict(str(tmp_path / "cache"))
+    assert cache.compact(max_entries=0) == 1
+    assert len(cache) == 0
@@ -144,5 +144,27 @@ def test_handle_timeout_exception(create_survey, capsys):
     # assert "Task `question_0` failed with `InterviewTimeoutError" in captured.out
 
 
+def test_prompts_rendered_once_per_question(create_survey, monkeypatch):
+    from edsl.agents.PromptConstructionMixin import PromptConstructorMixin
+    from edsl.data.Cache import Cache
+
+    calls = []
+    construct_user_prompt = PromptConstructorMixin.construct_user_prompt
+
+    def counting_construct_user_prompt(self):
+        calls.append(self.question.question_name)
+        return construct_user_prompt(self)
+
+    monkeypatch.setattr(
+        PromptConstructorMixin, "construct_user_prompt", counting_construct_user_prompt
+    )
+    model = create_language_model(ValueError, 100)()
+    survey = create_survey(num_questions=3, chained=True)
+    results = survey.by(model).run(cache=Cache())
+    assert sorted(calls) == ["question_0", "question_1", "question_2"]
+    # the memory of the previous answer is still part of the prompt
+    assert "SPAM!" in results[0]["prompt"]["question_2_user_prompt"]["text"]
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -200,6 +200,165 @@ def test_normal_run():
     assert results[0]["answer"] == {"name": "SPAM!"}
 
 
+def test_run_with_bounded_concurrency():
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    import asyncio
+    from typing import Any
+
+    calls = {"in_flight": 0, "peak": 0}
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            calls["in_flight"] += 1
+            calls["peak"] = max(calls["peak"], calls["in_flight"])
+            await asyncio.sleep(0.01)
+            calls["in_flight"] -= 1
+            return {"message": """{"answer": "SPAM!"}"""}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    q = QuestionFreeText(question_text="What is {{ x }}?", question_name="name")
+    scenarios = [Scenario({"x": i}) for i in range(10)]
+    results = (
+        q.by(scenarios)
+        .by(TestLanguageModelGood())
+        .run(cache=Cache(), n=2, max_concurrency=3, batch_mode=True)
+    )
+    assert len(results) == 20
+    assert calls["peak"] <= 3
+    assert len(results.task_history.indices) == 0
+    # the task history covers every interview, not only those that raised exceptions
+    assert len(results.task_history.get_updates()) == 20
+    counts = results.task_history.plotting_data(num_periods=5)
+    assert len(counts) == 5 and all(sum(c.values()) == 20 for c in counts)
+
+
+def test_runner_can_run_twice():
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    from edsl.jobs.runners.JobsRunnerAsyncio import JobsRunnerAsyncio
+    from typing import Any
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            return {"message": """{"answer": "SPAM!"}"""}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    q = QuestionFreeText(question_text="What is {{ x }}?", question_name="name")
+    job = q.by([Scenario({"x": i}) for i in range(3)]).by(TestLanguageModelGood())
+    runner = JobsRunnerAsyncio(job)
+    assert len(runner.run(cache=Cache(), batch_mode=True)) == 3
+    assert len(runner.run(cache=Cache(), batch_mode=True)) == 3
+
+
+def test_run_with_multiple_workers(tmp_path):
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    from edsl.data.SQLiteDict import SQLiteDict
+    import asyncio
+    import os
+    from typing import Any
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            await asyncio.sleep(0.01)
+            if "fail" in user_prompt:
+                raise ValueError("fail")
+            return {"message": """{"answer": "%d"}""" % os.getpid()}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    q = QuestionFreeText(question_text="What is {{ x }}?", question_name="name")
+    scenarios = [Scenario({"x": i}) for i in range(7)] + [Scenario({"x": "fail"})]
+    model = TestLanguageModelGood()
+    cache = Cache(data=SQLiteDict(f"sqlite:///{tmp_path / 'cache.db'}"))
+    results = q.by(scenarios).by(model).run(
+        cache=cache, n=2, workers=3, batch_mode=True
+    )
+
+    # the results are in the order in which the interviews were submitted
+    assert [(r.scenario["x"], r.iteration) for r in results] == [
+        (s["x"], i) for s in scenarios for i in range(2)
+    ]
+    # each worker process answered some of the questions
+    answers = {r.answer["name"] for r in list(results)[:14]}
+    assert len(answers) == 3 and str(os.getpid()) not in answers
+    assert results.task_history.indices == [14, 15]
+    # the new cache entries are written back by the parent process
+    assert len(SQLiteDict(f"sqlite:///{tmp_path / 'cache.db'}")) == 14
+
+    rerun = q.by(scenarios[:7]).by(model).run(
+        cache=cache, n=2, workers=2, batch_mode=True
+    )
+    assert [r.answer["name"] for r in rerun] == [
+        r.answer["name"] for r in list(results)[:14]
+    ]
+
+
+
+def test_run_with_multiple_workers_on_sharded_cache(tmp_path):
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    from edsl.data.ShardedSQLiteDict import ShardedSQLiteDict
+    import asyncio
+    from typing import Any
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            await asyncio.sleep(0.01)
+            return {"message": """{"answer": "SPAM!"}"""}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    q = QuestionFreeText(question_text="What is {{ x }}?", question_name="name")
+    scenarios = [Scenario({"x": i}) for i in range(6)]
+    cache = Cache(data=ShardedSQLiteDict(str(tmp_path / "cache"), num_shards=4))
+    results = q.by(scenarios).by(TestLanguageModelGood()).run(
+        cache=cache, n=2, workers=3, batch_mode=True
+    )
+    assert len(results) == 12
+    # the workers write their entries to the shards themselves
+    assert len(ShardedSQLiteDict(str(tmp_path / "cache"))) == 12
+    assert len(cache.new_entries) == 12
+
 def test_handle_model_exception():
     import random
     from edsl.language_models.LanguageModel import LanguageModel
@@ -281,3 +440,133 @@ if __name__ == "__main__":
         return valid_job
 
     test_jobs_run(valid_job())
+
+
+def test_rerun_uses_prefetched_responses(tmp_path, monkeypatch):
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    from edsl.data.SQLiteDict import SQLiteDict
+    from edsl.jobs.buckets.TokenBucket import TokenBucket
+    from typing import Any
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            return {"message": """{"answer": "%d"}""" % len(user_prompt)}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    q0 = QuestionFreeText(question_text="What is {{ x }}?", question_name="q0")
+    q1 = QuestionFreeText(question_text="And after {{ x }}?", question_name="q1")
+    # q1 remembers the answer to q0, so its prompt is only known once q0 is answered
+    survey = Survey([q0, q1]).add_targeted_memory(q1, q0)
+    scenarios = [Scenario({"x": i}) for i in range(5)]
+    model = TestLanguageModelGood()
+    cache = Cache(data=SQLiteDict(f"sqlite:///{tmp_path / 'cache.db'}"))
+    results = survey.by(scenarios).by(model).run(cache=cache, batch_mode=True)
+
+    lookups = {"get_many": 0, "get": 0, "get_tokens": 0}
+
+    def counting(name, method):
+        def wrapper(*args, **kwargs):
+            lookups[name] += 1
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    for cls, name in [
+        (SQLiteDict, "get_many"),
+        (SQLiteDict, "get"),
+        (TokenBucket, "get_tokens"),
+    ]:
+        monkeypatch.setattr(cls, name, counting(name, getattr(cls, name)))
+    # a new session, whose memory tier is empty
+    cache = Cache(data=cache.data)
+    rerun = survey.by(scenarios).by(model).run(cache=cache, batch_mode=True)
+
+    assert [r.answer for r in rerun] == [r.answer for r in results]
+    # the responses to q0 are fetched in one query, before the interviews start
+    assert lookups["get_many"] == 1
+    # only the responses to q1 are looked up one at a time, and use rate-limit capacity
+    assert lookups["get"] == 5
+    assert lookups["get_tokens"] == 2 * 5
+    assert cache.prefetched == {}
+
+
+def test_unfetched_prefetched_responses_are_released_with_their_interview(
+    monkeypatch,
+):
+    from edsl.language_models.LanguageModel import LanguageModel
+    from edsl.enums import LanguageModelType, InferenceServiceType
+    from edsl.questions import QuestionFreeText
+    from edsl.data.Cache import Cache
+    from edsl.data.CacheEntry import CacheEntry
+    from edsl.jobs.interviews.Interview import Interview
+    from edsl.jobs.runners import JobsRunnerAsyncio as runner_module
+    from typing import Any
+
+    class TestLanguageModelGood(LanguageModel):
+        _model_ = LanguageModelType.TEST.value
+        _parameters_ = {"temperature": 0.5}
+        _inference_service_ = InferenceServiceType.TEST.value
+
+        async def async_execute_model_call(
+            self, user_prompt: str, system_prompt: str
+        ) -> dict[str, Any]:
+            return {"message": """{"answer": "SPAM!"}"""}
+
+        def parse_response(self, raw_response: dict[str, Any]) -> str:
+            return raw_response["message"]
+
+    # each interview prefetches a response that none of its questions fetches, as for a skipped question
+    get_keys = Interview.get_prefetchable_cache_keys
+
+    def get_keys_and_an_unused_one(self, debug=False):
+        yield from get_keys(self, debug=debug)
+        yield f"unused-{self.scenario['x']}"
+
+    monkeypatch.setattr(
+        Interview, "get_prefetchable_cache_keys", get_keys_and_an_unused_one
+    )
+    monkeypatch.setattr(runner_module, "PREFETCH_BATCH_SIZE", 1)
+    cache = Cache(data={f"unused-{i}": CacheEntry.example() for i in range(5)})
+    held = []
+    release = Cache.release
+
+    def recording_release(self, keys):
+        release(self, keys)
+        held.append(len(self.prefetched))
+
+    monkeypatch.setattr(Cache, "release", recording_release)
+    q = QuestionFreeText(question_text="What is {{ x }}?", question_name="name")
+    results = (
+        q.by([Scenario({"x": i}) for i in range(5)])
+        .by(TestLanguageModelGood())
+        .run(cache=cache, max_concurrency=1, batch_mode=True)
+    )
+    assert len(results) == 5
+    assert held == [0] * 5
+
+
+def test_deleted_entries_are_not_served_from_prefetched():
+    from edsl.data.Cache import Cache
+    from edsl.data.CacheEntry import CacheEntry
+
+    cache = Cache.example()
+    cache.prefetch([CacheEntry.example().key])
+    del cache[CacheEntry.example().key]
+    assert cache.fetch(**CacheEntry.fetch_input_example()) is None
+
+
+def test_empty_task_history_has_no_plotting_data():
+    from edsl.jobs.tasks.TaskHistory import TaskHistory
+
+    assert TaskHistory([]).plotting_data() == []
@@ -64,3 +64,56 @@ async def test_no_overflow():
     bucket.last_refill = time.monotonic() - 1000
     bucket.refill()
     assert bucket.tokens == 5, "Token count should not exceed capacity"
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_order():
+    bucket = TokenBucket(
+        bucket_name="test", bucket_type="requests", capacity=5, refill_rate=20
+    )
+    bucket.tokens = 0
+    served = []
+
+    async def request(name, amount):
+        await bucket.get_tokens(amount)
+        served.append(name)
+
+    tasks = [
+        asyncio.create_task(request(i, amount)) for i, amount in enumerate([3, 1, 2, 1])
+    ]
+    await asyncio.gather(*tasks)
+    assert served == [0, 1, 2, 3]
+    assert bucket.wait_time(0) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_block_queue():
+    bucket = TokenBucket(
+        bucket_name="test", bucket_type="requests", capacity=5, refill_rate=10
+    )
+    bucket.tokens = 0
+    first = asyncio.create_task(bucket.get_tokens(5))
+    second = asyncio.create_task(bucket.get_tokens(1))
+    await asyncio.sleep(0.01)
+    assert bucket.wait_time(1) > 0.5
+    first.cancel()
+    start_time = time.monotonic()
+    await second
+    assert time.monotonic() - start_time < 0.3
+    assert len(bucket._waiters) == 0
+
+
+def test_log_is_bounded():
+    bucket = TokenBucket(
+        bucket_name="test",
+        bucket_type="requests",
+        capacity=5,
+        refill_rate=1,
+        log_max_samples=50,
+        log_resolution=0.0,
+    )
+    for _ in range(10_000):
+        bucket.refill()
+    assert len(bucket.log) <= 50
+    assert len(bucket.get_log()) == len(bucket.log)
+    assert bucket.get_log()[-1][1] == bucket.tokens
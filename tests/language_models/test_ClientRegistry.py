@@ -0,0 +1,68 @@
+import asyncio
+from edsl.language_models.ClientRegistry import ClientRegistry
+
+
+def test_clients_are_reused_per_service_and_key():
+    registry = ClientRegistry(max_connections=5)
+
+    async def session(service, api_key):
+        async with registry.aiohttp_session(service=service, api_key=api_key) as s:
+            return s
+
+    async def main():
+        async with registry:
+            a = await session("s1", "k1")
+            assert await session("s1", "k1") is a
+            assert await session("s1", "k2") is not a
+            assert await session("s2", "k1") is not a
+            assert a.connector.limit == 5
+            assert len(registry) == 3
+        assert a.closed
+        assert len(registry) == 0
+
+    asyncio.run(main())
+
+
+def test_clients_are_not_shared_across_event_loops():
+    registry = ClientRegistry()
+
+    async def get_session():
+        async with registry:
+            async with registry.aiohttp_session(service="s", api_key="k") as session:
+                assert len(registry) == 1
+        return session
+
+    first = asyncio.run(get_session())
+    second = asyncio.run(get_session())
+    assert first is not second
+    assert first.closed and second.closed
+
+
+def test_nested_users_close_only_at_the_end():
+    registry = ClientRegistry()
+
+    async def main():
+        async with registry:
+            async with registry:
+                async with registry.aiohttp_session(service="s", api_key="k") as s:
+                    pass
+            assert not s.closed
+        assert s.closed
+
+    asyncio.run(main())
+
+
+def test_clients_are_closed_after_each_call_outside_of_the_registry():
+    registry = ClientRegistry()
+
+    async def main():
+        async with registry.aiohttp_session(service="s", api_key="k") as first:
+            assert not first.closed
+            assert len(registry) == 0
+        async with registry.aiohttp_session(service="s", api_key="k") as second:
+            pass
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first is not second
+    assert first.closed and second.closed
@@ -203,6 +203,75 @@ class TestLanguageModel(unittest.TestCase):
         assert m.has_valid_api_key()
 
 
+    def test_identical_requests_in_flight_are_coalesced(self):
+        from edsl.data.Cache import Cache
+
+        calls = []
+
+        class CountingModel(self.good_class):
+            async def async_execute_model_call(
+                self, user_prompt: str, system_prompt: str
+            ) -> dict[str, Any]:
+                calls.append(user_prompt)
+                await asyncio.sleep(0.1)
+                return {"message": """{"answer": "Hello world"}"""}
+
+        m = CountingModel()
+        cache = Cache()
+
+        async def main():
+            return await asyncio.gather(
+                *[
+                    m.async_get_raw_response(
+                        user_prompt="Hello", system_prompt="", cache=cache
+                    )
+                    for _ in range(5)
+                ],
+                m.async_get_raw_response(
+                    user_prompt="Bye", system_prompt="", cache=cache
+                ),
+            )
+
+        responses = asyncio.run(main())
+        self.assertEqual(sorted(calls), ["Bye", "Hello"])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.in_flight, {})
+        # only the request that called the model is not counted as cached
+        self.assertEqual(
+            [r["cached_response"] for r in responses],
+            [False, True, True, True, True, False],
+        )
+        self.assertTrue(all(r["message"] == responses[0]["message"] for r in responses))
+
+    def test_failed_request_in_flight_fails_the_identical_ones(self):
+        from edsl.data.Cache import Cache
+
+        class FailingModel(self.good_class):
+            async def async_execute_model_call(
+                self, user_prompt: str, system_prompt: str
+            ) -> dict[str, Any]:
+                await asyncio.sleep(0.1)
+                raise ValueError("the service is down")
+
+        m = FailingModel()
+        cache = Cache()
+
+        async def main():
+            return await asyncio.gather(
+                *[
+                    m.async_get_raw_response(
+                        user_prompt="Hello", system_prompt="", cache=cache
+                    )
+                    for _ in range(3)
+                ],
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(cache.in_flight, {})
+        self.assertEqual(len(cache), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
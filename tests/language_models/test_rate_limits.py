@@ -0,0 +1,95 @@
+import pytest
+from edsl.jobs.buckets.BucketCollection import BucketCollection
+from edsl.language_models import LanguageModel
+from edsl.language_models.rate_limits import parse_rate_limit_headers
+
+
+def test_parse_openai_and_anthropic_headers():
+    openai_headers = {
+        "X-RateLimit-Limit-Requests": "600",
+        "X-RateLimit-Remaining-Requests": "599",
+        "X-RateLimit-Reset-Requests": "100ms",
+        "X-RateLimit-Limit-Tokens": "60000",
+        "X-RateLimit-Remaining-Tokens": "59000",
+        "X-RateLimit-Reset-Tokens": "1m0.5s",
+    }
+    assert parse_rate_limit_headers(openai_headers) == {
+        "requests": {"limit": 600.0, "remaining": 599.0, "reset": 0.1},
+        "tokens": {"limit": 60000.0, "remaining": 59000.0, "reset": 60.5},
+    }
+    anthropic_headers = {
+        "anthropic-ratelimit-requests-limit": "50",
+        "anthropic-ratelimit-requests-remaining": "49",
+        "anthropic-ratelimit-requests-reset": "2000-01-01T00:00:00Z",
+    }
+    assert parse_rate_limit_headers(anthropic_headers) == {
+        "requests": {"limit": 50.0, "remaining": 49.0, "reset": 0.0}
+    }
+
+
+def test_headers_update_the_model_buckets():
+    model = LanguageModel.example()
+    buckets = BucketCollection()
+    buckets.add_model(model)
+    model.update_rate_limits_from_headers(
+        {
+            "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-remaining-requests": "599",
+            "x-ratelimit-limit-tokens": "60000",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "6s",
+        }
+    )
+    requests_bucket = buckets[model].requests_bucket
+    tokens_bucket = buckets[model].tokens_bucket
+    assert requests_bucket.capacity == requests_bucket.refill_rate == pytest.approx(8)
+    assert tokens_bucket.capacity == tokens_bucket.refill_rate == pytest.approx(800)
+    # the token limit is used up, so the bucket waits for the reset
+    assert tokens_bucket.wait_time(800) == pytest.approx(7, abs=0.1)
+    assert model.RPM == pytest.approx(480)
+
+
+def test_real_openai_headers_are_converted_to_per_second_buckets():
+    model = LanguageModel.example()
+    buckets = BucketCollection()
+    buckets.add_model(model)
+    # as returned by the OpenAI API, for a 60 RPM, 150k TPM limit
+    model.update_rate_limits_from_headers(
+        {
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-limit-tokens": "150000",
+            "x-ratelimit-remaining-requests": "59",
+            "x-ratelimit-remaining-tokens": "149984",
+            "x-ratelimit-reset-requests": "1s",
+            "x-ratelimit-reset-tokens": "6m0s",
+        }
+    )
+    requests_bucket = buckets[model].requests_bucket
+    tokens_bucket = buckets[model].tokens_bucket
+    # 80% of the per-minute limits, per second
+    assert requests_bucket.capacity == requests_bucket.refill_rate == pytest.approx(0.8)
+    assert tokens_bucket.capacity == tokens_bucket.refill_rate == pytest.approx(2000)
+    # the remaining capacity is a count, so it does not raise the tokens above one second's worth
+    assert requests_bucket.tokens <= 0.8
+    assert tokens_bucket.tokens <= 2000
+    # 5 requests remain, less than the 12 held back, so the bucket waits for the reset
+    model.update_rate_limits_from_headers(
+        {
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "5",
+            "x-ratelimit-reset-requests": "55s",
+        }
+    )
+    assert requests_bucket.wait_time(1) > 55
+
+
+def test_rate_limit_listeners_are_not_attributes_of_the_model():
+    import copy
+
+    model = LanguageModel.example()
+    model.RPM  # sets the default rate limits
+    attributes = dict(model.__dict__)
+    buckets = BucketCollection()
+    buckets.add_model(model)
+    assert model.__dict__ == attributes
+    assert copy.deepcopy(model) == model
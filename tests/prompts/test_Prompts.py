@@ -103,6 +103,29 @@ def test_prompt_render():
     ).text == "Hello, Mr. Horton"
 
 
+def test_prompt_templates_are_compiled_once():
+    from edsl.prompts.Prompt import _compile_template, _find_template_variables
+
+    text = "Hi, {{first_name}} {{last_name}}"
+    _compile_template.cache_clear()
+    _find_template_variables.cache_clear()
+    for name in ["Ann", "Bob", "Cal"]:
+        p = Prompt(text)
+        assert sorted(p.template_variables()) == ["first_name", "last_name"]
+        assert not p.undefined_template_variables(
+            {"first_name": name, "last_name": "X"}
+        )
+        assert p.render({"first_name": name, "last_name": "X"}).text == f"Hi, {name} X"
+    assert _compile_template.cache_info().misses == 1
+    assert _find_template_variables.cache_info().misses == 1
+
+
+def test_prompt_render_stops_without_template_syntax():
+    p = Prompt("{{a}}")
+    assert p.render({"a": "{{b}}", "b": "{{c}}", "c": "done"}).text == "done"
+    assert p.render({"a": "50% off {"}).text == "50% off {"
+
+
 # Testing to_dict method
 def test_prompt_to_dict():
     p = Prompt("Hello, {{person}}")
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from edsl.exceptions.results import ResultsColumnNotFoundError, ResultsFilterError
+from edsl.results import Results
+from edsl.results.ColumnarResults import DictionaryArray, _to_column
+
+
+class TestColumnarResults(unittest.TestCase):
+    def setUp(self):
+        self.example_results = Results.example(debug=True)
+        self.columnar = self.example_results.to_columnar()
+
+    def test_built_once(self):
+        self.assertIs(self.columnar, self.example_results.to_columnar())
+        self.example_results.append(self.example_results[0])
+        self.assertEqual(len(self.example_results.to_columnar()), 5)
+
+    def test_rebuilt_when_the_list_changes(self):
+        results = self.example_results
+        results[0] = results[1]
+        self.assertEqual(
+            results.to_columnar().select("how_feeling"),
+            results.select("how_feeling"),
+        )
+        for change in [
+            lambda: results.insert(0, results[2]),
+            lambda: results.pop(),
+            lambda: results.sort(key=lambda result: result["answer"]["how_feeling"]),
+            lambda: results.reverse(),
+            lambda: results.__delitem__(0),
+        ]:
+            columnar = results.to_columnar()
+            change()
+            self.assertIsNot(results.to_columnar(), columnar)
+            self.assertEqual(
+                results.to_columnar().select("how_feeling"),
+                results.select("how_feeling"),
+            )
+
+    def test_column_types(self):
+        self.assertIsInstance(self.columnar.column("how_feeling"), DictionaryArray)
+        self.assertEqual(self.columnar.column("temperature").dtype, np.float64)
+        self.assertEqual(self.columnar.column("iteration").dtype, np.int64)
+        self.assertEqual(self.columnar.column("logprobs").dtype, bool)
+        column = _to_column([1, None, {"a": 1}])
+        self.assertEqual(column.dtype, object)
+        self.assertEqual(column.tolist(), [1, None, {"a": 1}])
+
+    def test_select_matches_results(self):
+        for columns in [("how_feeling",), ("agent.*",), ("*.period", "iteration")]:
+            expected = {
+                k: v for d in self.example_results.select(*columns) for k, v in d.items()
+            }
+            selected = {
+                k: v for d in self.columnar.select(*columns) for k, v in d.items()
+            }
+            self.assertEqual(selected, expected)
+        with self.assertRaises(ResultsColumnNotFoundError):
+            self.columnar.select("poop")
+
+    def test_filter_matches_results(self):
+        for expression in [
+            "how_feeling == 'Great' or how_feeling == 'Terrible'",
+            "temperature > 0.4 and status == 'Sad'",
+            "how_feeling.startswith('O')",  # evaluated row by row
+        ]:
+            filtered = self.columnar.filter(expression)
+            self.assertEqual(
+                list(filtered), list(self.example_results.filter(expression))
+            )
+        with self.assertRaises(ResultsFilterError):
+            self.columnar.filter("poop == 1")
+
+    def test_sort_by_matches_results(self):
+        for reverse in (False, True):
+            for column in ("how_feeling", "status", "period"):
+                self.assertEqual(
+                    list(self.columnar.sort_by(column, reverse=reverse)),
+                    list(self.example_results.sort_by(column, reverse=reverse)),
+                )
+        sorted_results = self.columnar.sort_by("how_feeling").to_results()
+        self.assertIsInstance(sorted_results, Results)
+        self.assertEqual(
+            list(sorted_results), list(self.example_results.sort_by("how_feeling"))
+        )
+
+    def test_to_pandas(self):
+        df = self.columnar.filter("status == 'Sad'").to_pandas(remove_prefix=True)
+        self.assertEqual(len(df), 2)
+        self.assertEqual(list(df["status"]), ["Sad", "Sad"])
+        self.assertEqual(
+            list(df.columns), [c.split(".", 1)[1] for c in self.columnar.columns]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()